@@ -0,0 +1,306 @@
+"""
+Welcome Uganda! -- benchmark suite
+Generates synthetic catalogs (attractions + reviews + favorites) and times the
+hot paths of peerlearning.py on them. Results are printed / written as JSON so
+runs can be compared between releases.
+
+    python benchmark.py --sizes 1000 10000 100000 --output bench.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional
+
+import peerlearning as pl
+
+# ------------------ Synthetic data ------------------
+NAME_WORDS = ["Lake", "Falls", "Forest", "Park", "Hill", "River", "Crater", "Island", "Market", "Palace",
+              "Museum", "Gorge", "Swamp", "Valley", "Springs", "Sanctuary", "Reserve", "Cave", "Beach", "Gardens"]
+NAME_PREFIXES = ["Upper", "Lower", "Great", "Little", "Old", "New", "Royal", "Hidden", "Golden", "Blue",
+                 "Misty", "Silent", "Twin", "Red", "Green", "Sunset"]
+DESCRIPTION_WORDS = ["wildlife", "safari", "hiking", "views", "birdwatching", "culture", "history", "boat",
+                     "rafting", "gorillas", "chimpanzees", "waterfalls", "trails", "crafts", "food", "lions",
+                     "elephants", "canoe", "camping", "sunrise", "photography", "village", "tea", "coffee"]
+CITIES = sorted({a["city"] for a in pl.DEFAULT_ATTRACTIONS})
+REGIONS = sorted({a["region"] for a in pl.DEFAULT_ATTRACTIONS})
+CATEGORIES = sorted(pl.CATEGORY_EMOJIS)
+UGANDA_BOUNDS = ((-1.5, 4.2), (29.6, 35.0))   # (lat range, lon range)
+OPENING_HOURS = ["06:00-18:00", "06:00-17:00", "07:00-17:00", "08:00-18:00", "09:00-17:00", "17:00-23:00", "All day"]
+
+def make_catalog(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(1, n + 1):
+        name = f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)}"
+        catalog.append({
+            "id": f"A{i:06d}",
+            "name": name,
+            "region": rng.choice(REGIONS),
+            "category": rng.choice(CATEGORIES),
+            "city": rng.choice(CITIES),
+            "description": " ".join(rng.sample(DESCRIPTION_WORDS, 6)).capitalize() + ".",
+            "opening_hours": rng.choice(OPENING_HOURS),
+            "entry_fee_usd": rng.choice([0, 2, 3, 5, 10, 15, 30, 35, 40, 45, 50]),
+            "popularity": round(rng.uniform(5.0, 10.0), 1),
+            "image": f"img_{i:06d}.jpg",
+            "lat": round(rng.uniform(*UGANDA_BOUNDS[0]), 5),
+            "lon": round(rng.uniform(*UGANDA_BOUNDS[1]), 5),
+        })
+    return catalog
+
+def make_reviews(catalog: List[Dict[str, Any]], per_attraction: float = 3.0, seed: int = 2) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    reviews: Dict[str, List[Dict[str, Any]]] = {}
+    for a in catalog:
+        for _ in range(int(rng.expovariate(1 / per_attraction))):
+            reviews.setdefault(a["id"], []).append({
+                "author": rng.choice(["Anonymous", "Amina", "John", "Grace", "Peter", "Sarah"]),
+                "rating": rng.randint(1, 5),
+                "comment": " ".join(rng.sample(DESCRIPTION_WORDS, 5)),
+                "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+            })
+    return reviews
+
+def make_favorites(catalog: List[Dict[str, Any]], users: int = 100, per_user: int = 10, seed: int = 3) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    ids = [a["id"] for a in catalog]
+    return {f"user{u:04d}": rng.sample(ids, min(per_user, len(ids))) for u in range(users)}
+
+def write_dataset(data_dir: Path, n: int, seed: int = 1):
+    catalog = make_catalog(n, seed)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    pl.configure_data_dir(data_dir)
+    pl.save_json(pl.ATTRACTIONS_FILE, catalog)
+    pl.save_json(pl.REVIEWS_FILE, make_reviews(catalog, seed=seed + 1))
+    pl.save_json(pl.FAVORITES_FILE, make_favorites(catalog, seed=seed + 2))
+
+def write_images(data_dir: Path, catalog: List[Dict[str, Any]], limit: int, seed: int = 4) -> int:
+    """Header-only PNG files for a sample of the catalog, plus a few orphans."""
+    rng = random.Random(seed)
+    images = data_dir / "images"
+    images.mkdir(parents=True, exist_ok=True)
+    names = [a["image"] for a in rng.sample(catalog, min(limit, len(catalog)))]
+    names += [f"orphan_{i}.png" for i in range(max(1, len(names) // 50))]
+    for name in names:
+        ihdr = struct.pack(">IIBBBBB", rng.randint(200, 4000), rng.randint(200, 3000), 8, 2, 0, 0, 0)
+        (images / name).write_bytes(b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + bytes(4096))
+    return len(names)
+
+# ------------------ Timing ------------------
+ROUTES_FULL_LIMIT = 1000      # generate_default_routes is O(n²); skip it above this size
+LIST_SCAN_LIMIT = 10000       # linear find_attraction baseline only on smaller catalogs
+MATRIX_LIMIT = 20000          # full n×n road matrix (2 × n² uint16) with numpy
+MATRIX_PURE_LIMIT = 1000      # ... and without it
+IMAGE_FILES_LIMIT = 5000      # image files written for the manifest scan
+
+def timed(fn: Callable[[], Any], repeat: int = 1, ops: int = 1) -> Dict[str, Any]:
+    """Run ``fn`` ``repeat`` times; ``ops`` is how many operations one call performs."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    result = {
+        "runs": repeat,
+        "total_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+    }
+    if ops > 1:
+        result["ops"] = ops
+        result["per_op_us"] = round(min(samples) / ops * 1e6, 3)
+    return result
+
+def peak_mb(fn: Callable[[], Any]) -> float:
+    """Peak Python heap use while ``fn`` runs, in MB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+    finally:
+        tracemalloc.stop()
+
+def bench_size(n: int, seed: int = 1, storage: str = "json", lookups: int = 2000) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    out: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix=f"bench{n}_") as tmp:
+        data_dir = Path(tmp)
+        t0 = time.perf_counter()
+        write_dataset(data_dir, n, seed)
+        out["dataset"] = {
+            "attractions": n,
+            "bytes": sum(p.stat().st_size for p in data_dir.iterdir() if p.is_file()),
+            "generate_ms": round((time.perf_counter() - t0) * 1000, 3),
+        }
+
+        # startup: the same load path main() uses
+        def cold():
+            if pl.SNAPSHOT_FILE.exists():
+                pl.SNAPSHOT_FILE.unlink()
+            attractions, reviews, favorites, routes = pl.load_app_data()
+            reviews.close()
+        out["startup_no_snapshot"] = timed(lambda: pl.load_app_data(use_snapshot=False)[1].close())
+        out["startup_cold"] = timed(cold)
+        out["startup_warm"] = timed(lambda: pl.load_app_data()[1].close(), repeat=3)
+
+        out["reviews_json_load"] = timed(lambda: json.load(open(pl.REVIEWS_FILE, encoding="utf-8")))
+        out["reviews_json_load"]["peak_mb"] = peak_mb(lambda: json.load(open(pl.REVIEWS_FILE, encoding="utf-8")))
+        out["reviews_stream"] = timed(lambda: pl.stream_reviews(pl.REVIEWS_FILE))
+        out["reviews_stream"]["peak_mb"] = peak_mb(lambda: pl.stream_reviews(pl.REVIEWS_FILE))
+        def mmap_cold():
+            pl.REVIEWS_INDEX_FILE.unlink(missing_ok=True)
+            pl.MappedReviews.open(pl.REVIEWS_FILE)
+        out["reviews_mmap_index_build"] = timed(mmap_cold)
+        out["reviews_mmap_open"] = timed(lambda: pl.MappedReviews.open(pl.REVIEWS_FILE), repeat=3)
+        out["reviews_mmap_open"]["peak_mb"] = peak_mb(lambda: pl.MappedReviews.open(pl.REVIEWS_FILE))
+        mapped = pl.MappedReviews.open(pl.REVIEWS_FILE)[0]
+        reviewed = rng.sample(list(mapped), min(200, len(mapped)))
+        # decode() straight from the byte range, so repeats do not hit the cache
+        out["reviews_mmap_read_one"] = timed(lambda: [mapped.decode(dict.__getitem__(mapped, aid)) for aid in reviewed],
+                                             repeat=3, ops=len(reviewed))
+
+        store = pl.open_storage(storage)
+        attractions, reviews, favorites, routes = store.load()
+        ids = [a["id"] for a in attractions]
+        sample_ids = [rng.choice(ids) for _ in range(lookups)]
+
+        if n <= ROUTES_FULL_LIMIT:
+            out["generate_default_routes"] = timed(lambda: pl.generate_default_routes(attractions))
+        else:
+            out["generate_default_routes"] = {"skipped": f"O(n²) with n={n} > {ROUTES_FULL_LIMIT}"}
+        out["route_store_build"] = timed(lambda: pl.RouteStore(attractions), repeat=3)
+        pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(lookups)]
+        out["get_route"] = timed(lambda: [pl.get_route(routes, a, b)["distance_km"] for a, b in pairs], repeat=3, ops=len(pairs))
+        profiler = pl.Profiler(data_dir / "profile.json").start()
+        out["get_route_profiled"] = timed(lambda: [pl.get_route(routes, a, b)["distance_km"] for a, b in pairs], repeat=3, ops=len(pairs))
+        profiler.stop()
+        rows = min(20, n - 1)
+        fresh = pl.RouteStore(attractions)
+        fresh.metrics(0, 0)   # coordinates parsed; the timing below is whole per-origin rows only
+        out["route_row"] = timed(lambda: [fresh._row(k) for k in range(1, rows + 1)], ops=rows)
+        out["route_check"] = timed(lambda: pl.check_routes(routes, attractions))
+        if n <= (MATRIX_LIMIT if pl.np is not None else MATRIX_PURE_LIMIT):
+            out["route_matrix"] = timed(lambda: pl.RouteStore(attractions).build_matrix())
+        else:
+            limit = MATRIX_LIMIT if pl.np is not None else MATRIX_PURE_LIMIT
+            reason = "" if pl.np is not None else "; pure Python is ~1 µs per pair, install numpy for large matrices"
+            out["route_matrix"] = {"skipped": f"n={n} > {limit} {'with' if pl.np is not None else 'without'} numpy{reason}"}
+
+        points = [(rng.uniform(*UGANDA_BOUNDS[0]), rng.uniform(*UGANDA_BOUNDS[1])) for _ in range(200)]
+        out["spatial_index_build"] = timed(lambda: pl.SpatialIndex(attractions))
+        attractions.spatial_index
+        out["nearest_k10"] = timed(lambda: [attractions.spatial_index.nearest(lat, lon, 10) for lat, lon in points],
+                                   repeat=3, ops=len(points))
+        out["within_25km"] = timed(lambda: [attractions.spatial_index.within(lat, lon, 25) for lat, lon in points],
+                                   repeat=3, ops=len(points))
+
+        out["find_attraction"] = timed(lambda: [pl.find_attraction(attractions, aid) for aid in sample_ids],
+                                       repeat=3, ops=len(sample_ids))
+        if n <= LIST_SCAN_LIMIT:
+            plain = [dict(a) for a in attractions]
+            few = sample_ids[:100]
+            out["find_attraction_list_scan"] = timed(lambda: [pl.find_attraction(plain, aid) for aid in few], ops=len(few))
+
+        queries = [rng.choice(DESCRIPTION_WORDS + NAME_WORDS).lower() for _ in range(200)]
+        queries += [f"{rng.choice(NAME_WORDS)} {rng.choice(DESCRIPTION_WORDS)}".lower() for _ in range(100)]
+        out["search_index_build"] = timed(lambda: pl.SearchIndex(attractions))
+        attractions.search_index  # build once for the query timings
+        out["search_top10"] = timed(lambda: [pl.search_attractions(attractions, q, 10) for q in queries],
+                                    repeat=3, ops=len(queries))
+        out["search_all"] = timed(lambda: [pl.search_attractions(attractions, q) for q in queries[:50]], ops=50)
+
+        out["filter_region"] = timed(lambda: [attractions.by_region(r) for r in attractions.regions()],
+                                     repeat=3, ops=len(attractions.regions()))
+        out["filter_category"] = timed(lambda: [attractions.by_category(c) for c in attractions.categories()],
+                                       repeat=3, ops=len(attractions.categories()))
+        facet_queries = [dict(region=rng.choice(REGIONS), category=rng.choice(CATEGORIES), max_fee=40,
+                              min_popularity=rng.choice([6.0, 8.0, 9.0]), open_at=rng.randrange(24 * 60))
+                         for _ in range(100)]
+        out["facet_index_build"] = timed(lambda: pl.FacetIndex(list(attractions)))
+        attractions.facets
+        out["facet_filter"] = timed(lambda: [pl.filter_attractions(attractions, **q) for q in facet_queries],
+                                    repeat=3, ops=len(facet_queries))
+        first_page = lambda by: list(itertools.islice(pl.iter_sorted(attractions, by), pl.PAGE_SIZE))
+        out["first_page_by_popularity"] = timed(lambda: first_page("popularity"), repeat=3)
+        out["full_sort_by_popularity"] = timed(lambda: sorted(attractions, key=lambda a: -(a.get("popularity") or 0)), repeat=3)
+        out["top_rated"] = timed(lambda: pl.top_rated(attractions, reviews, k=10, by="blend"), repeat=3)
+
+        writes = 200
+        def add_reviews():
+            for aid in sample_ids[:writes]:
+                reviews.add(aid, pl.make_review("bench", rng.randint(1, 5), "benchmark"))
+        def add_reviews_batched():
+            with reviews.batch():
+                add_reviews()
+        out["review_write"] = timed(add_reviews, ops=writes)
+        out["review_write_batched"] = timed(add_reviews_batched, ops=writes)
+
+        fav_writes = 50
+        def add_favorites():
+            for i, aid in enumerate(sample_ids[:fav_writes]):
+                favorites.add(f"bench{i % 5}", aid)
+                favorites.remove(f"bench{i % 5}", aid)
+        def add_favorites_batched():
+            with favorites.batch():
+                add_favorites()
+        out["favorite_write"] = timed(add_favorites, ops=fav_writes * 2)
+        out["favorite_write_batched"] = timed(add_favorites_batched, ops=fav_writes * 2)
+        out["most_favorited"] = timed(lambda: favorites.most_favorited(10), repeat=3)
+
+        image_files = write_images(data_dir, list(attractions), IMAGE_FILES_LIMIT, seed)
+        def cold_scan(workers):
+            pl.ImageManifest().refresh(workers)
+        out["image_scan_1_thread"] = timed(lambda: cold_scan(1), ops=image_files)
+        out["image_scan_pool"] = timed(lambda: cold_scan(pl.IMAGE_SCAN_WORKERS), ops=image_files)
+        pl.refresh_image_manifest()
+        out["image_scan_incremental"] = timed(pl.refresh_image_manifest, repeat=3, ops=image_files)
+        out["image_report"] = timed(lambda: pl.ImageManifest.load().report(attractions), repeat=3)
+
+        reviews.close()
+        favorites.close()
+        store.close()
+    return out
+
+def run_benchmarks(sizes: List[int], seed: int = 1, storage: str = "json") -> Dict[str, Any]:
+    results = {}
+    for n in sizes:
+        print(f"⏱ benchmarking {n} attractions ({storage})...", file=sys.stderr)
+        results[str(n)] = bench_size(n, seed, storage)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": getattr(pl.np, "__version__", None),
+            "storage": storage,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark peerlearning.py on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--storage", choices=pl.STORAGE_BACKENDS, default="json")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    report = run_benchmarks(args.sizes, args.seed, args.storage)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
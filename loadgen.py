@@ -0,0 +1,141 @@
+"""
+Welcome Uganda! -- load generator for the HTTP API (peerlearning.py --serve)
+Opens many keep-alive connections at once and replays a mix of lookups,
+searches, listings, routes and review reads/writes against a running server.
+Latency percentiles, throughput and status counts are printed as JSON.
+
+    python peerlearning.py --serve 127.0.0.1:8080 &
+    python loadgen.py --connections 2000 --duration 10
+
+Thousands of connections need a matching open-file limit (``ulimit -n``) on
+both ends.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import quote
+
+# endpoint -> relative weight of the request mix
+MIX = {"lookup": 40, "route": 20, "search": 15, "listing": 15, "reviews": 10}
+SEARCH_WORDS = ["falls", "lake", "park", "forest", "museum", "market", "gorillas", "safari", "crater", "river"]
+
+async def request(reader, writer, method: str, target: str, body: Optional[bytes] = None,
+                  etag: Optional[str] = None) -> Tuple[int, bytes, Optional[str]]:
+    head = [f"{method} {target} HTTP/1.1", "Host: loadgen"]
+    if etag:
+        head.append(f"If-None-Match: {etag}")
+    if body is not None:
+        head += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + (body or b""))
+    await writer.drain()
+    lines = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers.get("content-length") or 0))
+    return status, payload, headers.get("etag")
+
+def make_target(kind: str, rng: random.Random, ids: List[str]) -> Tuple[str, str, Optional[bytes]]:
+    if kind == "lookup":
+        return "GET", f"/attractions/{rng.choice(ids)}", None
+    if kind == "route":
+        return "GET", f"/routes?from={rng.choice(ids)}&to={rng.choice(ids)}", None
+    if kind == "search":
+        return "GET", f"/search?q={quote(rng.choice(SEARCH_WORDS))}&limit=10", None
+    if kind == "listing":
+        return "GET", f"/attractions?min_popularity={rng.choice([6, 7, 8, 9])}&sort=popularity&limit=20", None
+    if kind == "write":
+        body = json.dumps({"author": "loadgen", "rating": rng.randint(1, 5), "comment": "load test"}).encode()
+        return "POST", f"/attractions/{rng.choice(ids)}/reviews", body
+    return "GET", f"/attractions/{rng.choice(ids)}/reviews?limit=5", None
+
+async def client(host: str, port: int, ids: List[str], deadline: float, max_requests: int, write_ratio: float,
+                 seed: int, stats: Dict[str, Any]):
+    rng = random.Random(seed)
+    kinds, weights = list(MIX), list(MIX.values())
+    etags: Dict[str, str] = {}
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats["connect_errors"] += 1
+        return
+    try:
+        sent = 0
+        while sent < max_requests and time.perf_counter() < deadline:
+            kind = "write" if rng.random() < write_ratio else rng.choices(kinds, weights)[0]
+            method, target, body = make_target(kind, rng, ids)
+            t0 = time.perf_counter()
+            status, _, etag = await request(reader, writer, method, target, body, etags.get(target))
+            stats["latency"].append(time.perf_counter() - t0)
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+            stats["kinds"][kind] = stats["kinds"].get(kind, 0) + 1
+            if etag:
+                etags[target] = etag
+            sent += 1
+    except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+        stats["errors"] += 1
+    finally:
+        writer.close()
+
+def percentile(samples: List[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+async def run(host: str, port: int, connections: int, duration: float, max_requests: int,
+              write_ratio: float, seed: int) -> Dict[str, Any]:
+    reader, writer = await asyncio.open_connection(host, port)
+    status, payload, _ = await request(reader, writer, "GET", "/attractions?limit=1000")
+    writer.close()
+    if status != 200:
+        raise SystemExit(f"GET /attractions answered {status}")
+    ids = [a["id"] for a in json.loads(payload)["items"]]
+    if not ids:
+        raise SystemExit("the server has no attractions")
+    stats: Dict[str, Any] = {"latency": [], "status": {}, "kinds": {}, "errors": 0, "connect_errors": 0}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(host, port, ids, t0 + duration, max_requests, write_ratio, seed + i, stats)
+                           for i in range(connections)))
+    elapsed = time.perf_counter() - t0
+    latency = sorted(stats["latency"])
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "connections": connections,
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(latency),
+        "requests_per_s": round(len(latency) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(statistics.fmean(latency)) if latency else 0,
+            "p50": ms(percentile(latency, 0.50)),
+            "p95": ms(percentile(latency, 0.95)),
+            "p99": ms(percentile(latency, 0.99)),
+            "max": ms(latency[-1]) if latency else 0,
+        },
+        "status": {str(k): v for k, v in sorted(stats["status"].items())},
+        "mix": stats["kinds"],
+        "errors": stats["errors"],
+        "connect_errors": stats["connect_errors"],
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test a running `peerlearning.py --serve`")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=1000, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to keep sending")
+    parser.add_argument("--requests", type=int, default=1_000_000, help="stop each connection after this many")
+    parser.add_argument("--write-ratio", type=float, default=0.01, help="share of requests that POST a review")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args.host, args.port, args.connections, args.duration, args.requests,
+                             args.write_ratio, args.seed))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
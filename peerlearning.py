@@ -5,20 +5,46 @@ Features:
  - View / search / filter (region/category)
  - Attraction details (auto-open image, open Google Maps)
  - Routes: CURRENT -> attraction, attraction -> attraction (with steps)
+ - Nearby attractions from real coordinates (lat/lon)
  - Reviews (anonymous option) with full date/time
  - Favorites (add / view / remove)
  - Exit confirmation, friendly emojis & prompts
 """
 
+import argparse
+import asyncio
+import atexit
+import bisect
+import codecs
+import gc
+import functools
+import heapq
 import json
+import math
+import mmap
 import os
+import pickle
+import re
+import signal
+import sqlite3
+import struct
+import sys
+import threading
+import time
 import subprocess
 import platform
+import random
 import webbrowser
+import zlib
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
-from urllib.parse import quote_plus
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from urllib.parse import quote_plus, parse_qs, unquote, urlsplit
+from http import HTTPStatus
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from array import array
 import itertools
 
 # ---------------- Paths ----------------
@@ -27,115 +53,2622 @@ IMAGES_DIR = DATA_DIR / "images"
 ATTRACTIONS_FILE = DATA_DIR / "attractions.json"
 REVIEWS_FILE = DATA_DIR / "reviews.json"
 FAVORITES_FILE = DATA_DIR / "favorites.json"
+FAVORITES_DIR = DATA_DIR / "favorites"
 ROUTES_FILE = DATA_DIR / "routes.json"
+REVIEW_LOG_FILE = DATA_DIR / "reviews.jsonl"
+SNAPSHOT_FILE = DATA_DIR / ".snapshot.pickle"
+SQLITE_FILE = DATA_DIR / "welcome_uganda.db"
+IMAGE_MANIFEST_FILE = DATA_DIR / ".image_manifest.json"
+REVIEWS_INDEX_FILE = DATA_DIR / ".reviews_index.pickle"
+REVIEWS_META_FILE = DATA_DIR / "reviews.meta.json"
+PROFILE_FILE = DATA_DIR / "profile.json"
+
+def configure_data_dir(data_dir):
+    global DATA_DIR, IMAGES_DIR, ATTRACTIONS_FILE, REVIEWS_FILE, FAVORITES_FILE, ROUTES_FILE, REVIEW_LOG_FILE, SNAPSHOT_FILE, SQLITE_FILE
+    global IMAGE_MANIFEST_FILE, FAVORITES_DIR, PROFILE_FILE, REVIEWS_INDEX_FILE, REVIEWS_META_FILE
+    DATA_DIR = Path(data_dir)
+    IMAGES_DIR = DATA_DIR / "images"
+    ATTRACTIONS_FILE = DATA_DIR / "attractions.json"
+    REVIEWS_FILE = DATA_DIR / "reviews.json"
+    FAVORITES_FILE = DATA_DIR / "favorites.json"
+    FAVORITES_DIR = DATA_DIR / "favorites"
+    ROUTES_FILE = DATA_DIR / "routes.json"
+    REVIEW_LOG_FILE = DATA_DIR / "reviews.jsonl"
+    SNAPSHOT_FILE = DATA_DIR / ".snapshot.pickle"
+    SQLITE_FILE = DATA_DIR / "welcome_uganda.db"
+    IMAGE_MANIFEST_FILE = DATA_DIR / ".image_manifest.json"
+    REVIEWS_INDEX_FILE = DATA_DIR / ".reviews_index.pickle"
+    REVIEWS_META_FILE = DATA_DIR / "reviews.meta.json"
+    PROFILE_FILE = DATA_DIR / "profile.json"
 
 # ------------------ Attractions ------------------
 DEFAULT_ATTRACTIONS: List[Dict[str, Any]] = [
     # Northern Region
-    {"id":"A001","name":"Murchison Falls National Park","region":"Northern","category":"Wildlife","city":"Nwoya / Masindi","description":"Spectacular falls, wildlife safaris, Nile River views.","opening_hours":"06:00-18:00","entry_fee_usd":40,"popularity":9.5,"image":"murchison.jpg"},
-    {"id":"A002","name":"Kidepo Valley National Park","region":"Northern","category":"Wildlife","city":"Kidepo","description":"Remote park with lions, elephants, and buffaloes.","opening_hours":"06:00-17:00","entry_fee_usd":50,"popularity":9.2,"image":"kidepo.jpg"},
-    {"id":"A003","name":"Ziwa Rhino Sanctuary","region":"Northern","category":"Wildlife","city":"Nakasongola","description":"Conservation area for rhinos with guided tours.","opening_hours":"07:00-17:00","entry_fee_usd":30,"popularity":8.7,"image":"ziwa.jpg"},
-    {"id":"A004","name":"Lira Cultural Center","region":"Northern","category":"Cultural","city":"Lira","description":"Showcases Acholi culture and arts.","opening_hours":"08:00-18:00","entry_fee_usd":5,"popularity":7.8,"image":"lira.jpg"},
+    {"id":"A001","name":"Murchison Falls National Park","region":"Northern","category":"Wildlife","city":"Nwoya / Masindi","description":"Spectacular falls, wildlife safaris, Nile River views.","opening_hours":"06:00-18:00","entry_fee_usd":40,"popularity":9.5,"image":"murchison.jpg","lat":2.2778,"lon":31.6861},
+    {"id":"A002","name":"Kidepo Valley National Park","region":"Northern","category":"Wildlife","city":"Kidepo","description":"Remote park with lions, elephants, and buffaloes.","opening_hours":"06:00-17:00","entry_fee_usd":50,"popularity":9.2,"image":"kidepo.jpg","lat":3.9,"lon":33.85},
+    {"id":"A003","name":"Ziwa Rhino Sanctuary","region":"Northern","category":"Wildlife","city":"Nakasongola","description":"Conservation area for rhinos with guided tours.","opening_hours":"07:00-17:00","entry_fee_usd":30,"popularity":8.7,"image":"ziwa.jpg","lat":1.495,"lon":32.072},
+    {"id":"A004","name":"Lira Cultural Center","region":"Northern","category":"Cultural","city":"Lira","description":"Showcases Acholi culture and arts.","opening_hours":"08:00-18:00","entry_fee_usd":5,"popularity":7.8,"image":"lira.jpg","lat":2.2499,"lon":32.8999},
 
     # Western Region
-    {"id":"A005","name":"Rwenzori Mountains National Park","region":"Western","category":"Hiking","city":"Kasese","description":"Snow-capped mountains and breathtaking hikes.","opening_hours":"06:00-18:00","entry_fee_usd":35,"popularity":9.3,"image":"rwenzori.jpg"},
-    {"id":"A006","name":"Fort Portal Crater Lakes","region":"Western","category":"Natural Wonders","city":"Fort Portal","description":"Beautiful crater lakes surrounded by forest.","opening_hours":"08:00-17:00","entry_fee_usd":5,"popularity":7.5,"image":"crater_lakes.jpg"},
-    {"id":"A007","name":"Semuliki National Park","region":"Western","category":"Wildlife","city":"Bundibugyo","description":"Hot springs, wildlife, and lush forest trails.","opening_hours":"06:00-17:00","entry_fee_usd":35,"popularity":8.2,"image":"semuliki.jpg"},
-    {"id":"A008","name":"Toro Palace","region":"Western","category":"Cultural","city":"Fort Portal","description":"Traditional palace of the Toro Kingdom.","opening_hours":"09:00-17:00","entry_fee_usd":3,"popularity":6.8,"image":"toro_palace.jpg"},
+    {"id":"A005","name":"Rwenzori Mountains National Park","region":"Western","category":"Hiking","city":"Kasese","description":"Snow-capped mountains and breathtaking hikes.","opening_hours":"06:00-18:00","entry_fee_usd":35,"popularity":9.3,"image":"rwenzori.jpg","lat":0.3833,"lon":29.95},
+    {"id":"A006","name":"Fort Portal Crater Lakes","region":"Western","category":"Natural Wonders","city":"Fort Portal","description":"Beautiful crater lakes surrounded by forest.","opening_hours":"08:00-17:00","entry_fee_usd":5,"popularity":7.5,"image":"crater_lakes.jpg","lat":0.58,"lon":30.25},
+    {"id":"A007","name":"Semuliki National Park","region":"Western","category":"Wildlife","city":"Bundibugyo","description":"Hot springs, wildlife, and lush forest trails.","opening_hours":"06:00-17:00","entry_fee_usd":35,"popularity":8.2,"image":"semuliki.jpg","lat":0.83,"lon":30.05},
+    {"id":"A008","name":"Toro Palace","region":"Western","category":"Cultural","city":"Fort Portal","description":"Traditional palace of the Toro Kingdom.","opening_hours":"09:00-17:00","entry_fee_usd":3,"popularity":6.8,"image":"toro_palace.jpg","lat":0.66,"lon":30.275},
 
     # Central Region
-    {"id":"A009","name":"Kampala National Mosque","region":"Central","category":"Cultural","city":"Kampala","description":"Panoramic city views from the minaret.","opening_hours":"09:00-17:00","entry_fee_usd":0,"popularity":7.2,"image":"mosque.jpg"},
-    {"id":"A010","name":"Ssese Islands","region":"Central","category":"Beaches","city":"Kalangala","description":"Relaxed lakeside beaches and island hopping.","opening_hours":"All day","entry_fee_usd":0,"popularity":7.9,"image":"ssese.jpg"},
-    {"id":"A011","name":"Uganda Museum","region":"Central","category":"Cultural","city":"Kampala","description":"Uganda's oldest museum, exhibits history and culture.","opening_hours":"09:00-17:00","entry_fee_usd":3,"popularity":6.8,"image":"museum.jpg"},
-    {"id":"A012","name":"Entebbe Botanical Gardens","region":"Central","category":"Natural Wonders","city":"Entebbe","description":"Lush gardens by Lake Victoria.","opening_hours":"07:00-17:00","entry_fee_usd":2,"popularity":7.5,"image":"botanical.jpg"},
-    {"id":"A013","name":"Lake Victoria Beaches","region":"Central","category":"Beaches","city":"Entebbe","description":"Sandy beaches and water activities.","opening_hours":"All day","entry_fee_usd":0,"popularity":7.3,"image":"victoria_beach.jpg"},
+    {"id":"A009","name":"Kampala National Mosque","region":"Central","category":"Cultural","city":"Kampala","description":"Panoramic city views from the minaret.","opening_hours":"09:00-17:00","entry_fee_usd":0,"popularity":7.2,"image":"mosque.jpg","lat":0.3155,"lon":32.5623},
+    {"id":"A010","name":"Ssese Islands","region":"Central","category":"Beaches","city":"Kalangala","description":"Relaxed lakeside beaches and island hopping.","opening_hours":"All day","entry_fee_usd":0,"popularity":7.9,"image":"ssese.jpg","lat":-0.3167,"lon":32.25},
+    {"id":"A011","name":"Uganda Museum","region":"Central","category":"Cultural","city":"Kampala","description":"Uganda's oldest museum, exhibits history and culture.","opening_hours":"09:00-17:00","entry_fee_usd":3,"popularity":6.8,"image":"museum.jpg","lat":0.3376,"lon":32.5825},
+    {"id":"A012","name":"Entebbe Botanical Gardens","region":"Central","category":"Natural Wonders","city":"Entebbe","description":"Lush gardens by Lake Victoria.","opening_hours":"07:00-17:00","entry_fee_usd":2,"popularity":7.5,"image":"botanical.jpg","lat":0.06,"lon":32.48},
+    {"id":"A013","name":"Lake Victoria Beaches","region":"Central","category":"Beaches","city":"Entebbe","description":"Sandy beaches and water activities.","opening_hours":"All day","entry_fee_usd":0,"popularity":7.3,"image":"victoria_beach.jpg","lat":0.053,"lon":32.463},
 
     # South Western Region
-    {"id":"A014","name":"Bwindi Impenetrable Forest","region":"South Western","category":"Wildlife","city":"Kisoro","description":"Home to mountain gorillas and rich biodiversity.","opening_hours":"06:00-17:00","entry_fee_usd":50,"popularity":9.8,"image":"bwindi.jpg"},
-    {"id":"A015","name":"Lake Bunyonyi","region":"South Western","category":"Beaches","city":"Kabale","description":"Scenic lake with islands and birdwatching opportunities.","opening_hours":"All day","entry_fee_usd":0,"popularity":8.5,"image":"bunyonyi.jpg"},
-    {"id":"A016","name":"Mgahinga Gorilla National Park","region":"South Western","category":"Wildlife","city":"Mgahinga","description":"Gorilla trekking and golden monkeys.","opening_hours":"06:00-17:00","entry_fee_usd":45,"popularity":9.1,"image":"mgahinga.jpg"},
-    {"id":"A017","name":"Ishasha Sector","region":"South Western","category":"Wildlife","city":"Queen Elizabeth NP","description":"Tree-climbing lions and safari drives.","opening_hours":"06:00-18:00","entry_fee_usd":40,"popularity":8.9,"image":"ishasha.jpg"},
-    {"id":"A018","name":"Queen Elizabeth National Park","region":"South Western","category":"Wildlife","city":"Kasese","description":"Safari park with elephants, lions, and hippos.","opening_hours":"06:00-18:00","entry_fee_usd":40,"popularity":9.4,"image":"queen_elizabeth.jpg"},
+    {"id":"A014","name":"Bwindi Impenetrable Forest","region":"South Western","category":"Wildlife","city":"Kisoro","description":"Home to mountain gorillas and rich biodiversity.","opening_hours":"06:00-17:00","entry_fee_usd":50,"popularity":9.8,"image":"bwindi.jpg","lat":-1.02,"lon":29.68},
+    {"id":"A015","name":"Lake Bunyonyi","region":"South Western","category":"Beaches","city":"Kabale","description":"Scenic lake with islands and birdwatching opportunities.","opening_hours":"All day","entry_fee_usd":0,"popularity":8.5,"image":"bunyonyi.jpg","lat":-1.28,"lon":29.93},
+    {"id":"A016","name":"Mgahinga Gorilla National Park","region":"South Western","category":"Wildlife","city":"Mgahinga","description":"Gorilla trekking and golden monkeys.","opening_hours":"06:00-17:00","entry_fee_usd":45,"popularity":9.1,"image":"mgahinga.jpg","lat":-1.37,"lon":29.65},
+    {"id":"A017","name":"Ishasha Sector","region":"South Western","category":"Wildlife","city":"Queen Elizabeth NP","description":"Tree-climbing lions and safari drives.","opening_hours":"06:00-18:00","entry_fee_usd":40,"popularity":8.9,"image":"ishasha.jpg","lat":-0.59,"lon":29.67},
+    {"id":"A018","name":"Queen Elizabeth National Park","region":"South Western","category":"Wildlife","city":"Kasese","description":"Safari park with elephants, lions, and hippos.","opening_hours":"06:00-18:00","entry_fee_usd":40,"popularity":9.4,"image":"queen_elizabeth.jpg","lat":-0.18,"lon":29.88},
 
     # Additional popular sites (mix)
-    {"id":"A019","name":"Zanzibar Market Uganda","region":"Central","category":"Cultural","city":"Kampala","description":"Local crafts, souvenirs, and street food.","opening_hours":"08:00-18:00","entry_fee_usd":0,"popularity":7.0,"image":"zanzibar_market.jpg"},
-    {"id":"A020","name":"Sipi Falls","region":"Eastern","category":"Natural Wonders","city":"Kapchorwa","description":"Series of stunning waterfalls and hiking trails.","opening_hours":"06:00-18:00","entry_fee_usd":5,"popularity":8.6,"image":"sipi.jpg"},
-    {"id":"A021","name":"Mount Elgon National Park","region":"Eastern","category":"Hiking","city":"Mbale","description":"Volcano hiking and caves exploration.","opening_hours":"06:00-18:00","entry_fee_usd":10,"popularity":8.9,"image":"elgon.jpg"},
-    {"id":"A022","name":"Jinja Source of Nile","region":"Eastern","category":"Natural Wonders","city":"Jinja","description":"Where the Nile begins, ideal for rafting and boat rides.","opening_hours":"06:00-18:00","entry_fee_usd":15,"popularity":9.0,"image":"nile.jpg"},
-    {"id":"A023","name":"Bujagali Falls","region":"Eastern","category":"Natural Wonders","city":"Jinja","description":"Beautiful falls, popular for water sports.","opening_hours":"06:00-18:00","entry_fee_usd":10,"popularity":8.7,"image":"bujagali.jpg"},
-    {"id":"A024","name":"Mbarara Cultural Center","region":"Western","category":"Cultural","city":"Mbarara","description":"Learn Ankole culture and history.","opening_hours":"08:00-17:00","entry_fee_usd":5,"popularity":7.6,"image":"mbarara.jpg"},
-    {"id":"A025","name":"Kampala City Walks","region":"Central","category":"Cultural","city":"Kampala","description":"Guided walking tours of the city.","opening_hours":"08:00-18:00","entry_fee_usd":2,"popularity":7.5,"image":"city_walk.jpg"},
-    {"id":"A026","name":"Buganda Kingdom Palace","region":"Central","category":"Cultural","city":"Mengo","description":"Royal palace of Buganda Kingdom.","opening_hours":"09:00-17:00","entry_fee_usd":5,"popularity":7.9,"image":"buganda_palace.jpg"},
-    {"id":"A027","name":"Mabamba Swamp","region":"Central","category":"Natural Wonders","city":"Entebbe","description":"Birdwatching, especially for the shoebill stork.","opening_hours":"06:00-17:00","entry_fee_usd":5,"popularity":8.3,"image":"mabamba.jpg"},
-    {"id":"A028","name":"Lake Mburo National Park","region":"Western","category":"Wildlife","city":"Mbarara","description":"Safari park with zebras and hippos.","opening_hours":"06:00-18:00","entry_fee_usd":35,"popularity":8.5,"image":"mburo.jpg"},
-    {"id":"A029","name":"Kampala Night Market","region":"Central","category":"Cultural","city":"Kampala","description":"Nightlife, local food and crafts.","opening_hours":"17:00-23:00","entry_fee_usd":0,"popularity":7.0,"image":"night_market.jpg"},
-    {"id":"A030","name":"Kalangala Palm Beaches","region":"Central","category":"Beaches","city":"Kalangala","description":"Relaxing tropical palm beaches.","opening_hours":"All day","entry_fee_usd":0,"popularity":7.8,"image":"kalangala.jpg"},
+    {"id":"A019","name":"Zanzibar Market Uganda","region":"Central","category":"Cultural","city":"Kampala","description":"Local crafts, souvenirs, and street food.","opening_hours":"08:00-18:00","entry_fee_usd":0,"popularity":7.0,"image":"zanzibar_market.jpg","lat":0.3136,"lon":32.5811},
+    {"id":"A020","name":"Sipi Falls","region":"Eastern","category":"Natural Wonders","city":"Kapchorwa","description":"Series of stunning waterfalls and hiking trails.","opening_hours":"06:00-18:00","entry_fee_usd":5,"popularity":8.6,"image":"sipi.jpg","lat":1.335,"lon":34.375},
+    {"id":"A021","name":"Mount Elgon National Park","region":"Eastern","category":"Hiking","city":"Mbale","description":"Volcano hiking and caves exploration.","opening_hours":"06:00-18:00","entry_fee_usd":10,"popularity":8.9,"image":"elgon.jpg","lat":1.1333,"lon":34.55},
+    {"id":"A022","name":"Jinja Source of Nile","region":"Eastern","category":"Natural Wonders","city":"Jinja","description":"Where the Nile begins, ideal for rafting and boat rides.","opening_hours":"06:00-18:00","entry_fee_usd":15,"popularity":9.0,"image":"nile.jpg","lat":0.4244,"lon":33.2042},
+    {"id":"A023","name":"Bujagali Falls","region":"Eastern","category":"Natural Wonders","city":"Jinja","description":"Beautiful falls, popular for water sports.","opening_hours":"06:00-18:00","entry_fee_usd":10,"popularity":8.7,"image":"bujagali.jpg","lat":0.49,"lon":33.14},
+    {"id":"A024","name":"Mbarara Cultural Center","region":"Western","category":"Cultural","city":"Mbarara","description":"Learn Ankole culture and history.","opening_hours":"08:00-17:00","entry_fee_usd":5,"popularity":7.6,"image":"mbarara.jpg","lat":-0.6072,"lon":30.6545},
+    {"id":"A025","name":"Kampala City Walks","region":"Central","category":"Cultural","city":"Kampala","description":"Guided walking tours of the city.","opening_hours":"08:00-18:00","entry_fee_usd":2,"popularity":7.5,"image":"city_walk.jpg","lat":0.3163,"lon":32.5822},
+    {"id":"A026","name":"Buganda Kingdom Palace","region":"Central","category":"Cultural","city":"Mengo","description":"Royal palace of Buganda Kingdom.","opening_hours":"09:00-17:00","entry_fee_usd":5,"popularity":7.9,"image":"buganda_palace.jpg","lat":0.303,"lon":32.562},
+    {"id":"A027","name":"Mabamba Swamp","region":"Central","category":"Natural Wonders","city":"Entebbe","description":"Birdwatching, especially for the shoebill stork.","opening_hours":"06:00-17:00","entry_fee_usd":5,"popularity":8.3,"image":"mabamba.jpg","lat":0.07,"lon":32.35},
+    {"id":"A028","name":"Lake Mburo National Park","region":"Western","category":"Wildlife","city":"Mbarara","description":"Safari park with zebras and hippos.","opening_hours":"06:00-18:00","entry_fee_usd":35,"popularity":8.5,"image":"mburo.jpg","lat":-0.63,"lon":30.96},
+    {"id":"A029","name":"Kampala Night Market","region":"Central","category":"Cultural","city":"Kampala","description":"Nightlife, local food and crafts.","opening_hours":"17:00-23:00","entry_fee_usd":0,"popularity":7.0,"image":"night_market.jpg","lat":0.312,"lon":32.578},
+    {"id":"A030","name":"Kalangala Palm Beaches","region":"Central","category":"Beaches","city":"Kalangala","description":"Relaxing tropical palm beaches.","opening_hours":"All day","entry_fee_usd":0,"popularity":7.8,"image":"kalangala.jpg","lat":-0.32,"lon":32.29},
 ]
 
-# ------------------ Category Emojis ------------------
-CATEGORY_EMOJIS = {
-    "Wildlife": "🦁",
-    "Hiking": "🗻",
-    "Cultural": "🕌",
-    "Beaches": "🌊",
-    "Natural Wonders": "🌳"
-}
+# ------------------ Category Emojis ------------------
+CATEGORY_EMOJIS = {
+    "Wildlife": "🦁",
+    "Hiking": "🗻",
+    "Cultural": "🕌",
+    "Beaches": "🌊",
+    "Natural Wonders": "🌳"
+}
+
+# ------------------ Helpers ------------------
+def ensure_data_dirs():
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+
+def save_json(path: Path, obj: Any):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+
+def load_or_init_json(path: Path, default: Any):
+    if not path.exists():
+        save_json(path, default)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def id_to_num(aid: str) -> int:
+    return sum(ord(c) for c in aid)
+
+def generate_default_routes(attractions: List[Dict[str, Any]], origin: Optional[Tuple[float, float]] = None) -> Dict[str, Dict[str, Any]]:
+    routes: Dict[str, Dict[str, Any]] = {}
+    origin = DEFAULT_ORIGIN if origin is None else origin
+    # CURRENT -> each attraction
+    for a in attractions:
+        dist, time_min = current_metrics(origin, a)
+        routes[f"CURRENT__{a['id']}"] = {
+            "distance_km": dist,
+            "time_min": time_min,
+            "steps": [f"Drive from CURRENT location to {a['name']} in {a['city']}"]
+        }
+    # attraction -> attraction (directed)
+    for a, b in itertools.permutations(attractions, 2):
+        dist, time_min = pair_metrics(a, b)
+        key = f"{a['id']}{b['id']}"
+        routes[key] = {
+            "distance_km": dist,
+            "time_min": time_min,
+            "steps": [f"Drive from {a['city']} to {b['city']} (main road)", f"Arrive at {b['name']}"]
+        }
+    return routes
+
+# ------------------ Streaming JSON ------------------
+STREAM_CHUNK = 1 << 20            # characters read per refill
+_NON_WS = re.compile(r"[^ \t\n\r]")
+_TOKEN = re.compile(r"[ \t\n\r]*([\[\]{}:,])[ \t\n\r]*")   # structural char plus surrounding whitespace
+
+class JsonStream:
+    """Incremental reader for one top-level JSON array or object.
+
+    Values are decoded one at a time with ``JSONDecoder.raw_decode`` from a
+    buffer holding about one chunk, so peak memory follows the largest single
+    value rather than the whole document. With ``offsets=True`` it also keeps
+    the UTF-8 byte offset of the read position, for the mmap review index.
+    """
+
+    def __init__(self, f, chunk_size: int = STREAM_CHUNK, offsets: bool = False):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.offsets = offsets
+        self.buf = ""
+        self.pos = 0
+        self.byte = 0          # byte offset of buf[pos] (only with offsets=True)
+        self._scan = json.JSONDecoder().scan_once   # raw_decode minus its Python-level wrapper
+
+    def _fill(self) -> bool:
+        # read at least what is still pending, so a value larger than a chunk
+        # is re-decoded O(log n) times instead of once per chunk
+        data = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _advance(self, end: int):
+        if self.offsets and end > self.pos:
+            text = self.buf[self.pos:end]
+            self.byte += len(text) if text.isascii() else len(text.encode("utf-8"))
+        self.pos = end
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or '' at the end of the file."""
+        while True:
+            m = _NON_WS.search(self.buf, self.pos)
+            if m is not None:
+                self._advance(m.start())
+                return self.buf[self.pos]
+            self._advance(len(self.buf))
+            if not self._fill():
+                return ""
+
+    def token(self) -> str:
+        """Consume the next structural character (``[]{}:,``) and the whitespace after it.
+
+        Anything else is returned without being consumed; '' means end of file.
+        """
+        while True:
+            m = _TOKEN.match(self.buf, self.pos)
+            if m is None:
+                found = self.peek()
+                if found == "" or found not in "[]{}:,":
+                    return found
+                continue   # whitespace reached the end of the buffer; peek() refilled it
+            if m.end() == len(self.buf) and self._fill():
+                continue   # more whitespace may follow
+            self._advance(m.end())
+            return m.group(1)
+
+    def expect(self, *chars: str) -> str:
+        found = self.token()
+        if found not in chars or not found:
+            raise ValueError(f"expected {' or '.join(map(repr, chars))} but found {found or 'end of file'!r}")
+        return found
+
+    def value(self) -> Any:
+        while True:
+            try:
+                obj, end = self._scan(self.buf, self.pos)
+            except (StopIteration, json.JSONDecodeError) as e:
+                if self.pos < len(self.buf) and self.buf[self.pos] in " \t\n\r":
+                    self.peek()
+                elif not self._fill():
+                    if isinstance(e, StopIteration):
+                        raise json.JSONDecodeError("Expecting value", self.buf, e.value) from None
+                    raise
+                continue
+            # a number cut off by the end of the buffer would still decode
+            if end < len(self.buf) or not self._fill():
+                self._advance(end)
+                return obj
+
+def json_array_items(stream: JsonStream) -> Iterator[Any]:
+    """Yield the items of the JSON array ``stream`` is positioned at, one at a time."""
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.token()
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(",", "]") == "]":
+            return
+
+def iter_json_array(path: Path, chunk_size: int = STREAM_CHUNK) -> Iterator[Any]:
+    """Yield the items of the JSON array stored in ``path`` one at a time."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from json_array_items(JsonStream(f, chunk_size))
+
+def iter_json_object(path: Path, chunk_size: int = STREAM_CHUNK, offsets: bool = False) -> Iterator[tuple]:
+    """Yield ``(key, value)`` for each member of the JSON object in ``path``.
+
+    With ``offsets=True`` yields ``(key, value, start, end)``, the byte range
+    of the value in the file.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        stream = JsonStream(f, chunk_size, offsets)
+        stream.expect("{")
+        if stream.peek() == "}":
+            stream.token()
+            return
+        while True:
+            key = stream.value()
+            if not isinstance(key, str):
+                raise ValueError("object keys must be strings")
+            stream.expect(":")
+            start = stream.byte
+            value = stream.value()
+            yield (key, value, start, stream.byte) if offsets else (key, value)
+            if stream.expect(",", "}") == "}":
+                return
+
+# ------------------ Attraction Catalog ------------------
+ATTRACTION_FIELDS = ("id", "name", "region", "category", "city", "description",
+                     "opening_hours", "entry_fee_usd", "popularity", "image", "lat", "lon")
+_ATTRACTION_FIELD_SET = frozenset(ATTRACTION_FIELDS)
+
+class Attraction(Mapping):
+    """Slot-based attraction record that still reads like the original dict.
+
+    Known fields live in ``__slots__``; anything else from the JSON goes to
+    ``extra``. A field missing from the source is simply left unset, so
+    ``a["image"]`` / ``a.get("image")`` behave exactly as on a dict.
+    """
+    __slots__ = ATTRACTION_FIELDS + ("extra",)
+
+    def __init__(self, data: Mapping):
+        extra = None
+        for key, value in data.items():
+            if key in _ATTRACTION_FIELD_SET:
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self.extra = extra
+
+    def __getitem__(self, key):
+        if key in _ATTRACTION_FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        # hot in sorting/indexing; skips Mapping.get's try/except round trip
+        if key in _ATTRACTION_FIELD_SET:
+            return getattr(self, key, default)
+        return default if self.extra is None else self.extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in _ATTRACTION_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __iter__(self):
+        for field in ATTRACTION_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Attraction({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+class AttractionCatalog(Sequence):
+    """The loaded attractions plus id, region and category indexes."""
+
+    def __init__(self, attractions: Iterable[Mapping] = ()):
+        self._records: List[Attraction] = []
+        self._by_id: Dict[str, Attraction] = {}
+        self._by_region: Dict[str, List[Attraction]] = {}
+        self._by_category: Dict[str, List[Attraction]] = {}
+        self._search: Optional["SearchIndex"] = None
+        self._spatial: Optional["SpatialIndex"] = None
+        self._facets: Optional["FacetIndex"] = None
+        for a in attractions:
+            self.add(a)
+
+    @classmethod
+    def from_columns(cls, fields: List[str], columns: List[list]) -> "AttractionCatalog":
+        # fast path for the startup snapshot: fill slots straight from column lists
+        catalog = cls()
+        new = Attraction.__new__
+        slot_fields = [f for f in fields if f in _ATTRACTION_FIELD_SET]
+        extra_fields = [f for f in fields if f not in _ATTRACTION_FIELD_SET]
+        slot_cols = [columns[fields.index(f)] for f in slot_fields]
+        extra_cols = [columns[fields.index(f)] for f in extra_fields]
+        for i, values in enumerate(zip(*slot_cols)):
+            rec = new(Attraction)
+            for field, value in zip(slot_fields, values):
+                setattr(rec, field, value)
+            rec.extra = {f: col[i] for f, col in zip(extra_fields, extra_cols)} if extra_fields else None
+            catalog.add(rec)
+        return catalog
+
+    def add(self, attraction: Mapping) -> Attraction:
+        rec = attraction if isinstance(attraction, Attraction) else Attraction(attraction)
+        self._records.append(rec)
+        # first record wins on duplicate ids, like the old linear scan
+        key = rec.id.upper()
+        if key not in self._by_id:
+            self._by_id[key] = rec
+        region = self._by_region.get(rec.region)
+        if region is None:
+            self._by_region[rec.region] = [rec]
+        else:
+            region.append(rec)
+        category = self._by_category.get(rec.category)
+        if category is None:
+            self._by_category[rec.category] = [rec]
+        else:
+            category.append(rec)
+        if self._search is not None:
+            self._search.add(rec)
+        if self._spatial is not None:
+            self._spatial.add(rec)
+        if self._facets is not None:
+            self._facets.add(rec)   # appended records take the next bit position
+        return rec
+
+    def remove(self, aid: str) -> Optional[Attraction]:
+        rec = self.get(aid)
+        if rec is None:
+            return None
+        self._records.remove(rec)
+        del self._by_id[rec["id"].upper()]
+        for index, key in ((self._by_region, rec["region"]), (self._by_category, rec["category"])):
+            index[key].remove(rec)
+            if not index[key]:
+                del index[key]
+        for other in self._records:
+            if other["id"].upper() == rec["id"].upper():
+                self._by_id[rec["id"].upper()] = other
+                break
+        if self._search is not None:
+            self._search.remove(rec)
+        if self._spatial is not None:
+            self._spatial.remove(rec)
+        self._facets = None   # later records shift down a bit position; rebuilt once on the next query
+        return rec
+
+    def get(self, aid: str) -> Optional[Attraction]:
+        return self._by_id.get((aid or "").strip().upper())
+
+    def __contains__(self, aid) -> bool:
+        return isinstance(aid, str) and self.get(aid) is not None
+
+    def __getitem__(self, i):
+        return self._records[i]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def regions(self) -> List[str]:
+        return sorted(self._by_region)
+
+    def categories(self) -> List[str]:
+        return sorted(self._by_category)
+
+    def by_region(self, region: str) -> List[Attraction]:
+        return list(self._by_region.get(region, ()))
+
+    def by_category(self, category: str) -> List[Attraction]:
+        return list(self._by_category.get(category, ()))
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [rec.to_dict() for rec in self._records]
+
+    @property
+    def search_index(self) -> "SearchIndex":
+        # built on first search so a warm start doesn't pay for it
+        if self._search is None:
+            self._search = SearchIndex(self._records)
+        return self._search
+
+    @property
+    def spatial_index(self) -> "SpatialIndex":
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self._records)
+        return self._spatial
+
+    @property
+    def facets(self) -> "FacetIndex":
+        if self._facets is None:
+            self._facets = FacetIndex(self._records)
+        return self._facets
+
+    def city_location(self, city: str) -> Optional[Tuple[float, float]]:
+        """Mean coordinates of the attractions in ``city`` (matches "Nwoya / Masindi" parts too)."""
+        wanted = (city or "").strip().lower()
+        points = []
+        for rec in self._records:
+            names = [part.strip().lower() for part in rec.city.split("/")]
+            point = coordinates(rec)
+            if point is not None and (wanted == rec.city.lower() or wanted in names):
+                points.append(point)
+        if not points:
+            return None
+        return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_search"] = None
+        state["_spatial"] = None
+        state["_facets"] = None
+        return state
+
+# ------------------ Search Index ------------------
+SEARCH_FIELD_WEIGHTS = {"name": 3.0, "city": 2.0, "description": 1.0}
+SEARCH_PREFIX_FACTOR = 0.5       # a prefix hit counts half as much as a whole word
+SEARCH_POPULARITY_WEIGHT = 0.1   # popularity 0-10 adds up to 1.0 to the score
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+class SearchIndex:
+    """Inverted index over name, city and description.
+
+    Every query word must match (AND); a word matches a token exactly or as a
+    prefix. Results are ranked by field-weighted relevance plus popularity.
+    Records can be added/removed one at a time without rebuilding, and a
+    token's postings are kept pre-ranked (lazily) so top-k single-word
+    queries don't touch every match.
+    """
+
+    def __init__(self, attractions: Iterable[Attraction] = ()):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._docs: Dict[int, Tuple[Attraction, List[str]]] = {}
+        self._doc_of: Dict[int, int] = {}        # id(record) -> doc number
+        self._boost: Dict[int, float] = {}       # doc -> popularity part of the score
+        self._ranked: Dict[Tuple[str, float], List[Tuple[float, int]]] = {}
+        self._next_doc = 0
+        for rec in attractions:
+            self._index(rec)
+        self._vocab: List[str] = sorted(self._postings)   # sorted, for prefix ranges
+
+    def _index(self, rec: Attraction) -> List[str]:
+        doc = self._doc_of[id(rec)] = self._next_doc
+        self._next_doc += 1
+        weights: Dict[str, float] = {}
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            for token in set(tokenize(rec.get(field, ""))):
+                weights[token] = weights.get(token, 0.0) + weight
+        new_tokens = []
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                new_tokens.append(token)
+            posting[doc] = weight
+            self._forget_ranking(token)
+        self._docs[doc] = (rec, list(weights))
+        self._boost[doc] = SEARCH_POPULARITY_WEIGHT * (rec.get("popularity") or 0)
+        return new_tokens
+
+    def _forget_ranking(self, token: str):
+        self._ranked.pop((token, 1.0), None)
+        self._ranked.pop((token, SEARCH_PREFIX_FACTOR), None)
+
+    def add(self, rec: Attraction):
+        if id(rec) in self._doc_of:
+            self.remove(rec)
+        for token in self._index(rec):
+            bisect.insort(self._vocab, token)
+
+    def remove(self, rec: Attraction):
+        doc = self._doc_of.pop(id(rec), None)
+        if doc is None:
+            return
+        del self._boost[doc]
+        for token in self._docs.pop(doc)[1]:
+            posting = self._postings[token]
+            del posting[doc]
+            self._forget_ranking(token)
+            if not posting:
+                del self._postings[token]
+                del self._vocab[bisect.bisect_left(self._vocab, token)]
+
+    def update(self, rec: Attraction):
+        self.add(rec)
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        lo = bisect.bisect_left(self._vocab, term)
+        hi = bisect.bisect_left(self._vocab, term + "\uffff")
+        return [(token, 1.0 if token == term else SEARCH_PREFIX_FACTOR)
+                for token in self._vocab[lo:hi]]
+
+    def _size(self, expansion: List[Tuple[str, float]]) -> int:
+        return sum(len(self._postings[token]) for token, _ in expansion)
+
+    def _term_scores(self, expansion: List[Tuple[str, float]]) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for token, factor in expansion:
+            for doc, weight in self._postings[token].items():
+                weight *= factor
+                if weight > scores.get(doc, 0.0):
+                    scores[doc] = weight
+        return scores
+
+    def _ranked_posting(self, token: str, factor: float) -> List[Tuple[float, int]]:
+        ranked = self._ranked.get((token, factor))
+        if ranked is None:
+            boost = self._boost
+            ranked = sorted((-(weight * factor + boost[doc]), doc) for doc, weight in self._postings[token].items())
+            self._ranked[(token, factor)] = ranked
+        return ranked
+
+    def _top_single(self, expansion: List[Tuple[str, float]], limit: int) -> List[int]:
+        # postings are pre-ranked, so a k-way merge yields the best docs first;
+        # a doc's first appearance carries its best score
+        seen = set()
+        best = []
+        for _, doc in heapq.merge(*(self._ranked_posting(token, factor) for token, factor in expansion)):
+            if doc not in seen:
+                seen.add(doc)
+                best.append(doc)
+                if len(best) == limit:
+                    break
+        return best
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Attraction]:
+        expansions = [self._expand(term) for term in set(tokenize(query))]
+        if not expansions or not all(expansions):
+            return []
+        docs = self._docs
+        if len(expansions) == 1 and limit is not None:
+            return [docs[doc][0] for doc in self._top_single(expansions[0], limit)]
+        expansions.sort(key=self._size)   # rarest term first keeps the candidate set small
+        scores = self._term_scores(expansions[0])
+        for expansion in expansions[1:]:
+            if not scores:
+                break
+            if len(scores) * len(expansion) < self._size(expansion):
+                postings = [(self._postings[token], factor) for token, factor in expansion]
+                narrowed = {}
+                for doc, score in scores.items():
+                    hit = max(posting.get(doc, 0.0) * factor for posting, factor in postings)
+                    if hit:
+                        narrowed[doc] = score + hit
+                scores = narrowed
+            else:
+                term_scores = self._term_scores(expansion)
+                scores = {doc: score + term_scores[doc] for doc, score in scores.items() if doc in term_scores}
+        boost = self._boost
+        # ties go to the record that was indexed first
+        ranked = ((score + boost[doc], -doc) for doc, score in scores.items())
+        if limit is None:
+            best = sorted(ranked, reverse=True)
+        else:
+            best = heapq.nlargest(limit, ranked)
+        return [docs[-neg_doc][0] for _, neg_doc in best]
+
+def search_attractions(attractions: AttractionCatalog, query: str, limit: Optional[int] = None) -> List[Attraction]:
+    return attractions.search_index.search(query, limit)
+
+# ------------------ Facet Filters ------------------
+FACET_CHECKPOINTS = 256     # cumulative bitsets kept per numeric field
+FACET_PENDING = 1024        # values added since a SortedFacet was sorted before it is re-sorted
+MINUTES_PER_DAY = 24 * 60
+_HOURS_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+_BYTE_BITS = [tuple(b for b in range(8) if value >> b & 1) for value in range(256)]
+
+def bitset(positions: Iterable[int], size: int) -> int:
+    """An int with bit ``p`` set for every position, built in O(size/8 + len(positions))."""
+    buf = bytearray((size + 7) // 8)
+    for p in positions:
+        buf[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buf, "little")
+
+def bit_positions(bits: int, size: int) -> List[int]:
+    out = []
+    for i, byte in enumerate(bits.to_bytes((size + 7) // 8, "little")):
+        if byte:
+            base = i << 3
+            out.extend(base + b for b in _BYTE_BITS[byte])
+    return out
+
+def parse_clock(text: str) -> Optional[int]:
+    """Minutes after midnight for "HH:MM", or None."""
+    m = re.match(r"^\s*(\d{1,2}):(\d{2})\s*$", text or "")
+    if not m or int(m.group(1)) > 24 or int(m.group(2)) > 59:
+        return None
+    return min(MINUTES_PER_DAY, int(m.group(1)) * 60 + int(m.group(2)))
+
+def parse_opening_hours(text: Any) -> List[Tuple[int, int]]:
+    """Half-open [start, end) minute intervals; ranges past midnight are split in two."""
+    if not isinstance(text, str):
+        return []
+    if text.strip().lower() in ("all day", "24 hours", "24h"):
+        return [(0, MINUTES_PER_DAY)]
+    m = _HOURS_RE.match(text)
+    if not m:
+        return []
+    start = parse_clock(f"{m.group(1)}:{m.group(2)}")
+    end = parse_clock(f"{m.group(3)}:{m.group(4)}")
+    if start is None or end is None or start == end:
+        return []
+    if start < end:
+        return [(start, end)]
+    return [(start, MINUTES_PER_DAY), (0, end)]
+
+class SortedFacet:
+    """One numeric field as a sorted array plus cumulative bitsets.
+
+    ``checkpoints[c]`` holds the records ranked below ``c * step``, so the
+    records with value <= x are one checkpoint OR'd with at most ``step``
+    leftover positions, whatever the number of distinct values. Values added
+    later wait in ``pending`` (checked one by one) until there are more than
+    FACET_PENDING of them, then everything is sorted again.
+    """
+
+    def __init__(self, values: List[Any]):
+        self.size = len(values)
+        self._build([(v, pos) for pos, v in enumerate(values) if self.numeric(v)])
+
+    @staticmethod
+    def numeric(v: Any) -> bool:
+        return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+    def _build(self, pairs: List[Tuple[float, int]]):
+        pairs.sort()
+        self.pending: List[Tuple[float, int]] = []
+        self.values = array("d", (v for v, _ in pairs))
+        self.order = array("l", (pos for _, pos in pairs))
+        self.step = max(1, -(-len(pairs) // FACET_CHECKPOINTS))
+        buf = bytearray((self.size + 7) // 8)
+        self.checkpoints = [0]
+        for rank, pos in enumerate(self.order, 1):
+            buf[pos >> 3] |= 1 << (pos & 7)
+            if rank % self.step == 0:
+                self.checkpoints.append(int.from_bytes(buf, "little"))
+        self.present = int.from_bytes(buf, "little")
+
+    def add(self, pos: int, value: Any):
+        """Record ``value`` for the new catalog position ``pos``."""
+        self.size = max(self.size, pos + 1)
+        if not self.numeric(value):
+            return
+        self.pending.append((value, pos))
+        self.present |= 1 << pos
+        if len(self.pending) > FACET_PENDING:
+            self._build(list(zip(self.values, self.order)) + self.pending)
+
+    def _first(self, rank: int) -> int:
+        c = rank // self.step
+        return self.checkpoints[c] | bitset(self.order[c * self.step:rank], self.size)
+
+    def at_most(self, x: float) -> int:
+        bits = self._first(bisect.bisect_right(self.values, x))
+        if self.pending:
+            bits |= bitset([pos for v, pos in self.pending if v <= x], self.size)
+        return bits
+
+    def at_least(self, x: float) -> int:
+        bits = self.present & ~self._first(bisect.bisect_left(self.values, x))
+        if self.pending:
+            bits &= ~bitset([pos for v, pos in self.pending if v < x], self.size)
+        return bits
+
+class FacetIndex:
+    """Bitsets over catalog positions for combined filters.
+
+    Region and category map to one bitset each; fee and popularity are
+    ``SortedFacet``s; opening hours are cut into elementary time segments,
+    each with the bitset of records open throughout it, so "open at T" is
+    one bisect. A query ANDs the parts together. Appending a record sets its
+    bit everywhere without a rebuild.
+    """
+
+    def __init__(self, attractions: List[Attraction]):
+        self._records = list(attractions)
+        n = self.size = len(self._records)
+        self.all = (1 << n) - 1
+        regions: Dict[str, List[int]] = {}
+        categories: Dict[str, List[int]] = {}
+        hours: Dict[Any, List[int]] = {}
+        for pos, rec in enumerate(self._records):
+            regions.setdefault(rec.get("region"), []).append(pos)
+            categories.setdefault(rec.get("category"), []).append(pos)
+            hours.setdefault(rec.get("opening_hours"), []).append(pos)
+        self.regions = {key: bitset(p, n) for key, p in regions.items()}
+        self.categories = {key: bitset(p, n) for key, p in categories.items()}
+        self.fee = SortedFacet([rec.get("entry_fee_usd") for rec in self._records])
+        self.popularity = SortedFacet([rec.get("popularity") for rec in self._records])
+
+        groups = [(parse_opening_hours(text), bitset(p, n)) for text, p in hours.items()]
+        bounds = sorted({0, MINUTES_PER_DAY} | {t for intervals, _ in groups for iv in intervals for t in iv})
+        self._hours_bounds = bounds[:-1]
+        self._hours_bits = []
+        for start in self._hours_bounds:
+            bits = 0
+            for intervals, group in groups:
+                if any(lo <= start < hi for lo, hi in intervals):
+                    bits |= group
+            self._hours_bits.append(bits)
+
+    def add(self, rec: Attraction):
+        """Index ``rec`` at the next position (the end of the catalog)."""
+        pos = self.size
+        bit = 1 << pos
+        self._records.append(rec)
+        self.size += 1
+        self.all |= bit
+        for index, key in ((self.regions, rec.get("region")), (self.categories, rec.get("category"))):
+            index[key] = index.get(key, 0) | bit
+        self.fee.add(pos, rec.get("entry_fee_usd"))
+        self.popularity.add(pos, rec.get("popularity"))
+        intervals = parse_opening_hours(rec.get("opening_hours"))
+        bounds, segments = self._hours_bounds, self._hours_bits
+        for t in sorted({t for iv in intervals for t in iv} - {MINUTES_PER_DAY}):
+            k = bisect.bisect_right(bounds, t) - 1
+            if bounds[k] != t:
+                # split the segment at t; both halves start with its bitset
+                bounds.insert(k + 1, t)
+                segments.insert(k + 1, segments[k])
+        for k, start in enumerate(bounds):
+            if any(lo <= start < hi for lo, hi in intervals):
+                segments[k] |= bit
+
+    def open_at(self, minute: int) -> int:
+        minute %= MINUTES_PER_DAY
+        return self._hours_bits[bisect.bisect_right(self._hours_bounds, minute) - 1]
+
+    def query(self, region: Optional[str] = None, category: Optional[str] = None,
+              min_fee: Optional[float] = None, max_fee: Optional[float] = None,
+              min_popularity: Optional[float] = None, max_popularity: Optional[float] = None,
+              open_at: Optional[int] = None) -> int:
+        bits = self.all
+        if region is not None:
+            bits &= self.regions.get(region, 0)
+        if category is not None:
+            bits &= self.categories.get(category, 0)
+        if min_fee is not None:
+            bits &= self.fee.at_least(min_fee)
+        if max_fee is not None:
+            bits &= self.fee.at_most(max_fee)
+        if min_popularity is not None:
+            bits &= self.popularity.at_least(min_popularity)
+        if max_popularity is not None:
+            bits &= self.popularity.at_most(max_popularity)
+        if open_at is not None:
+            bits &= self.open_at(open_at)
+        return bits
+
+    def records(self, bits: int) -> List[Attraction]:
+        return [self._records[pos] for pos in bit_positions(bits, self.size)]
+
+    @staticmethod
+    def count(bits: int) -> int:
+        return bin(bits).count("1")
+
+def filter_attractions(attractions: AttractionCatalog, **facets) -> List[Attraction]:
+    """Attractions matching every given facet (see ``FacetIndex.query``), in catalog order."""
+    index = attractions.facets
+    return index.records(index.query(**facets))
+
+# ------------------ Geo ------------------
+try:
+    import numpy as np  # optional: vectorized distance matrix
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+ROAD_FACTOR = 1.3              # road km per great-circle km
+AVERAGE_SPEED_KMH = 45.0
+DEFAULT_ORIGIN = (0.3136, 32.5811)   # Kampala; CURRENT location until the user names a city
+GRID_CELL_DEG = 0.25           # spatial index cell, ~28 km at the equator
+MATRIX_CHUNK_ROWS = 512        # rows per numpy block when building the full matrix
+
+def coordinates(a: Mapping) -> Optional[Tuple[float, float]]:
+    lat, lon = a.get("lat"), a.get("lon")
+    if lat is None or lon is None:
+        return None
+    try:
+        return float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    l1, l2 = math.radians(lon1), math.radians(lon2)
+    h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin((l2 - l1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, h)))
+
+def road_metrics(km: float) -> Tuple[int, int]:
+    """(distance_km, time_min) by road for a great-circle distance."""
+    dist = max(1, round(km * ROAD_FACTOR))
+    return dist, round(dist * 60 / AVERAGE_SPEED_KMH)
+
+def pair_metrics(a: Mapping, b: Mapping) -> Tuple[int, int]:
+    pa, pb = coordinates(a), coordinates(b)
+    if pa is None or pb is None:
+        # no coordinates: the old id-based estimate
+        n = abs(id_to_num(a["id"]) - id_to_num(b["id"]))
+        dist = 8 + (n % 250)
+        return dist, int(dist * 2) + (n % 20)
+    return road_metrics(haversine_km(*pa, *pb))
+
+def current_metrics(origin: Optional[Tuple[float, float]], a: Mapping) -> Tuple[int, int]:
+    pa = coordinates(a)
+    if origin is None or pa is None:
+        n = id_to_num(a["id"])
+        dist = 20 + (n % 400)
+        return dist, int(dist * 1.8) + (n % 25)
+    return road_metrics(haversine_km(*origin, *pa))
+
+def fill_default_coordinates(attractions: List[Dict[str, Any]]) -> bool:
+    """Copy lat/lon from DEFAULT_ATTRACTIONS onto saved defaults that predate them."""
+    defaults = {(a["id"], a["name"]): a for a in DEFAULT_ATTRACTIONS}
+    changed = False
+    for a in attractions:
+        d = defaults.get((a.get("id"), a.get("name")))
+        if d is not None and coordinates(a) is None:
+            a["lat"], a["lon"] = d["lat"], d["lon"]
+            changed = True
+    return changed
+
+def road_matrix(lats: List[float], lons: List[float]):
+    """Full road distance/time matrices (uint16) for the given points.
+
+    With numpy this is a blocked, vectorized haversine (10k points in well
+    under a second); without it, a pure-Python loop producing one
+    ``array("H")`` per row at about 1 µs per pair (~1 s for 1000 points,
+    minutes for 10k). Either way ``dist[i][j]`` / ``time[i][j]``.
+    """
+    n = len(lats)
+    if np is None:
+        dist_rows, time_rows = [], []
+        for i in range(n):
+            d, t = road_row(lats[i], lons[i], lats, lons)
+            dist_rows.append(d)
+            time_rows.append(t)
+        return dist_rows, time_rows
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    dist = np.empty((n, n), dtype=np.uint16)
+    time_ = np.empty((n, n), dtype=np.uint16)
+    for start in range(0, n, MATRIX_CHUNK_ROWS):
+        stop = min(n, start + MATRIX_CHUNK_ROWS)
+        h = (np.sin((lat[None, :] - lat[start:stop, None]) / 2) ** 2
+             + cos_lat[start:stop, None] * cos_lat[None, :] * np.sin((lon[None, :] - lon[start:stop, None]) / 2) ** 2)
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+        d = np.maximum(1.0, np.rint(km * ROAD_FACTOR))
+        dist[start:stop] = d
+        time_[start:stop] = np.rint(d * 60 / AVERAGE_SPEED_KMH)
+    return dist, time_
+
+def road_row(lat: float, lon: float, lats: List[float], lons: List[float]) -> Tuple[array, array]:
+    """Road distance/time from one point to every point, as two ``array("H")`` rows."""
+    if np is not None:
+        p2 = np.radians(np.asarray(lats, dtype=np.float64))
+        l2 = np.radians(np.asarray(lons, dtype=np.float64))
+        p1, l1 = math.radians(lat), math.radians(lon)
+        h = np.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin((l2 - l1) / 2) ** 2
+        d = np.maximum(1.0, np.rint(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0))) * ROAD_FACTOR))
+        dist, time_ = array("H"), array("H")
+        dist.frombytes(d.astype(np.uint16).tobytes())
+        time_.frombytes(np.rint(d * 60 / AVERAGE_SPEED_KMH).astype(np.uint16).tobytes())
+        return dist, time_
+    p1, l1 = math.radians(lat), math.radians(lon)
+    cos1 = math.cos(p1)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    dist = array("H")
+    for lat2, lon2 in zip(lats, lons):
+        p2 = radians(lat2)
+        h = sin((p2 - p1) / 2) ** 2 + cos1 * cos(p2) * sin((radians(lon2) - l1) / 2) ** 2
+        dist.append(max(1, round(2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, h))) * ROAD_FACTOR)))
+    return dist, array("H", [round(d * 60 / AVERAGE_SPEED_KMH) for d in dist])
+
+class SpatialIndex:
+    """Fixed-size lat/lon grid over the attractions that have coordinates.
+
+    ``within`` only looks at the cells overlapping the search box; ``nearest``
+    widens the radius until it holds ``k`` attractions. Records without
+    coordinates are ignored.
+    """
+
+    def __init__(self, attractions: Iterable[Mapping] = (), cell_deg: float = GRID_CELL_DEG):
+        self._cell = cell_deg
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, Mapping]]] = {}
+        self._size = 0
+        for rec in attractions:
+            self.add(rec)
+
+    def __len__(self):
+        return self._size
+
+    def _key(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._cell), math.floor(lon / self._cell)
+
+    def add(self, rec: Mapping):
+        point = coordinates(rec)
+        if point is not None:
+            self._cells.setdefault(self._key(*point), []).append((point[0], point[1], rec))
+            self._size += 1
+
+    def remove(self, rec: Mapping):
+        point = coordinates(rec)
+        if point is None:
+            return
+        key = self._key(*point)
+        cell = self._cells.get(key, [])
+        for k, (_, _, other) in enumerate(cell):
+            if other is rec:
+                del cell[k]
+                self._size -= 1
+                if not cell:
+                    del self._cells[key]
+                return
+
+    def within(self, lat: float, lon: float, radius_km: float, exclude: Optional[Mapping] = None) -> List[Tuple[float, Mapping]]:
+        """(great-circle km, record) for every record within ``radius_km``, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE
+        lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        widest = max(abs(lat_lo), abs(lat_hi))
+        dlon = 360.0 if widest >= 90.0 else radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+        row_lo, col_lo = self._key(lat_lo, lon - dlon)
+        row_hi, col_hi = self._key(lat_hi, lon + dlon)
+        wraps = lon - dlon < -180.0 or lon + dlon > 180.0
+        if wraps or (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            cells = [cell for (r, _), cell in self._cells.items() if row_lo <= r <= row_hi]
+        else:
+            cells = [self._cells[(r, c)] for r in range(row_lo, row_hi + 1)
+                     for c in range(col_lo, col_hi + 1) if (r, c) in self._cells]
+        found = []
+        for cell in cells:
+            for plat, plon, rec in cell:
+                if rec is exclude:
+                    continue
+                km = haversine_km(lat, lon, plat, plon)
+                if km <= radius_km:
+                    found.append((km, rec))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, lat: float, lon: float, k: int, exclude: Optional[Mapping] = None) -> List[Tuple[float, Mapping]]:
+        """The ``k`` records closest to (lat, lon) as (great-circle km, record)."""
+        wanted = min(k, self._size - (1 if exclude is not None and coordinates(exclude) else 0))
+        if wanted <= 0:
+            return []
+        radius = self._cell * KM_PER_DEGREE
+        while True:
+            found = self.within(lat, lon, radius, exclude)
+            if len(found) >= wanted or radius > math.pi * EARTH_RADIUS_KM:
+                return found[:wanted]
+            radius *= 2
+
+def attractions_near(attractions: AttractionCatalog, lat: float, lon: float, radius_km: float,
+                     limit: Optional[int] = None, exclude: Optional[Mapping] = None) -> List[Tuple[float, Attraction]]:
+    found = attractions.spatial_index.within(lat, lon, radius_km, exclude)
+    return found if limit is None else found[:limit]
+
+def nearest_attractions(attractions: AttractionCatalog, aid: str, k: int = 5) -> List[Tuple[float, Attraction]]:
+    rec = attractions.get(aid)
+    point = coordinates(rec) if rec is not None else None
+    if point is None:
+        return []
+    return attractions.spatial_index.nearest(*point, k, exclude=rec)
+
+# ------------------ Route Store ------------------
+ROUTE_STORE_FORMAT = "route-store/2"   # /2 added per-attraction fingerprints
+ROUTE_STORE_FORMATS = ("route-store/1", ROUTE_STORE_FORMAT)
+ROUTE_ROW_AFTER = 8      # single lookups from one origin before its whole row is computed
+ROUTE_CHECK_FULL = 300   # check_routes compares every pair up to this many attractions...
+ROUTE_CHECK_SAMPLE = 200 # ...and all pairs among a random sample of this many above it
+
+def route_fingerprint(a: Mapping) -> int:
+    """Version of the attraction fields a route's step text is built from."""
+    return zlib.crc32(f"{a['id']}\x1f{a['name']}\x1f{a['city']}".encode("utf-8"))
+
+class Route(Mapping):
+    """One route; the step text is only built when somebody reads it."""
+    __slots__ = ("distance_km", "time_min", "_steps")
+    _KEYS = ("distance_km", "time_min", "steps")
+
+    def __init__(self, distance_km: int, time_min: int, steps):
+        self.distance_km = distance_km
+        self.time_min = time_min
+        self._steps = steps  # list, or a zero-argument callable building it
+
+    @property
+    def steps(self) -> List[str]:
+        if callable(self._steps):
+            self._steps = self._steps()
+        return self._steps
+
+    def __getitem__(self, key):
+        if key == "distance_km":
+            return self.distance_km
+        if key == "time_min":
+            return self.time_min
+        if key == "steps":
+            return self.steps
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __repr__(self):
+        return f"Route(distance_km={self.distance_km}, time_min={self.time_min})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"distance_km": self.distance_km, "time_min": self.time_min, "steps": list(self.steps)}
+
+class RouteStore(Mapping):
+    """All default routes, keyed exactly like the legacy routes.json dict.
+
+    Distance/time for an origin are computed into two unsigned-short rows the
+    first time that origin is asked for, so memory grows with the origins
+    actually used instead of with n². Entries in ``overrides`` (hand-edited
+    routes from routes.json) take precedence over the computed ones.
+
+    Distances are haversine km times ROAD_FACTOR between the attractions'
+    coordinates; CURRENT routes start at ``origin``. A pair where either end
+    has no lat/lon falls back to the old id-based estimate.
+    """
+
+    def __init__(self, attractions: List[Dict[str, Any]], overrides: Optional[Dict[str, Any]] = None,
+                 fingerprints: Optional[Dict[str, int]] = None):
+        self._attractions = list(attractions)
+        self._ids = [a["id"] for a in self._attractions]
+        self._num_cache: Optional[array] = None
+        self._index = {aid: i for i, aid in enumerate(self._ids)}
+        self._id_lengths = sorted({len(aid) for aid in self._ids})
+        self._dist_rows: List[Optional[array]] = [None] * len(self._ids)
+        self._time_rows: List[Optional[array]] = [None] * len(self._ids)
+        self._current: Optional[Tuple[array, array]] = None
+        self._hits = bytearray(len(self._ids))
+        self._geo_cache = None
+        self.origin: Optional[Tuple[float, float]] = DEFAULT_ORIGIN
+        self.overrides: Dict[str, Any] = dict(overrides or {})
+        # route_fingerprint of each override endpoint when the overrides were saved
+        self.fingerprints: Dict[str, int] = dict(fingerprints or {})
+        self.delta: Dict[str, List[str]] = {}   # what the last reconcile() dropped or found stale
+
+    @property
+    def _nums(self) -> array:
+        if self._num_cache is None:
+            self._num_cache = array("l", (id_to_num(aid) for aid in self._ids))
+        return self._num_cache
+
+    @property
+    def _geo(self):
+        if self._geo_cache is None:
+            points = [coordinates(a) for a in self._attractions]
+            self._geo_cache = (
+                points,
+                [p[0] if p else 0.0 for p in points],
+                [p[1] if p else 0.0 for p in points],
+                [j for j, p in enumerate(points) if p is None],
+            )
+        return self._geo_cache
+
+    # -- matrix rows --
+    def _row(self, i: int) -> Tuple[array, array]:
+        if self._dist_rows[i] is None:
+            points, lats, lons, missing = self._geo
+            nums = self._nums if missing else None
+            if points[i] is None:
+                ni = nums[i]
+                diffs = [abs(ni - nj) for nj in nums]
+                dist = array("H", [8 + n % 250 for n in diffs])
+                time = array("H", [d * 2 + n % 20 for d, n in zip(dist, diffs)])
+            else:
+                dist, time = road_row(*points[i], lats, lons)
+                self._patch_missing(dist, time, i)
+            self._dist_rows[i] = dist
+            self._time_rows[i] = time
+        return self._dist_rows[i], self._time_rows[i]
+
+    def _patch_missing(self, dist, time, i: Optional[int]):
+        # columns without coordinates keep the id-based estimate
+        for j in self._geo[3]:
+            if i is None:
+                n = self._nums[j]
+                dist[j] = 20 + n % 400
+                time[j] = int(dist[j] * 1.8) + n % 25
+            else:
+                n = abs(self._nums[i] - self._nums[j])
+                dist[j] = 8 + n % 250
+                time[j] = dist[j] * 2 + n % 20
+
+    def _current_row(self) -> Tuple[array, array]:
+        if self._current is None:
+            points, lats, lons, missing = self._geo
+            if self.origin is None or len(missing) == len(points):
+                dist = array("H", [20 + n % 400 for n in self._nums])
+                time = array("H", [int(d * 1.8) + n % 25 for d, n in zip(dist, self._nums)])
+            else:
+                dist, time = road_row(*self.origin, lats, lons)
+                self._patch_missing(dist, time, None)
+            self._current = (dist, time)
+        return self._current
+
+    def set_origin(self, origin: Optional[Tuple[float, float]]):
+        """Move the CURRENT location for every later lookup; its row is recomputed on next use.
+
+        For a one-off starting point use ``route_from`` instead.
+        """
+        self.origin = origin
+        self._current = None
+
+    def route_from(self, origin: Optional[Tuple[float, float]], aid: str) -> Optional[Mapping]:
+        """The CURRENT route to ``aid`` measured from ``origin``; the store's own origin is left alone."""
+        key = f"CURRENT__{aid}"
+        if key in self.overrides:
+            return self.overrides[key]
+        j = self._index.get(aid)
+        if j is None:
+            return None
+        if origin == self.origin:
+            return self._route_at(None, j)
+        a = self._attractions[j]
+        dist, time = current_metrics(origin, a)
+        name, city = a["name"], a["city"]
+        return Route(dist, time, lambda: [f"Drive from CURRENT location to {name} in {city}"])
+
+    def build_matrix(self):
+        """Compute every row up front (one vectorized pass when numpy is installed)."""
+        points, lats, lons, missing = self._geo
+        if np is None or len(missing) == len(points):
+            for i in range(len(points)):
+                self._row(i)
+            return
+        dist, time = road_matrix(lats, lons)
+        for i in range(len(points)):
+            self._dist_rows[i], self._time_rows[i] = dist[i], time[i]
+            if points[i] is None:
+                self._dist_rows[i] = None
+                self._row(i)
+            else:
+                self._patch_missing(dist[i], time[i], i)
+
+    def metrics(self, i: Optional[int], j: int) -> Tuple[int, int]:
+        """(distance_km, time_min) from index ``i`` (None = CURRENT) to index ``j``."""
+        if i is not None and self._dist_rows[i] is None and self._hits[i] < ROUTE_ROW_AFTER:
+            # occasional lookups: one haversine, not a whole row
+            self._hits[i] += 1
+            return self._pair(i, j)
+        dist, time = self._current_row() if i is None else self._row(i)
+        return int(dist[j]), int(time[j])
+
+    def _pair(self, i: int, j: int) -> Tuple[int, int]:
+        points = self._geo[0]
+        if points[i] is None or points[j] is None:
+            n = abs(self._nums[i] - self._nums[j])
+            dist = 8 + n % 250
+            return dist, dist * 2 + n % 20
+        return road_metrics(haversine_km(*points[i], *points[j]))
+
+    def exact_metric(self, key: str, metric: str = "distance_km") -> Optional[float]:
+        """``metric`` of a computed route before rounding to whole km/minutes.
+
+        None for overrides and for pairs without coordinates, whose stored
+        figures are the only ones there are.
+        """
+        loc = None if key in self.overrides else self._locate(key)
+        if loc is None:
+            return None
+        i, j = loc
+        start = self.origin if i is None else self._geo[0][i]
+        end = self._geo[0][j]
+        if start is None or end is None:
+            return None
+        km = haversine_km(*start, *end) * ROAD_FACTOR
+        return km if metric == "distance_km" else km * 60 / AVERAGE_SPEED_KMH
+
+    def _route_at(self, i: Optional[int], j: int) -> Route:
+        dist, time = self.metrics(i, j)
+        name, city = self._attractions[j]["name"], self._attractions[j]["city"]
+        if i is None:
+            return Route(dist, time, lambda: [f"Drive from CURRENT location to {name} in {city}"])
+        origin = self._attractions[i]["city"]
+        return Route(dist, time, lambda: [f"Drive from {origin} to {city} (main road)", f"Arrive at {name}"])
+
+    # -- legacy key access --
+    def _locate(self, key) -> Optional[Tuple[Optional[int], int]]:
+        if not isinstance(key, str):
+            return None
+        if key.startswith("CURRENT__"):
+            j = self._index.get(key[len("CURRENT__"):])
+            return None if j is None else (None, j)
+        for length in self._id_lengths:
+            i = self._index.get(key[:length])
+            j = self._index.get(key[length:])
+            if i is not None and j is not None and i != j:
+                return i, j
+        return None
+
+    def __getitem__(self, key):
+        if key in self.overrides:
+            return self.overrides[key]
+        loc = self._locate(key)
+        if loc is None:
+            raise KeyError(key)
+        return self._route_at(*loc)
+
+    def __contains__(self, key):
+        return key in self.overrides or self._locate(key) is not None
+
+    def _generated_keys(self):
+        for aid in self._ids:
+            yield f"CURRENT__{aid}"
+        for a, b in itertools.permutations(self._ids, 2):
+            yield f"{a}{b}"
+
+    def __iter__(self):
+        yield from self._generated_keys()
+        for key in self.overrides:
+            if self._locate(key) is None:
+                yield key
+
+    def __len__(self):
+        n = len(self._ids)
+        extra = sum(1 for key in self.overrides if self._locate(key) is None)
+        return n + n * (n - 1) + extra
+
+    # -- versioned overrides --
+    # Computed routes always follow the live catalog; only the hand-edited
+    # overrides are stored, so they carry the fingerprints of their endpoints.
+    def _endpoints(self, key: str, known: Mapping[str, int]) -> Optional[List[str]]:
+        """Attraction ids an override key refers to, in the catalog or in ``known``."""
+        def exists(aid):
+            return aid in self._index or aid in known
+        if key.startswith("CURRENT__"):
+            aid = key[len("CURRENT__"):]
+            return [aid] if exists(aid) else None
+        for length in sorted(set(self._id_lengths) | {len(aid) for aid in known}):
+            a, b = key[:length], key[length:]
+            if a != b and exists(a) and exists(b):
+                return [a, b]
+        return None
+
+    def stale_overrides(self) -> Dict[str, List[str]]:
+        """Overrides whose endpoints were removed, renamed or moved city since they were saved.
+
+        "dropped" are the overrides of a removed attraction; "stale" those of
+        a renamed or moved one, whose hand-edited figures may no longer fit.
+        """
+        removed, changed, dropped, stale = set(), set(), [], []
+        for key in self.overrides:
+            gone = moved = False
+            for aid in self._endpoints(key, self.fingerprints) or ():
+                i = self._index.get(aid)
+                if i is None:
+                    removed.add(aid)
+                    gone = True
+                elif aid in self.fingerprints and self.fingerprints[aid] != route_fingerprint(self._attractions[i]):
+                    changed.add(aid)
+                    moved = True
+            if gone:
+                dropped.append(key)
+            elif moved:
+                stale.append(key)
+        return {"removed": sorted(removed), "changed": sorted(changed), "dropped": dropped, "stale": stale}
+
+    def override_fingerprints(self) -> Dict[str, int]:
+        """Fingerprint of each override endpoint; a changed one keeps the fingerprint it was saved with."""
+        fingerprints = {}
+        for key in self.overrides:
+            for aid in self._endpoints(key, {}) or ():
+                saved = self.fingerprints.get(aid)
+                fingerprints[aid] = route_fingerprint(self._attractions[self._index[aid]]) if saved is None else saved
+        return fingerprints
+
+    def reconcile(self) -> Dict[str, List[str]]:
+        """Drop the overrides of removed attractions and version new ones; returns what was found.
+
+        Overrides of a renamed or moved attraction are kept and stay stale
+        (reported by check_routes) until their saved fingerprint is deleted.
+        Computed routes need no refresh: rows are derived from the catalog on use.
+        """
+        self.delta = self.stale_overrides()
+        for key in self.delta["dropped"]:
+            del self.overrides[key]
+        self.fingerprints = self.override_fingerprints()
+        return self.delta
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"format": ROUTE_STORE_FORMAT, "attractions": len(self._ids),
+                "fingerprints": self.override_fingerprints(), "overrides": self.overrides}
+
+def check_routes(routes: RouteStore, attractions: Sequence, seed: int = 0) -> Dict[str, Any]:
+    """Compare ``routes`` against a full rebuild with generate_default_routes.
+
+    Catalogs above ROUTE_CHECK_FULL are checked on every pair of a random
+    sample of ROUTE_CHECK_SAMPLE attractions. Override keys are skipped (they
+    differ on purpose) but must not be stale.
+    """
+    records = list(attractions)
+    if len(records) > ROUTE_CHECK_FULL:
+        records = random.Random(seed).sample(records, ROUTE_CHECK_SAMPLE)
+    reference = generate_default_routes(records, routes.origin)
+    mismatches = []
+    for key, expected in reference.items():
+        if key in routes.overrides:
+            continue
+        got = routes.get(key)
+        if got is None or (got["distance_km"], got["time_min"], list(got["steps"])) != \
+                (expected["distance_km"], expected["time_min"], expected["steps"]):
+            mismatches.append(key)
+    found = routes.stale_overrides()
+    stale = found["dropped"] + found["stale"]
+    return {
+        "attractions": len(attractions),
+        "sampled": len(records),
+        "checked": len(reference),
+        "mismatches": len(mismatches),
+        "first_mismatches": mismatches[:10],
+        "stale_overrides": stale,
+        "ok": not mismatches and not stale,
+    }
+
+def load_routes(attractions: List[Dict[str, Any]]) -> RouteStore:
+    if not ROUTES_FILE.exists():
+        store = RouteStore(attractions)
+        save_json(ROUTES_FILE, store.to_json())
+        return store
+    data = load_or_init_json(ROUTES_FILE, {})
+    if data.get("format") in ROUTE_STORE_FORMATS:
+        store = RouteStore(attractions, data.get("overrides"), data.get("fingerprints"))
+        store.reconcile()
+        # rewrite only when an override was dropped or is new (or on upgrade)
+        if data["format"] != ROUTE_STORE_FORMAT or store.fingerprints != data.get("fingerprints"):
+            write_json_atomic(ROUTES_FILE, store.to_json())
+        return store
+    # legacy full dump: keep only entries that differ from what the old id-based
+    # formula produced, i.e. the hand-edited ones
+    legacy = RouteStore([{"id": a["id"], "name": a["name"], "city": a["city"]} for a in attractions])
+    legacy.set_origin(None)
+    store = RouteStore(attractions)
+    store.overrides = {k: v for k, v in data.items() if legacy.get(k) != v}
+    save_json(ROUTES_FILE, store.to_json())
+    return store
+
+# ------------------ Review Log ------------------
+LEGACY_META_KEY = "_meta"       # where older releases kept log_seq/stats inside reviews.json
+REVIEW_COMPACT_EVERY = 1000     # log entries before a background compaction
+
+def write_json_atomic(path: Path, obj: Any):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class ReviewStats:
+    """Running aggregate of one attraction's reviews; O(1) to update."""
+    __slots__ = ("count", "total", "histogram", "latest")
+
+    def __init__(self, count: int = 0, total: int = 0, histogram: Optional[List[int]] = None, latest: str = ""):
+        self.count = count
+        self.total = total
+        self.histogram = histogram or [0] * 5   # ratings 1..5
+        self.latest = latest
+
+    def add(self, review: Dict[str, Any]):
+        rating = review.get("rating", 0)
+        self.count += 1
+        self.total += rating
+        if rating in (1, 2, 3, 4, 5):
+            self.histogram[rating - 1] += 1
+        date = review.get("date") or ""
+        if date > self.latest:
+            self.latest = date
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_list(self) -> list:
+        return [self.count, self.total, list(self.histogram), self.latest]
+
+    @classmethod
+    def from_list(cls, data: list) -> "ReviewStats":
+        return cls(data[0], data[1], list(data[2]), data[3])
+
+    @classmethod
+    def of(cls, reviews: Iterable[Dict[str, Any]]) -> "ReviewStats":
+        stats = cls()
+        for review in reviews:
+            stats.add(review)
+        return stats
+
+def stream_reviews(path: Path, count_stats: bool = True) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, ReviewStats], Optional[Dict[str, Any]]]:
+    """Parse reviews.json one attraction at a time, building ReviewStats as it goes.
+
+    Also returns the legacy ``_meta`` member if the file still has one.
+    """
+    reviews: Dict[str, List[Dict[str, Any]]] = {}
+    stats: Dict[str, ReviewStats] = {}
+    legacy = None
+    for aid, rvs in iter_json_object(path):
+        if aid == LEGACY_META_KEY:
+            legacy = rvs or {}
+            continue
+        reviews[aid] = rvs
+        if count_stats:
+            stats[aid] = ReviewStats.of(rvs)
+    return reviews, stats, legacy
+
+def read_reviews_meta(path: Path) -> Tuple[int, Optional[Dict[str, list]]]:
+    """(log_seq, stats) that reviews.meta.json records for the reviews.json at ``path``.
+
+    The sidecar names the file it was written for by size and mtime. Stats
+    are only returned when that is still the file on disk; if the previous
+    file is, compaction was cut short before replacing it.
+    """
+    try:
+        with open(REVIEWS_META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        source = list(review_index_source(path))
+    except (OSError, ValueError):
+        return 0, None
+    if meta.get("source") == source:
+        return meta.get("log_seq", 0), meta.get("stats")
+    previous = meta.get("previous") or {}
+    if previous.get("source") == source:
+        return previous.get("log_seq", 0), None
+    return meta.get("log_seq", 0), None   # edited by hand: keep the sequence, recount the stats
+
+def write_reviews_base(path: Path, base: Mapping[str, Any], raw=None, log_seq: int = 0,
+                       stats: Optional[Dict[str, list]] = None) -> Dict[str, Tuple[int, int]]:
+    """Atomically write reviews.json plus its sidecar and return each list's byte range.
+
+    Values of ``base`` are review lists, or ``(start, end)`` ranges that are
+    copied unparsed from ``raw`` (the memory-mapped previous file). The
+    layout matches ``json.dump(..., indent=2)``. The sidecar goes first and
+    also names the file being replaced, so a crash in between still tells
+    which log entries the file on disk already holds.
+    """
+    def member(key: str, text: str) -> bytes:
+        return f"  {json.dumps(key, ensure_ascii=False)}: {text}".encode("utf-8")
+
+    offsets: Dict[str, Tuple[int, int]] = {}
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"{")
+        pos = f.tell()
+        for aid, rvs in base.items():
+            if type(rvs) is tuple:
+                value = raw[rvs[0]:rvs[1]]
+            else:
+                value = json.dumps(rvs, indent=2, ensure_ascii=False).replace("\n", "\n  ").encode("utf-8")
+            head = (b",\n" if offsets else b"\n") + member(aid, "")
+            f.write(head)
+            f.write(value)
+            offsets[aid] = (pos + len(head), pos + len(head) + len(value))
+            pos = offsets[aid][1]
+        f.write(b"\n}" if offsets else b"}")
+        f.flush()
+        os.fsync(f.fileno())
+    previous_seq = read_reviews_meta(path)[0] if path.exists() else 0
+    write_json_atomic(REVIEWS_META_FILE, {
+        "log_seq": log_seq,
+        "source": list(review_index_source(tmp)),   # os.replace keeps size and mtime
+        "previous": {"log_seq": previous_seq,
+                     "source": list(review_index_source(path)) if path.exists() else None},
+        "stats": stats or {},
+    })
+    os.replace(tmp, path)
+    return offsets
+
+class ReviewStore(Mapping):
+    """Reviews keyed by attraction id: compacted reviews.json + append-only reviews.jsonl.
+
+    Each new review is one fsync'ed line in the log, tagged with a sequence
+    number. Compaction rewrites reviews.json with the log folded in (recording
+    the last folded sequence number in reviews.meta.json) and then drops those
+    lines from the log, so a crash at any point never loses or duplicates a
+    review. Per-attraction ReviewStats are saved in the sidecar too, so loading
+    never has to rescan the review history. reviews.json itself stays a plain
+    ``{id: [review, ...]}`` object.
+    """
+
+    def __init__(self, reviews: Dict[str, List[Dict[str, Any]]], seq: int = 0, log_entries: int = 0,
+                 stats: Optional[Dict[str, ReviewStats]] = None):
+        self._reviews = reviews
+        if stats is None:
+            stats = {aid: ReviewStats.of(rvs) for aid, rvs in reviews.items()}
+        self._stats = stats
+        self._seq = seq                  # last sequence number handed out
+        self._log_entries = log_entries  # entries in the log since the last compaction
+        self._lock = threading.Lock()
+        self._log = None
+        self._compactor: Optional[threading.Thread] = None
+        self._batch_depth = 0
+        self._pending: List[str] = []   # log lines held back by batch()
+
+    @classmethod
+    def load(cls, mapped: bool = False) -> "ReviewStore":
+        """Stream reviews.json in (or, with ``mapped``, only index it) and replay the log."""
+        if not REVIEWS_FILE.exists():
+            save_json(REVIEWS_FILE, {})
+        base_seq, saved = read_reviews_meta(REVIEWS_FILE)
+        if mapped:
+            reviews, stats, legacy = MappedReviews.open(REVIEWS_FILE)
+        else:
+            reviews, stats, legacy = stream_reviews(REVIEWS_FILE, count_stats=saved is None)
+            if saved is not None:
+                stats = {aid: ReviewStats.from_list(v) for aid, v in saved.items()}
+        if legacy is not None:
+            base_seq = legacy.get("log_seq", 0)
+        seq = base_seq
+        log_entries = 0
+        for record in read_review_log(base_seq):
+            aid, review = record["aid"], record["review"]
+            reviews.setdefault(aid, []).append(review)
+            stats.setdefault(aid, ReviewStats()).add(review)
+            seq = max(seq, record["seq"])
+            log_entries += 1
+        store = cls(reviews, seq, log_entries, stats)
+        if legacy is not None:
+            store.compact()   # move the old _meta member out to the sidecar
+        else:
+            store.maybe_compact()
+        return store
+
+    def __getitem__(self, aid):
+        return self._reviews[aid]
+
+    def __iter__(self):
+        return iter(self._reviews)
+
+    def __len__(self):
+        return len(self._reviews)
+
+    def items(self):
+        # straight from the backing dict: MappedReviews then parses without caching
+        return self._reviews.items()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def log_entries(self) -> int:
+        return self._log_entries
+
+    def stats(self, aid: str) -> Optional[ReviewStats]:
+        return self._stats.get(aid)
+
+    def all_stats(self) -> Dict[str, ReviewStats]:
+        return self._stats
+
+    def page(self, aid: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        if isinstance(self._reviews, MappedReviews):
+            return self._reviews.page(aid, offset, limit)   # read from the mapped file
+        return list(self._reviews.get(aid, ())[offset:offset + limit])
+
+    def add(self, aid: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._seq += 1
+            self._pending.append(json.dumps({"seq": self._seq, "aid": aid, "review": entry}, ensure_ascii=False) + "\n")
+            self._reviews.setdefault(aid, []).append(entry)
+            self._stats.setdefault(aid, ReviewStats()).add(entry)
+            self._log_entries += 1
+        if not self._batch_depth:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        """Group the appends made inside the block into one write + fsync."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                if self._log is None:
+                    self._log = open(REVIEW_LOG_FILE, "a", encoding="utf-8")
+                self._log.write("".join(self._pending))
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._pending.clear()
+        self.maybe_compact()
+
+    def maybe_compact(self):
+        if self._log_entries < REVIEW_COMPACT_EVERY:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="review-compactor", daemon=True)
+        self._compactor.start()
+
+    def compact(self):
+        mapped = isinstance(self._reviews, MappedReviews)
+        with self._lock:
+            seq = self._seq
+            # reviews still unread in a mapped file are copied over as raw bytes
+            base = self._reviews.snapshot() if mapped else {aid: list(rvs) for aid, rvs in self._reviews.items()}
+            stats = {aid: st.to_list() for aid, st in self._stats.items()}
+        offsets = write_reviews_base(REVIEWS_FILE, base, self._reviews.raw if mapped else None, seq, stats)
+        if mapped:
+            save_review_index(REVIEWS_FILE, offsets, None, stats)
+        with self._lock:
+            # reviews appended while the base was being written stay in the log
+            kept = [json.dumps(r, ensure_ascii=False) + "\n" for r in read_review_log(seq)]
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            tmp = REVIEW_LOG_FILE.with_name(REVIEW_LOG_FILE.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, REVIEW_LOG_FILE)
+            self._log_entries = len(kept)
+
+    def close(self):
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+RANK_BY = ("rating", "popularity", "blend")
+BLEND_RATING_WEIGHT = 0.5   # share of the 0-10 blend score that comes from the mean rating
+BLEND_DEFAULT_RATING = 3.0  # mid-scale rating assumed for the blend when there are too few reviews
+
+def top_rated(attractions: AttractionCatalog, reviews: ReviewStore, k: int = 10, region: Optional[str] = None,
+              category: Optional[str] = None, by: str = "rating", min_reviews: int = 1) -> List[Tuple[Attraction, Optional[ReviewStats], float]]:
+    """Best ``k`` attractions by mean rating, popularity, or a blend of both."""
+    if by not in RANK_BY:
+        raise ValueError(f"unknown ranking {by!r}; expected one of {RANK_BY}")
+    if region is not None:
+        candidates = attractions.by_region(region)
+        if category is not None:
+            candidates = [a for a in candidates if a["category"] == category]
+    elif category is not None:
+        candidates = attractions.by_category(category)
+    else:
+        candidates = attractions
+
+    all_stats = reviews.all_stats()
+
+    def scored():
+        for pos, a in enumerate(candidates):
+            st = all_stats.get(a["id"])
+            count = st.count if st else 0
+            popularity = a.get("popularity") or 0
+            if by == "rating":
+                if count < min_reviews:
+                    continue
+                score = st.mean
+            elif by == "popularity":
+                score = popularity
+            else:
+                mean = st.mean if count and count >= min_reviews else BLEND_DEFAULT_RATING
+                score = BLEND_RATING_WEIGHT * mean * 2 + (1 - BLEND_RATING_WEIGHT) * popularity
+            # more reviews, then catalog order, break ties
+            yield score, count, -pos, a, st
+
+    best = heapq.nlargest(k, scored(), key=lambda t: t[:3])
+    return [(a, st, score) for score, _, _, a, st in best]
+
+def read_review_log(after_seq: int = 0):
+    """Yield log records newer than ``after_seq``; a torn last line is cut off."""
+    try:
+        f = open(REVIEW_LOG_FILE, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        good_end = 0
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            good_end += len(raw)
+            if record.get("seq", 0) > after_seq:
+                yield record
+        f.seek(0, os.SEEK_END)
+        if f.tell() != good_end:
+            # crashed mid-append: drop the partial line so the next append starts clean
+            f.truncate(good_end)
+
+# ------------------ Favorites ------------------
+DEFAULT_USER = "default_user"
+
+FAVORITES_SHARDS = 64
+
+def favorites_shard(user: str) -> int:
+    # crc32, not hash(): the shard of a user must not change between runs
+    return zlib.crc32(user.encode("utf-8")) % FAVORITES_SHARDS
+
+def favorites_shard_path(shard: int) -> Path:
+    return FAVORITES_DIR / f"shard_{shard:02d}.json"
+
+class FavoritesStore:
+    """Favorites per user, stored in ``FAVORITES_SHARDS`` files under data/favorites/.
+
+    Each user's favorites are an insertion-ordered dict used as a set, so
+    membership, add and remove are O(1), and a change rewrites only the
+    shard that user hashes to. ``count(aid)`` reads a reverse index
+    (attraction -> number of users) updated on every add/remove.
+    """
+
+    def __init__(self, favorites: Optional[Mapping[str, Iterable[str]]] = None):
+        self._favorites: Dict[str, Dict[str, None]] = {}
+        self._shards: Dict[int, set] = {}
+        self._counts: Dict[str, int] = {}
+        self._batch_depth = 0
+        self._dirty: set = set()
+        for user, aids in (favorites or {}).items():
+            favs = dict.fromkeys(aids)
+            if not favs:
+                continue
+            self._favorites[user] = favs
+            self._shards.setdefault(favorites_shard(user), set()).add(user)
+            for aid in favs:
+                self._counts[aid] = self._counts.get(aid, 0) + 1
+
+    @classmethod
+    def load(cls) -> "FavoritesStore":
+        if FAVORITES_DIR.is_dir():
+            data: Dict[str, List[str]] = {}
+            for path in sorted(FAVORITES_DIR.glob("shard_*.json")):
+                with open(path, "r", encoding="utf-8") as f:
+                    data.update(json.load(f))
+            return cls(data)
+        # first start with shards: move favorites.json over, keeping it as .migrated
+        store = cls(load_or_init_json(FAVORITES_FILE, {}) if FAVORITES_FILE.exists() else {})
+        FAVORITES_DIR.mkdir(parents=True, exist_ok=True)
+        store._dirty = {shard for shard, users in store._shards.items() if users}
+        store.save()
+        if FAVORITES_FILE.exists():
+            os.replace(FAVORITES_FILE, FAVORITES_FILE.with_name(FAVORITES_FILE.name + ".migrated"))
+        return store
+
+    def get(self, user: str) -> List[str]:
+        return list(self._favorites.get(user, ()))
+
+    def has(self, user: str, aid: str) -> bool:
+        return aid in self._favorites.get(user, ())
+
+    def users(self) -> List[str]:
+        return list(self._favorites)
+
+    def count(self, aid: str) -> int:
+        """How many users have ``aid`` among their favorites."""
+        return self._counts.get(aid, 0)
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    def most_favorited(self, k: int = 10) -> List[Tuple[str, int]]:
+        return heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+
+    def add(self, user: str, aid: str) -> bool:
+        favs = self._favorites.get(user)
+        if favs is None:
+            favs = self._favorites[user] = {}
+            self._shards.setdefault(favorites_shard(user), set()).add(user)
+        elif aid in favs:
+            return False
+        favs[aid] = None
+        self._counts[aid] = self._counts.get(aid, 0) + 1
+        self._changed(user)
+        return True
+
+    def remove(self, user: str, aid: str) -> bool:
+        favs = self._favorites.get(user)
+        if favs is None or aid not in favs:
+            return False
+        del favs[aid]
+        if not favs:
+            del self._favorites[user]
+            self._shards[favorites_shard(user)].discard(user)
+        left = self._counts[aid] - 1
+        if left:
+            self._counts[aid] = left
+        else:
+            del self._counts[aid]
+        self._changed(user)
+        return True
+
+    def _changed(self, user: str):
+        self._dirty.add(favorites_shard(user))
+        self.save()
+
+    def save(self):
+        if self._batch_depth or not self._dirty:
+            return
+        FAVORITES_DIR.mkdir(parents=True, exist_ok=True)
+        for shard in sorted(self._dirty):
+            users = sorted(self._shards.get(shard, ()))
+            path = favorites_shard_path(shard)
+            if not users and not path.exists():
+                continue   # a shard file is created when its first user saves a favorite
+            write_json_atomic(path, {user: list(self._favorites[user]) for user in users})
+        self._dirty.clear()
+
+    @contextmanager
+    def batch(self):
+        """Write each touched shard once for all the changes made inside the block."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.save()
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {user: list(favs) for user, favs in self._favorites.items()}
+
+    def close(self):
+        self.save()
+
+# ------------------ Startup Snapshot ------------------
+SNAPSHOT_VERSION = 5   # 5: route override fingerprints
+
+def snapshot_sources() -> List[Path]:
+    shards = sorted(FAVORITES_DIR.glob("shard_*.json")) if FAVORITES_DIR.is_dir() else []
+    return [ATTRACTIONS_FILE, REVIEWS_FILE, REVIEWS_META_FILE, REVIEW_LOG_FILE, FAVORITES_FILE, ROUTES_FILE] + shards
+
+def source_signature() -> Dict[str, Tuple[int, int]]:
+    sig = {}
+    for path in snapshot_sources():
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        sig[path.name] = (st.st_mtime_ns, st.st_size)
+    return sig
+
+class LazyDict(dict):
+    """dict whose values may still be pickled blobs from the snapshot.
+
+    A blob is unpickled the first time its key is read, so a warm start does
+    not pay for rebuilding data (e.g. every review) it never looks at.
+    """
+
+    raw_type = bytes
+
+    def decode(self, value):
+        return pickle.loads(value)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if type(value) is self.raw_type:
+            value = self.decode(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            dict.__setitem__(self, key, default)
+            return default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.pop(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+def pack_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # column-wise lists of plain values unpickle much faster than n small dicts
+    fields = list(records[0]) if records else []
+    if all(len(r) == len(fields) and list(r) == fields for r in records):
+        return {"fields": fields, "columns": [[r[f] for r in records] for f in fields]}
+    return {"rows": records}
+
+def load_snapshot() -> Optional[Dict[str, Any]]:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # unpickling allocates many containers; collections only slow it down
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            snap = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if not isinstance(snap, dict) or snap.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snap.get("sources") != source_signature():
+        return None
+    return snap
+
+def save_snapshot(attractions, reviews: ReviewStore, favorites: FavoritesStore, routes: RouteStore):
+    snap = {
+        "version": SNAPSHOT_VERSION,
+        "sources": source_signature(),
+        "attractions": pack_records(attractions),
+        "reviews": {aid: pickle.dumps(rvs, protocol=pickle.HIGHEST_PROTOCOL) for aid, rvs in reviews.items()},
+        "review_log": (reviews.seq, reviews.log_entries),
+        "review_stats": {aid: st.to_list() for aid, st in reviews.all_stats().items()},
+        "favorites": favorites.to_dict(),
+        "route_overrides": routes.overrides,
+        "route_fingerprints": routes.fingerprints,
+    }
+    tmp = SNAPSHOT_FILE.with_name(SNAPSHOT_FILE.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, SNAPSHOT_FILE)
+    except OSError as e:
+        print("⚠ Could not write startup snapshot:", e)
+
+def load_attractions() -> AttractionCatalog:
+    """Stream attractions.json into a catalog, indexing records as they are parsed."""
+    if not ATTRACTIONS_FILE.exists():
+        save_json(ATTRACTIONS_FILE, DEFAULT_ATTRACTIONS)
+    attractions = AttractionCatalog()
+    filled = False
+    for records in chunked(iter_json_array(ATTRACTIONS_FILE), 1000):
+        filled |= fill_default_coordinates(records)
+        for a in records:
+            attractions.add(a)
+    if filled:
+        write_json_atomic(ATTRACTIONS_FILE, [dict(a) for a in attractions])
+    return attractions
+
+def load_app_data(use_snapshot: bool = True, mapped_reviews: Optional[bool] = None):
+    """Load attractions, reviews, favorites and routes, preferring a fresh snapshot.
+
+    A reviews.json of ``REVIEWS_MMAP_BYTES`` or more (or ``mapped_reviews=True``)
+    is memory-mapped rather than parsed; the snapshot is not used then, since
+    it would have to hold every review.
+    """
+    ensure_data_dirs()
+    mapped = use_mapped_reviews(mapped_reviews)
+    use_snapshot = use_snapshot and not mapped
+    snap = load_snapshot() if use_snapshot else None
+    if snap is not None:
+        packed = snap["attractions"]
+        if "rows" in packed:
+            attractions = AttractionCatalog(packed["rows"])
+        else:
+            attractions = AttractionCatalog.from_columns(packed["fields"], packed["columns"])
+        routes = RouteStore(attractions, snap["route_overrides"], snap["route_fingerprints"])
+        routes.reconcile()   # nothing to drop (routes.json is a source); finds the stale overrides again
+        stats = {aid: ReviewStats.from_list(v) for aid, v in snap["review_stats"].items()}
+        reviews = ReviewStore(LazyDict(snap["reviews"]), *snap["review_log"], stats=stats)
+        return attractions, reviews, FavoritesStore(snap["favorites"]), routes
+    attractions = load_attractions()
+    reviews = ReviewStore.load(mapped)
+    favorites = FavoritesStore.load()
+    # routes are computed on demand; routes.json only keeps hand-edited entries
+    routes = load_routes(attractions)
+    if use_snapshot:
+        save_snapshot(attractions, reviews, favorites, routes)
+    return attractions, reviews, favorites, routes
+
+def measure_startup(rounds: int = 5) -> Dict[str, Any]:
+    ensure_data_dirs()
+    if SNAPSHOT_FILE.exists():
+        SNAPSHOT_FILE.unlink()
+    t0 = time.perf_counter()
+    load_app_data()
+    cold = time.perf_counter() - t0
+    warm = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        load_app_data()
+        warm.append(time.perf_counter() - t0)
+    warm_best = min(warm)
+    return {
+        "data_dir": str(DATA_DIR),
+        "bytes": sum(size for _, size in source_signature().values()),
+        "cold_ms": round(cold * 1000, 3),
+        "warm_ms": round(warm_best * 1000, 3),
+        "speedup": round(cold / warm_best, 1) if warm_best else None,
+    }
+
+# ------------------ Mapped Reviews ------------------
+REVIEWS_MMAP_BYTES = 256 << 20    # a bigger reviews.json is memory-mapped instead of parsed
+REVIEW_INDEX_VERSION = 2   # 2: "legacy" replaced the per-file "meta"
+REVIEW_PAGE_CHUNK = 16 << 10      # bytes decoded at a time when reading one page of a mapped list
+
+class MappedText:
+    """File-like ``read()`` of UTF-8 text from a byte range of a mmap, for JsonStream."""
+
+    def __init__(self, raw, start: int, end: int):
+        self.raw = raw
+        self.pos = start
+        self.end = end
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read(self, size: int) -> str:
+        stop = min(self.end, self.pos + size)
+        data = self.raw[self.pos:stop]
+        self.pos = stop
+        return self._decoder.decode(data, final=stop >= self.end)
+
+class MappedReviews(LazyDict):
+    """Review lists that stay in a memory-mapped reviews.json until read.
+
+    Each value starts out as the ``(start, end)`` byte range of that
+    attraction's array, so reading one attraction parses only its reviews.
+    """
+    raw_type = tuple
+
+    def __init__(self, raw, offsets: Dict[str, Tuple[int, int]]):
+        super().__init__(offsets)
+        self.raw = raw
+
+    def decode(self, value):
+        start, end = value
+        return json.loads(self.raw[start:end])
+
+    @classmethod
+    def open(cls, path: Path) -> Tuple["MappedReviews", Dict[str, ReviewStats], Optional[Dict[str, Any]]]:
+        index = load_review_index(path)
+        if index is None:
+            offsets: Dict[str, Tuple[int, int]] = {}
+            stats: Dict[str, list] = {}
+            legacy = None
+            for aid, rvs, start, end in iter_json_object(path, offsets=True):
+                if aid == LEGACY_META_KEY:
+                    legacy = {k: v for k, v in (rvs or {}).items() if k != "stats"}
+                else:
+                    offsets[aid] = (start, end)
+                    stats[aid] = ReviewStats.of(rvs).to_list()
+            index = save_review_index(path, offsets, legacy, stats)
+        with open(path, "rb") as f:
+            raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        stats = {aid: ReviewStats.from_list(v) for aid, v in index["stats"].items()}
+        return cls(raw, index["offsets"]), stats, index["legacy"]
+
+    def page(self, aid: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Reviews ``offset`` to ``offset + limit`` of ``aid``.
+
+        A list still on disk is parsed only up to the last review asked for,
+        and nothing is cached, so paging never loads the rest of it.
+        """
+        value = dict.get(self, aid)
+        if value is None:
+            return []
+        if type(value) is not tuple:
+            return list(value[offset:offset + limit])
+        stream = JsonStream(MappedText(self.raw, *value), REVIEW_PAGE_CHUNK)
+        return list(itertools.islice(json_array_items(stream), offset, offset + limit))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy for compaction: parsed lists are copied, unread ones stay byte ranges."""
+        return {aid: value if type(value) is tuple else list(value) for aid, value in dict.items(self)}
+
+    # iterating never caches, so a full pass (e.g. --migrate-to-sqlite) stays small
+    def values(self):
+        return (value for _, value in self.items())
+
+    def items(self):
+        for aid, value in dict.items(self):
+            yield aid, self.decode(value) if type(value) is tuple else value
+
+def review_index_source(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+def load_review_index(path: Path) -> Optional[Dict[str, Any]]:
+    """The saved offset index of ``path``, if it still matches the file."""
+    try:
+        with open(REVIEWS_INDEX_FILE, "rb") as f:
+            index = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != REVIEW_INDEX_VERSION:
+        return None
+    if index.get("source") != review_index_source(path):
+        return None
+    return index
+
+def save_review_index(path: Path, offsets: Dict[str, Tuple[int, int]], legacy: Optional[Dict[str, Any]],
+                      stats: Dict[str, list]) -> Dict[str, Any]:
+    index = {"version": REVIEW_INDEX_VERSION, "source": review_index_source(path),
+             "offsets": offsets, "legacy": legacy, "stats": stats}
+    tmp = REVIEWS_INDEX_FILE.with_name(REVIEWS_INDEX_FILE.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, REVIEWS_INDEX_FILE)
+    except OSError as e:
+        print("⚠ Could not write review index:", e)
+    return index
+
+def use_mapped_reviews(mapped: Optional[bool] = None) -> bool:
+    if mapped is not None:
+        return mapped
+    try:
+        return REVIEWS_FILE.stat().st_size >= REVIEWS_MMAP_BYTES
+    except OSError:
+        return False
+
+# ------------------ Storage Backends ------------------
+STORAGE_BACKENDS = ("json", "sqlite")
+STORAGE_ENV = "WELCOME_UGANDA_STORAGE"
+
+class JsonStorage:
+    """Default backend: the JSON files in DATA_DIR. Meant for one process at a time."""
+    name = "json"
+
+    def __init__(self, use_snapshot: bool = True, mapped_reviews: Optional[bool] = None):
+        self.use_snapshot = use_snapshot
+        self.mapped_reviews = mapped_reviews
+
+    def load(self):
+        return load_app_data(self.use_snapshot, self.mapped_reviews)
+
+    def save_attractions(self, attractions: Iterable[Mapping]):
+        write_json_atomic(ATTRACTIONS_FILE, [dict(a) for a in attractions])
+
+    def save_route_overrides(self, routes: RouteStore):
+        write_json_atomic(ROUTES_FILE, routes.to_json())
+
+    def close(self):
+        pass
+
+SQLITE_SCHEMA_VERSION = 3   # PRAGMA user_version; 2 added favorite_counts, 3 route_fingerprints
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attractions (
+    pos INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    region TEXT,
+    category TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attractions_region ON attractions(region);
+CREATE INDEX IF NOT EXISTS attractions_category ON attractions(category);
+CREATE TABLE IF NOT EXISTS reviews (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    aid TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_aid ON reviews(aid, seq);
+CREATE TABLE IF NOT EXISTS review_stats (
+    aid TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    h1 INTEGER NOT NULL, h2 INTEGER NOT NULL, h3 INTEGER NOT NULL, h4 INTEGER NOT NULL, h5 INTEGER NOT NULL,
+    latest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS favorites (
+    user TEXT NOT NULL,
+    aid TEXT NOT NULL,
+    UNIQUE (user, aid)
+);
+CREATE INDEX IF NOT EXISTS favorites_aid ON favorites(aid);
+CREATE TABLE IF NOT EXISTS favorite_counts (
+    aid TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS favorite_counts_count ON favorite_counts(count);
+CREATE TRIGGER IF NOT EXISTS favorites_added AFTER INSERT ON favorites BEGIN
+    INSERT INTO favorite_counts (aid, count) VALUES (NEW.aid, 1)
+        ON CONFLICT(aid) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_removed AFTER DELETE ON favorites BEGIN
+    UPDATE favorite_counts SET count = count - 1 WHERE aid = OLD.aid;
+    DELETE FROM favorite_counts WHERE aid = OLD.aid AND count <= 0;
+END;
+CREATE TABLE IF NOT EXISTS route_overrides (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS route_fingerprints (
+    aid TEXT PRIMARY KEY,
+    fingerprint INTEGER NOT NULL
+);
+"""
+
+class SQLiteStorage:
+    """sqlite3 backend in WAL mode; several processes can read and write at once.
+
+    Reviews and favorites are read from the database on every access and each
+    write is its own short transaction, so kiosks sharing the file see each
+    other's changes instead of overwriting them. Writes share one connection
+    under ``lock``; reads outside batch() use a connection per thread, so they
+    never queue behind a write that is waiting for another process.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or SQLITE_FILE)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        self._batch_depth = 0
+        self._local = threading.local()   # per-thread read connection and batch flag
+        self._readers: List[sqlite3.Connection] = []
+        self._upgrade()
+
+    def _upgrade(self):
+        with self.transaction() as cur:
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SQLITE_SCHEMA_VERSION:
+                return
+            if version < 2:
+                # databases from before the favorite_counts triggers
+                cur.execute("DELETE FROM favorite_counts")
+                cur.execute("INSERT INTO favorite_counts (aid, count) SELECT aid, COUNT(*) FROM favorites GROUP BY aid")
+            cur.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+
+    def transaction(self):
+        return _SQLiteTransaction(self)
+
+    @contextmanager
+    def batch(self):
+        """Run every write made inside the block in a single transaction."""
+        with self.transaction():
+            self._batch_depth += 1
+            self._local.batching = True
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                self._local.batching = self._batch_depth > 0
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        if getattr(self._local, "batching", False):
+            # the batch's own writes are only visible on its connection
+            with self.lock:
+                return self.conn.execute(sql, params).fetchall()
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+            with self.lock:
+                self._readers.append(reader)
+            self._local.reader = reader
+        return reader.execute(sql, params).fetchall()
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM attractions LIMIT 1").fetchone() is None
+
+    def load(self):
+        if self.is_empty():
+            try:
+                migrate_json_to_sqlite(self)
+            except RuntimeError:
+                pass  # another process migrated first
+
+        rows = self.conn.execute("SELECT data FROM attractions ORDER BY pos").fetchall()
+        attractions = AttractionCatalog(json.loads(data) for (data,) in rows)
+        overrides = {key: json.loads(data) for key, data in self.conn.execute("SELECT key, data FROM route_overrides")}
+        fingerprints = dict(self.conn.execute("SELECT aid, fingerprint FROM route_fingerprints").fetchall())
+        routes = RouteStore(attractions, overrides, fingerprints)
+        routes.reconcile()
+        if routes.fingerprints != fingerprints:
+            self.save_route_overrides(routes)
+        return attractions, SQLiteReviewStore(self), SQLiteFavoritesStore(self), routes
+
+    def save_attractions(self, attractions: Iterable[Mapping]):
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM attractions")
+            self._insert_attractions(cur, attractions)
+
+    def _insert_attractions(self, cur, attractions: Iterable[Mapping]):
+        cur.executemany(
+            "INSERT OR IGNORE INTO attractions (pos, id, region, category, data) VALUES (?, ?, ?, ?, ?)",
+            ((pos, a["id"], a.get("region"), a.get("category"), json.dumps(dict(a), ensure_ascii=False))
+             for pos, a in enumerate(attractions)))
+
+    def save_route_overrides(self, routes: RouteStore):
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM route_overrides")
+            cur.executemany("INSERT INTO route_overrides (key, data) VALUES (?, ?)",
+                            ((k, json.dumps(v, ensure_ascii=False)) for k, v in routes.overrides.items()))
+            cur.execute("DELETE FROM route_fingerprints")
+            cur.executemany("INSERT INTO route_fingerprints (aid, fingerprint) VALUES (?, ?)",
+                            routes.override_fingerprints().items())
+
+    def import_data(self, attractions, reviews: Mapping, favorites: Dict[str, List[str]], overrides: Dict[str, Any]) -> Dict[str, int]:
+        counts = {"attractions": 0, "reviews": 0, "favorites": 0, "route_overrides": len(overrides)}
+        with self.transaction() as cur:
+            if cur.execute("SELECT 1 FROM attractions LIMIT 1").fetchone() is not None:
+                raise RuntimeError(f"{self.path} already holds data; refusing to import twice")
+            attractions = list(attractions)
+            self._insert_attractions(cur, attractions)
+            counts["attractions"] = len(attractions)
+            for aid, rvs in reviews.items():
+                for review in rvs:
+                    _insert_review(cur, aid, review)
+                    counts["reviews"] += 1
+            for user, aids in favorites.items():
+                for aid in aids:
+                    cur.execute("INSERT OR IGNORE INTO favorites (user, aid) VALUES (?, ?)", (user, aid))
+                    counts["favorites"] += 1
+            cur.executemany("INSERT INTO route_overrides (key, data) VALUES (?, ?)",
+                            ((k, json.dumps(v, ensure_ascii=False)) for k, v in overrides.items()))
+        return counts
+
+    def close(self):
+        with self.lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+            self._local = threading.local()
+            self.conn.close()
+
+class _SQLiteTransaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+    # queue on the busy timeout instead of failing half-way through
+    def __init__(self, storage: SQLiteStorage):
+        self.storage = storage
+
+    def __enter__(self):
+        self.storage.lock.acquire()
+        self.cur = self.storage.conn.cursor()
+        self.nested = self.storage._batch_depth > 0   # already inside batch()
+        if not self.nested:
+            self.cur.execute("BEGIN IMMEDIATE")
+        return self.cur
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if not self.nested:
+                self.cur.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.storage.lock.release()
+        return False
+
+def _insert_review(cur, aid: str, review: Dict[str, Any]):
+    cur.execute("INSERT INTO reviews (aid, data) VALUES (?, ?)", (aid, json.dumps(review, ensure_ascii=False)))
+    rating = review.get("rating", 0)
+    hist = [1 if rating == r else 0 for r in (1, 2, 3, 4, 5)]
+    cur.execute(
+        "INSERT INTO review_stats (aid, count, total, h1, h2, h3, h4, h5, latest) VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(aid) DO UPDATE SET count = count + 1, total = total + excluded.total, "
+        "h1 = h1 + excluded.h1, h2 = h2 + excluded.h2, h3 = h3 + excluded.h3, h4 = h4 + excluded.h4, h5 = h5 + excluded.h5, "
+        "latest = MAX(latest, excluded.latest)",
+        (aid, rating, *hist, review.get("date") or ""))
+
+def _stats_from_row(row) -> ReviewStats:
+    return ReviewStats(row[0], row[1], list(row[2:7]), row[7])
+
+class SQLiteReviewStore(Mapping):
+    """Same interface as ReviewStore, backed by the reviews/review_stats tables."""
+
+    def __init__(self, storage: SQLiteStorage):
+        self._storage = storage
+
+    def _query(self, sql: str, params=()):
+        return self._storage.query(sql, params)
+
+    def __getitem__(self, aid):
+        rows = self._query("SELECT data FROM reviews WHERE aid = ? ORDER BY seq", (aid,))
+        if not rows:
+            raise KeyError(aid)
+        return [json.loads(data) for (data,) in rows]
+
+    def __contains__(self, aid):
+        return bool(self._query("SELECT 1 FROM reviews WHERE aid = ? LIMIT 1", (aid,)))
+
+    def __iter__(self):
+        return iter([aid for (aid,) in self._query("SELECT aid FROM review_stats ORDER BY aid")])
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM review_stats")[0][0]
+
+    def stats(self, aid: str) -> Optional[ReviewStats]:
+        rows = self._query("SELECT count, total, h1, h2, h3, h4, h5, latest FROM review_stats WHERE aid = ?", (aid,))
+        return _stats_from_row(rows[0]) if rows else None
+
+    def all_stats(self) -> Dict[str, ReviewStats]:
+        rows = self._query("SELECT aid, count, total, h1, h2, h3, h4, h5, latest FROM review_stats")
+        return {row[0]: _stats_from_row(row[1:]) for row in rows}
+
+    def page(self, aid: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM reviews WHERE aid = ? ORDER BY seq LIMIT ? OFFSET ?", (aid, limit, offset))
+        return [json.loads(data) for (data,) in rows]
+
+    def add(self, aid: str, entry: Dict[str, Any]):
+        with self._storage.transaction() as cur:
+            _insert_review(cur, aid, entry)
+
+    def batch(self):
+        return self._storage.batch()
+
+    def close(self):
+        pass
+
+class SQLiteFavoritesStore:
+    """Same interface as FavoritesStore, backed by the favorites table."""
+
+    def __init__(self, storage: SQLiteStorage):
+        self._storage = storage
+
+    def get(self, user: str) -> List[str]:
+        rows = self._storage.query("SELECT aid FROM favorites WHERE user = ? ORDER BY rowid", (user,))
+        return [aid for (aid,) in rows]
+
+    def users(self) -> List[str]:
+        rows = self._storage.query("SELECT DISTINCT user FROM favorites")
+        return [user for (user,) in rows]
+
+    def has(self, user: str, aid: str) -> bool:
+        return bool(self._storage.query("SELECT 1 FROM favorites WHERE user = ? AND aid = ?", (user, aid)))
+
+    def count(self, aid: str) -> int:
+        rows = self._storage.query("SELECT count FROM favorite_counts WHERE aid = ?", (aid,))
+        return rows[0][0] if rows else 0
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._storage.query("SELECT aid, count FROM favorite_counts"))
+
+    def most_favorited(self, k: int = 10) -> List[Tuple[str, int]]:
+        rows = self._storage.query("SELECT aid, count FROM favorite_counts ORDER BY count DESC LIMIT ?", (k,))
+        return [(aid, count) for aid, count in rows]
+
+    def add(self, user: str, aid: str) -> bool:
+        with self._storage.transaction() as cur:
+            cur.execute("INSERT OR IGNORE INTO favorites (user, aid) VALUES (?, ?)", (user, aid))
+            return cur.rowcount > 0
 
-# ------------------ Helpers ------------------
-def ensure_data_dirs():
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    def remove(self, user: str, aid: str) -> bool:
+        with self._storage.transaction() as cur:
+            cur.execute("DELETE FROM favorites WHERE user = ? AND aid = ?", (user, aid))
+            return cur.rowcount > 0
 
-def save_json(path: Path, obj: Any):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False)
+    def batch(self):
+        return self._storage.batch()
 
-def load_or_init_json(path: Path, default: Any):
-    if not path.exists():
-        save_json(path, default)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    def close(self):
+        pass
 
-def id_to_num(aid: str) -> int:
-    return sum(ord(c) for c in aid)
+def migrate_json_to_sqlite(storage: SQLiteStorage) -> Dict[str, int]:
+    """One-shot copy of the JSON data files (incl. the review log) into ``storage``."""
+    attractions, reviews, favorites, routes = load_app_data(use_snapshot=False)
+    try:
+        return storage.import_data(attractions, reviews, favorites.to_dict(), routes.overrides)
+    finally:
+        reviews.close()
 
-def generate_default_routes(attractions: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    routes: Dict[str, Dict[str, Any]] = {}
-    # CURRENT -> each attraction
-    for a in attractions:
-        n = id_to_num(a["id"])
-        dist = 20 + (n % 400)
-        time_min = int(dist * 1.8) + (n % 25)
-        routes[f"CURRENT__{a['id']}"] = {
-            "distance_km": dist,
-            "time_min": time_min,
-            "steps": [f"Drive from CURRENT location to {a['name']} in {a['city']}"]
-        }
-    # attraction -> attraction (directed)
-    for a, b in itertools.permutations(attractions, 2):
-        n = abs(id_to_num(a["id"]) - id_to_num(b["id"]))
-        dist = 8 + (n % 250)
-        time_min = int(dist * 2) + (n % 20)
-        key = f"{a['id']}{b['id']}"
-        routes[key] = {
-            "distance_km": dist,
-            "time_min": time_min,
-            "steps": [f"Drive from {a['city']} to {b['city']} (main road)", f"Arrive at {b['name']}"]
-        }
-    return routes
+def open_storage(kind: Optional[str] = None, use_snapshot: bool = True, mapped_reviews: Optional[bool] = None):
+    kind = kind or os.environ.get(STORAGE_ENV) or "json"
+    if kind == "sqlite":
+        ensure_data_dirs()
+        return SQLiteStorage()
+    if kind == "json":
+        return JsonStorage(use_snapshot, mapped_reviews)
+    raise ValueError(f"unknown storage backend {kind!r}; expected one of {STORAGE_BACKENDS}")
 
 def find_attraction(attractions: List[Dict[str, Any]], aid: str) -> Dict[str, Any]:
+    if isinstance(attractions, AttractionCatalog):
+        return attractions.get(aid)
     aid = (aid or "").strip().upper()
     for a in attractions:
         if a["id"].upper() == aid:
             return a
     return None
 
-def display_attractions_list(attractions: List[Dict[str, Any]]):
+PAGE_SIZE = 20
+SORT_KEYS = {   # sort option -> (field, key applied to that field's value)
+    "popularity": ("popularity", lambda v: -(v or 0)),
+    "name": ("name", lambda v: str(v or "").casefold()),
+    "fee": ("entry_fee_usd", lambda v: v if isinstance(v, (int, float)) and not isinstance(v, bool) else float("inf")),
+}
+
+def sort_keys(items: Sequence, by: str) -> list:
+    field, key = SORT_KEYS[by]
+    try:
+        values = [getattr(a, field) for a in items]   # slot records: no per-item method call
+    except AttributeError:
+        values = [a.get(field) for a in items]
+    return list(map(key, values))
+
+def iter_sorted(items: Sequence, by: str) -> Iterator:
+    """Yield ``items`` in ``SORT_KEYS[by]`` order without sorting all of them.
+
+    Each round selects the next top-k with ``heapq.nsmallest`` (k doubling),
+    so showing the first pages of a large catalog costs O(n log k) instead
+    of a full sort. Ties keep their original order.
+    """
+    keys = sort_keys(items, by)
+    shown, k = 0, PAGE_SIZE
+    while shown < len(keys):
+        top = heapq.nsmallest(k, range(len(keys)), key=keys.__getitem__)
+        for i in top[shown:]:
+            yield items[i]
+        shown, k = len(top), k * 2
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def show_pages(pages: Iterable[List[str]], total: int, page_size: int = PAGE_SIZE, ask: bool = True):
+    """Print one page of lines per write, asking before the next page.
+
+    ``pages`` is consumed lazily, so stopping early never builds (or reads
+    from storage) the pages that were not shown. With ``ask=False`` every
+    page is printed without a prompt in between.
+    """
+    count = max(1, -(-total // page_size))
+    for number, lines in enumerate(pages, 1):
+        sys.stdout.write("".join(line + "\n" for line in lines))
+        sys.stdout.flush()
+        if not ask:
+            continue
+        if number >= count:
+            break
+        if input(f"-- page {number}/{count} -- Enter for more, q to stop: ").strip().lower() == "q":
+            break
+
+def format_attraction_line(a: Mapping) -> str:
+    emoji = CATEGORY_EMOJIS.get(a["category"], "📍")
+    return f"{a['id']}: {emoji} {a['name']} — {a['city']} (Pop {a['popularity']})"
+
+def display_attractions_list(attractions: List[Dict[str, Any]], sort_by: Optional[str] = None,
+                             page_size: int = PAGE_SIZE, paged: bool = False):
+    """Print the list one buffered write per page; ``paged`` asks before each next page.
+
+    Only browse listings are paged; a list shown as a reference right before
+    an ID prompt prints in full, so the prompt never waits behind paging.
+    """
     print()
-    for a in attractions:
-        emoji = CATEGORY_EMOJIS.get(a["category"], "📍")
-        print(f"{a['id']}: {emoji} {a['name']} — {a['city']} (Pop {a['popularity']})")
+    items = attractions if sort_by is None else iter_sorted(attractions, sort_by)
+    show_pages(([format_attraction_line(a) for a in chunk] for chunk in chunked(items, page_size)),
+               len(attractions), page_size, ask=paged)
+    print()
+
+def review_pages(reviews, aid: str, page_size: int = PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    offset = 0
+    while True:
+        page = reviews.page(aid, offset, page_size)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+def display_reviews(reviews, aid: str, title: str, page_size: int = PAGE_SIZE):
+    st = reviews.stats(aid)
+    if not st or not st.count:
+        print("No reviews yet for this attraction.")
+        return
+    print(f"\nReviews for {title} (average {st.mean:.1f}/5 from {st.count}):")
+    show_pages(([f"- {r['author']} ({r['rating']}/5) on {r['date']}: {r['comment']}" for r in page]
+                for page in review_pages(reviews, aid, page_size)), st.count, page_size)
     print()
 
 def open_image_file(filename: str):
@@ -165,10 +2698,30 @@ def open_google_maps(origin: str, destination: str):
         print("⚠ Could not open browser:", e)
     return url
 
-def get_route(routes: Dict[str, Any], from_id: str, to_id: str) -> Dict[str, Any]:
-    key = f"{from_id.upper()}{to_id.upper()}"
-    if key in routes:
-        return routes[key]
+def get_route(routes: Mapping, from_id: str, to_id: str,
+              origin: Optional[Tuple[float, float]] = None) -> Mapping:
+    """Route between two ids (either may be CURRENT).
+
+    ``origin`` places CURRENT for this lookup only; by default it is the
+    store's origin (Kampala).
+    """
+    def current(aid: str) -> Optional[Mapping]:
+        if origin is not None and isinstance(routes, RouteStore):
+            return routes.route_from(origin, aid)
+        return routes.get(f"CURRENT__{aid}")
+
+    if to_id.upper() == "CURRENT" and from_id.upper() != "CURRENT":
+        # roads run both ways: the trip back reuses the CURRENT -> attraction figures
+        back = current(from_id.upper())
+        if back is not None:
+            return {"distance_km": back["distance_km"], "time_min": back["time_min"],
+                    "steps": [f"Drive from {from_id.upper()} back to CURRENT location"]}
+    if from_id.upper() == "CURRENT":
+        route = current(to_id.upper())
+    else:
+        route = routes.get(f"{from_id.upper()}{to_id.upper()}")
+    if route is not None:
+        return route
     # fallback dynamic
     a_num = id_to_num(from_id)
     b_num = id_to_num(to_id)
@@ -183,6 +2736,864 @@ def display_route(route: Dict[str, Any]):
         print(f"{i}. {step}")
     print()
 
+NEARBY_RADIUS_KM = 50
+NEARBY_COUNT = 5
+
+def display_nearby(found: List[Tuple[float, Mapping]]):
+    print()
+    for km, a in found:
+        emoji = CATEGORY_EMOJIS.get(a["category"], "📍")
+        print(f"{a['id']}: {emoji} {a['name']} — {a['city']} ({km:.0f} km away)")
+    print()
+
+# ------------------ Image Manifest ------------------
+IMAGE_MANIFEST_FORMAT = "image-manifest/1"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+IMAGE_SCAN_WORKERS = 8
+IMAGE_SCAN_CHUNK = 256       # files per thread-pool task
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+
+def read_image_header(path: Path) -> Dict[str, Any]:
+    """Format and pixel size read from the header only (PNG IHDR / JPEG SOF segment).
+
+    JPEG segments before the frame header are skipped with seek(), so only a
+    few hundred bytes are read even for large photos. Unknown formats give
+    ``{"format": None, ...}``.
+    """
+    meta: Dict[str, Any] = {"format": None, "width": None, "height": None}
+    with open(path, "rb") as f:
+        head = f.read(24)
+        if head[:8] == _PNG_SIGNATURE and head[12:16] == b"IHDR":
+            meta["format"] = "png"
+            meta["width"], meta["height"] = struct.unpack(">II", head[16:24])
+            return meta
+        if head[:2] != b"\xff\xd8":
+            return meta
+        meta["format"] = "jpeg"
+        f.seek(2)
+        while True:
+            byte = f.read(1)
+            while byte and byte != b"\xff":     # tolerate junk between segments
+                byte = f.read(1)
+            while byte == b"\xff":              # fill bytes
+                byte = f.read(1)
+            if not byte:
+                return meta
+            marker = byte[0]
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                continue                        # markers without a length
+            if marker in (0xD9, 0xDA):
+                return meta                     # end of image / start of scan: no frame header
+            raw = f.read(2)
+            if len(raw) < 2:
+                return meta
+            length = struct.unpack(">H", raw)[0]
+            if marker in _JPEG_SOF_MARKERS:
+                frame = f.read(5)
+                if len(frame) == 5:
+                    meta["height"], meta["width"] = struct.unpack(">HH", frame[1:5])
+                return meta
+            f.seek(length - 2, os.SEEK_CUR)
+
+class ImageManifest:
+    """Size, mtime and header metadata for every image in IMAGES_DIR.
+
+    Cached in ``.image_manifest.json``; ``refresh`` only re-reads files whose
+    size or mtime changed, spreading the header reads over a thread pool.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.entries: Dict[str, Dict[str, Any]] = dict(entries or {})
+
+    @classmethod
+    def load(cls) -> "ImageManifest":
+        try:
+            with open(IMAGE_MANIFEST_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("format") != IMAGE_MANIFEST_FORMAT:
+            return cls()
+        return cls(data.get("images"))
+
+    def save(self):
+        write_json_atomic(IMAGE_MANIFEST_FILE, {"format": IMAGE_MANIFEST_FORMAT, "images": dict(sorted(self.entries.items()))})
+
+    def refresh(self, workers: int = IMAGE_SCAN_WORKERS) -> Dict[str, int]:
+        found: Dict[str, Tuple[int, int]] = {}
+        if IMAGES_DIR.is_dir():
+            with os.scandir(IMAGES_DIR) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                        st = entry.stat()
+                        found[entry.name] = (st.st_size, st.st_mtime_ns)
+        stale = []
+        for name, (size, mtime_ns) in found.items():
+            old = self.entries.get(name)
+            if old is None or old.get("bytes") != size or old.get("mtime_ns") != mtime_ns:
+                stale.append(name)
+        removed = [name for name in self.entries if name not in found]
+        for name in removed:
+            del self.entries[name]
+
+        def scan(name: str) -> Dict[str, Any]:
+            size, mtime_ns = found[name]
+            try:
+                meta = read_image_header(IMAGES_DIR / name)
+            except OSError as e:
+                meta = {"format": None, "width": None, "height": None, "error": str(e)}
+            meta.update(bytes=size, mtime_ns=mtime_ns)
+            return meta
+
+        if len(stale) >= IMAGE_SCAN_CHUNK and workers > 1:
+            # chunks, not one future per file: per-task overhead would eat the gain
+            chunks = [stale[i:i + IMAGE_SCAN_CHUNK] for i in range(0, len(stale), IMAGE_SCAN_CHUNK)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for chunk, metas in zip(chunks, pool.map(lambda names: [scan(n) for n in names], chunks)):
+                    self.entries.update(zip(chunk, metas))
+        else:
+            for name in stale:
+                self.entries[name] = scan(name)
+        return {"images": len(found), "read": len(stale), "removed": len(removed)}
+
+    def report(self, attractions: Iterable[Mapping]) -> Dict[str, list]:
+        """Catalog images with no file, files no attraction uses, and files we couldn't parse."""
+        used: Dict[str, List[str]] = {}
+        for a in attractions:
+            if a.get("image"):
+                used.setdefault(a["image"], []).append(a["id"])
+        return {
+            "missing": [{"id": aid, "image": name} for name, aids in used.items()
+                        if name not in self.entries for aid in aids],
+            "orphaned": sorted(name for name in self.entries if name not in used),
+            "unreadable": sorted(name for name, meta in self.entries.items() if not meta.get("width")),
+        }
+
+def refresh_image_manifest(workers: int = IMAGE_SCAN_WORKERS) -> Tuple[ImageManifest, Dict[str, int]]:
+    manifest = ImageManifest.load()
+    counts = manifest.refresh(workers)
+    if counts["read"] or counts["removed"] or not IMAGE_MANIFEST_FILE.exists():
+        manifest.save()
+    return manifest, counts
+
+def image_report(attractions: Iterable[Mapping], workers: int = IMAGE_SCAN_WORKERS) -> Dict[str, Any]:
+    manifest, counts = refresh_image_manifest(workers)
+    return {"images_dir": str(IMAGES_DIR), **counts, **manifest.report(attractions)}
+
+def describe_image(filename: str) -> str:
+    if not filename:
+        return "(none)"
+    path = IMAGES_DIR / filename
+    try:
+        size = path.stat().st_size
+        meta = read_image_header(path)
+    except OSError:
+        return f"{filename} (missing)"
+    if not meta["width"]:
+        return f"{filename} ({size // 1024} KB, unrecognised format)"
+    return f"{filename} ({meta['width']}×{meta['height']} {meta['format'].upper()}, {size // 1024} KB)"
+
+# ------------------ Trip Planner ------------------
+PLAN_TIME_BUDGET_S = 0.25
+PATH_NEIGHBOURS = 8      # nearest attractions shortest_path tries as the next stop
+
+def route_cost_matrix(routes: Mapping, ids: List[str], metric: str = "distance_km") -> List[List[int]]:
+    return [[0 if a == b else get_route(routes, a, b)[metric] for b in ids] for a in ids]
+
+def _path_cost(cost: List[List[int]], path: List[int]) -> int:
+    return sum(cost[a][b] for a, b in zip(path, path[1:]))
+
+def _nearest_neighbour(cost: List[List[int]], n: int) -> List[int]:
+    path = [0]
+    left = set(range(1, n))
+    while left:
+        row = cost[path[-1]]
+        nxt = min(left, key=lambda j: (row[j], j))
+        path.append(nxt)
+        left.remove(nxt)
+    return path
+
+def _two_opt(cost: List[List[int]], path: List[int], last: int, deadline: float) -> bool:
+    # reverse path[i..j]; prefix sums of forward/backward leg costs make each
+    # candidate O(1) even when the cost matrix is not symmetric
+    n = len(path)
+    fwd = [0] * n
+    bwd = [0] * n
+    for k in range(1, n):
+        fwd[k] = fwd[k - 1] + cost[path[k - 1]][path[k]]
+        bwd[k] = bwd[k - 1] + cost[path[k]][path[k - 1]]
+    for i in range(1, last):
+        if time.perf_counter() > deadline:
+            return False
+        before = path[i - 1]
+        for j in range(i + 1, last + 1):
+            old = cost[before][path[i]] + (fwd[j] - fwd[i])
+            new = cost[before][path[j]] + (bwd[j] - bwd[i])
+            if j + 1 < n:
+                old += cost[path[j]][path[j + 1]]
+                new += cost[path[i]][path[j + 1]]
+            if new < old:
+                path[i:j + 1] = reversed(path[i:j + 1])
+                return True
+    return False
+
+def _or_opt(cost: List[List[int]], path: List[int], last: int, deadline: float) -> bool:
+    # move a run of 1-3 stops to a better place, keeping its direction
+    n = len(path)
+    for size in (1, 2, 3):
+        for i in range(1, last - size + 2):
+            if time.perf_counter() > deadline:
+                return False
+            j = i + size - 1
+            prev, first, end = path[i - 1], path[i], path[j]
+            nxt = path[j + 1] if j + 1 < n else None
+            removed = cost[prev][first] + (cost[end][nxt] - cost[prev][nxt] if nxt is not None else 0)
+            for k in range(0, last + 1):
+                if i - 1 <= k <= j:
+                    continue
+                a = path[k]
+                b = path[k + 1] if k + 1 < n else None
+                added = cost[a][first] + (cost[end][b] - cost[a][b] if b is not None else 0)
+                if added < removed:
+                    segment = path[i:j + 1]
+                    del path[i:j + 1]
+                    at = k + 1 if k < i else k + 1 - size
+                    path[at:at] = segment
+                    return True
+    return False
+
+def plan_trip(routes: Mapping, start: str, stops: List[str], metric: str = "distance_km",
+              time_budget: float = PLAN_TIME_BUDGET_S, return_to_start: bool = False) -> Dict[str, Any]:
+    """Order ``stops`` for a short trip from ``start`` (an attraction id or CURRENT).
+
+    Nearest-neighbour gives the first tour, then 2-opt and Or-opt moves improve
+    it until nothing helps or ``time_budget`` seconds have passed. The budget
+    covers the improvement passes only: the stops x stops cost matrix and the
+    first tour are always built in full before it starts.
+    """
+    start = start.upper()
+    ids = [start] + [sid for sid in dict.fromkeys(x.upper() for x in stops) if sid != start]
+    if return_to_start:
+        ids.append(start)
+    cost = route_cost_matrix(routes, ids, metric)
+    n = len(ids)
+    if return_to_start:
+        # the copy of start at the end must stay last
+        inner = len(ids) - 1
+        cost_open = [row[:inner] for row in cost[:inner]]
+        path = _nearest_neighbour(cost_open, inner) + [inner]
+        last = n - 2
+    else:
+        path = _nearest_neighbour(cost, n)
+        last = n - 1
+    deadline = time.perf_counter() + time_budget
+    improved = n > 3
+    while improved and time.perf_counter() < deadline:
+        improved = _two_opt(cost, path, last, deadline) or _or_opt(cost, path, last, deadline)
+    order = [ids[k] for k in path]
+    legs = [(a, b, get_route(routes, a, b)) for a, b in zip(order, order[1:])]
+    return {
+        "order": order,
+        "distance_km": sum(route["distance_km"] for _, _, route in legs),
+        "time_min": sum(route["time_min"] for _, _, route in legs),
+        "legs": legs,
+        "optimized_for": metric,
+    }
+
+def _leg_cost(routes: Mapping, a: str, b: str, metric: str) -> Tuple[float, int]:
+    """(cost to compare, figure to show) for one leg of a path.
+
+    Summing rounded legs lets a chain of short hops undercut the direct road,
+    so computed routes are compared before rounding.
+    """
+    shown = get_route(routes, a, b)[metric]
+    exact = None
+    if isinstance(routes, RouteStore):
+        exact = routes.exact_metric(f"CURRENT__{b}" if a == "CURRENT" else f"{a}{b}", metric)
+    return (shown if exact is None else exact), shown
+
+def shortest_path(routes: Mapping, attractions: AttractionCatalog, from_id: str, to_id: str,
+                  metric: str = "distance_km", neighbours: int = PATH_NEIGHBOURS,
+                  time_budget: float = PLAN_TIME_BUDGET_S) -> Tuple[Optional[int], List[str]]:
+    """Dijkstra from ``from_id`` to ``to_id``; a route may pass through other attractions.
+
+    From each stop only the direct road to ``to_id`` and the ``neighbours``
+    nearest attractions (spatial index) are tried, and ties go to the path
+    with fewer stops. Once ``time_budget`` seconds have passed the best path
+    found so far is returned (the direct road is always one). The total is
+    the sum of the legs as get_route shows them.
+    """
+    deadline = time.perf_counter() + time_budget
+    from_id, to_id = from_id.upper(), to_id.upper()
+    if from_id == to_id:
+        return 0, [from_id]
+    origin = getattr(routes, "origin", DEFAULT_ORIGIN)
+
+    def next_stops(node: str) -> List[str]:
+        rec = None if node == "CURRENT" else attractions.get(node)
+        point = origin if node == "CURRENT" else (coordinates(rec) if rec is not None else None)
+        found = attractions.spatial_index.nearest(*point, neighbours + 1, exclude=rec) if point else []
+        return [to_id] + [other["id"].upper() for _, other in found if other["id"].upper() != from_id]
+
+    best: Dict[str, Tuple[float, int]] = {from_id: (0.0, 0)}
+    shown: Dict[str, int] = {from_id: 0}
+    prev: Dict[str, str] = {}
+    done = set()
+    heap = [(0.0, 0, from_id)]
+    while heap:
+        d, hops, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        if node == to_id or (time.perf_counter() > deadline and to_id in best):
+            break
+        done.add(node)
+        for other in next_stops(node):
+            if other in done:
+                continue
+            cost, figure = _leg_cost(routes, node, other, metric)
+            key = (d + cost, hops + 1)
+            if key < best.get(other, (math.inf, 0)):
+                best[other] = key
+                shown[other] = shown[node] + figure
+                prev[other] = node
+                heapq.heappush(heap, (key[0], key[1], other))
+    if to_id not in best:
+        return None, []
+    path = [to_id]
+    while path[-1] != from_id:
+        path.append(prev[path[-1]])
+    return shown[to_id], path[::-1]
+
+def display_trip(plan: Dict[str, Any], attractions: AttractionCatalog):
+    print(f"\n🧭 Trip order ({len(plan['legs'])} legs, optimized for {plan['optimized_for']}):")
+    for i, (a, b, route) in enumerate(plan["legs"], start=1):
+        dest = find_attraction(attractions, b)
+        name = dest["name"] if dest else b
+        print(f"{i}. {a} -> {b} {name}: {route['distance_km']} km, {route['time_min']} min")
+    print(f"Total: {plan['distance_km']} km | {plan['time_min']} minutes\n")
+
+def plan_trip_flow(attractions: AttractionCatalog, routes: Mapping):
+    start = input("Start point (Attraction ID or CURRENT, default CURRENT): ").strip().upper() or "CURRENT"
+    if start != "CURRENT" and not find_attraction(attractions, start):
+        print("Invalid start point.")
+        return
+    raw = input("Attraction IDs to visit (comma or space separated): ").replace(",", " ").split()
+    stops = [x.upper() for x in raw]
+    bad = [x for x in stops if not find_attraction(attractions, x)]
+    if bad:
+        print("Unknown IDs:", ", ".join(bad))
+        return
+    if not stops:
+        print("No stops given.")
+        return
+    by = input("Optimize for 1. distance  2. time (default 1): ").strip()
+    metric = "time_min" if by == "2" else "distance_km"
+    back = input("Return to the start point? (y/n): ").strip().lower() == "y"
+    plan = plan_trip(routes, start, stops, metric=metric, return_to_start=back)
+    display_trip(plan, attractions)
+
+def shortest_path_flow(attractions: AttractionCatalog, routes: Mapping):
+    a1 = input("Enter FROM Attraction ID (or CURRENT): ").strip().upper()
+    a2 = input("Enter TO Attraction ID: ").strip().upper()
+    if (a1 != "CURRENT" and not find_attraction(attractions, a1)) or not find_attraction(attractions, a2):
+        print("One or both IDs invalid.")
+        return
+    total, path = shortest_path(routes, attractions, a1, a2)
+    if not path:
+        print("No path found.")
+        return
+    direct = get_route(routes, a1, a2)["distance_km"]
+    print(f"\nShortest path: {' -> '.join(path)}")
+    print(f"Total: {total} km (direct route: {direct} km)\n")
+
+def nearby_flow(attractions: AttractionCatalog):
+    place = input("Attraction ID or city to search around (default: Kampala): ").strip() or "Kampala"
+    a = find_attraction(attractions, place)
+    point = coordinates(a) if a else attractions.city_location(place)
+    if point is None:
+        print("No coordinates known for that place.")
+        return
+    try:
+        radius = float(input(f"Radius in km (default {NEARBY_RADIUS_KM}): ").strip() or NEARBY_RADIUS_KM)
+    except ValueError:
+        print("Invalid radius.")
+        return
+    found = attractions_near(attractions, *point, radius, exclude=a)
+    if not found:
+        print(f"No attractions within {radius:g} km.")
+        return
+    print(f"\n{len(found)} attraction(s) within {radius:g} km of {a['name'] if a else place}:")
+    display_nearby(found)
+
+# ------------------ Batch Mode ------------------
+BATCH_FLUSH_EVERY = 1000   # commands per write group
+
+def make_review(author: str, rating: Any, comment: str, date: Optional[str] = None) -> Dict[str, Any]:
+    if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+        raise ValueError("rating must be an integer from 1 to 5")
+    return {"author": author or "Anonymous", "rating": rating, "comment": comment or "No comment.",
+            "date": date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+def route_to_json(route: Mapping) -> Dict[str, Any]:
+    return {"distance_km": route["distance_km"], "time_min": route["time_min"], "steps": list(route.get("steps", []))}
+
+class BatchRunner:
+    """Runs JSONL commands (``{"op": "search", "q": "falls"}``) against the loaded data.
+
+    Each ``op_<name>`` method handles one command and returns its result;
+    raising ValueError/KeyError turns into an ``{"ok": false}`` line.
+    """
+
+    def __init__(self, attractions: AttractionCatalog, reviews, favorites, routes: Mapping):
+        self.attractions = attractions
+        self.reviews = reviews
+        self.favorites = favorites
+        self.routes = routes
+
+    def _attraction(self, aid: Any) -> Attraction:
+        a = find_attraction(self.attractions, str(aid or ""))
+        if not a:
+            raise KeyError(f"attraction {aid!r} not found")
+        return a
+
+    def op_find(self, cmd):
+        return self._attraction(cmd.get("aid")).to_dict()
+
+    def op_search(self, cmd):
+        return [a["id"] for a in search_attractions(self.attractions, cmd.get("q", ""), cmd.get("limit"))]
+
+    def op_filter(self, cmd):
+        open_at = cmd.get("open_at")
+        if open_at is not None:
+            open_at = parse_clock(str(open_at))
+            if open_at is None:
+                raise ValueError("open_at must be HH:MM")
+        found = filter_attractions(self.attractions, region=cmd.get("region"), category=cmd.get("category"),
+                                   min_fee=cmd.get("min_fee"), max_fee=cmd.get("max_fee"),
+                                   min_popularity=cmd.get("min_popularity"),
+                                   max_popularity=cmd.get("max_popularity"), open_at=open_at)
+        return [a["id"] for a in found[:cmd["limit"]]] if cmd.get("limit") else [a["id"] for a in found]
+
+    def op_route(self, cmd):
+        origin = str(cmd.get("from") or "CURRENT").upper()
+        if origin != "CURRENT":
+            self._attraction(origin)
+        dest = self._attraction(cmd.get("to"))["id"]
+        return route_to_json(get_route(self.routes, origin, dest))
+
+    def op_nearby(self, cmd):
+        if cmd.get("aid") is not None:
+            a = self._attraction(cmd.get("aid"))
+            if "radius_km" not in cmd:
+                found = nearest_attractions(self.attractions, a["id"], int(cmd.get("k", NEARBY_COUNT)))
+                return [{"id": rec["id"], "km": round(km, 2)} for km, rec in found]
+            point = coordinates(a)
+            if point is None:
+                raise ValueError(f"attraction {a['id']} has no coordinates")
+        else:
+            a = None
+            point = (float(cmd["lat"]), float(cmd["lon"]))
+        found = attractions_near(self.attractions, *point, float(cmd.get("radius_km", NEARBY_RADIUS_KM)),
+                                 cmd.get("k"), exclude=a)
+        return [{"id": rec["id"], "km": round(km, 2)} for km, rec in found]
+
+    def op_plan(self, cmd):
+        start = str(cmd.get("start") or "CURRENT").upper()
+        stops = [self._attraction(x)["id"] for x in cmd.get("stops", [])]
+        plan = plan_trip(self.routes, start, stops, metric=cmd.get("metric", "distance_km"),
+                         return_to_start=bool(cmd.get("return_to_start")))
+        return {k: plan[k] for k in ("order", "distance_km", "time_min", "optimized_for")}
+
+    def op_reviews(self, cmd):
+        aid = self._attraction(cmd.get("aid"))["id"]
+        st = self.reviews.stats(aid)
+        offset, limit = int(cmd.get("offset", 0)), cmd.get("limit")
+        rows = self.reviews.page(aid, offset, int(limit)) if limit is not None else self.reviews.get(aid, [])[offset:]
+        return {"reviews": rows, "count": st.count if st else 0,
+                "mean": round(st.mean, 3) if st else None}
+
+    def op_add_review(self, cmd):
+        aid = self._attraction(cmd.get("aid"))["id"]
+        entry = make_review(cmd.get("author"), cmd.get("rating", 5), cmd.get("comment"), cmd.get("date"))
+        self.reviews.add(aid, entry)
+        return entry
+
+    def op_top_rated(self, cmd):
+        best = top_rated(self.attractions, self.reviews, k=cmd.get("k", 10), region=cmd.get("region"),
+                         category=cmd.get("category"), by=cmd.get("by", "rating"))
+        return [{"id": a["id"], "score": round(score, 3), "reviews": st.count if st else 0} for a, st, score in best]
+
+    def op_favorites(self, cmd):
+        return self.favorites.get(cmd.get("user") or DEFAULT_USER)
+
+    def op_add_favorite(self, cmd):
+        return self.favorites.add(cmd.get("user") or DEFAULT_USER, self._attraction(cmd.get("aid"))["id"])
+
+    def op_remove_favorite(self, cmd):
+        return self.favorites.remove(cmd.get("user") or DEFAULT_USER, str(cmd.get("aid") or "").upper())
+
+    def op_most_favorited(self, cmd):
+        return [{"id": aid, "count": count} for aid, count in self.favorites.most_favorited(int(cmd.get("k", 10)))]
+
+    def op_image_report(self, cmd):
+        return image_report(self.attractions)
+
+    def run_one(self, line: str, lineno: int) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"line": lineno}
+        try:
+            cmd = json.loads(line)
+            if not isinstance(cmd, dict):
+                raise ValueError("command must be a JSON object")
+            if "tag" in cmd:
+                out["tag"] = cmd["tag"]
+            out["op"] = op = cmd.get("op")
+            handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+            if handler is None:
+                raise ValueError(f"unknown op {op!r}")
+            out["result"] = handler(cmd)
+            out["ok"] = True
+        except (ValueError, KeyError, TypeError) as e:
+            out["ok"] = False
+            out["error"] = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+        return out
+
+    def run(self, lines: Iterable[str], out, flush_every: int = BATCH_FLUSH_EVERY) -> Dict[str, int]:
+        """Stream results to ``out``; writes are flushed once per ``flush_every`` commands."""
+        totals = {"commands": 0, "errors": 0}
+        numbered = ((n, line) for n, line in enumerate(lines, 1) if line.strip())
+        while True:
+            chunk = list(itertools.islice(numbered, flush_every))
+            if not chunk:
+                break
+            with ExitStack() as stack:
+                stack.enter_context(self.reviews.batch())
+                stack.enter_context(self.favorites.batch())
+                results = [self.run_one(line, n) for n, line in chunk]
+            # results go out only after their writes are on disk
+            out.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results))
+            out.flush()
+            totals["commands"] += len(results)
+            totals["errors"] += sum(1 for r in results if not r["ok"])
+        return totals
+
+def run_batch(storage, source: str = "-", dest: Optional[str] = None, flush_every: int = BATCH_FLUSH_EVERY) -> Dict[str, int]:
+    attractions, reviews, favorites, routes = storage.load()
+    runner = BatchRunner(attractions, reviews, favorites, routes)
+    src = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    out = sys.stdout if not dest or dest == "-" else open(dest, "w", encoding="utf-8")
+    try:
+        return runner.run(src, out, flush_every)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+        reviews.close()
+        favorites.close()
+
+# ------------------ HTTP API ------------------
+SERVER_ADDRESS = "127.0.0.1:8080"
+SERVER_FLUSH_INTERVAL = 0.5      # seconds between background flushes of review/favorite writes
+SERVER_IDLE_TIMEOUT = 60         # seconds a keep-alive connection may sit idle
+SERVER_MAX_BODY = 64 * 1024
+SERVER_CACHE_ENTRIES = 10000     # cached GET responses; the cache is dropped on every write
+SERVER_BACKLOG = 4096
+SERVER_MAX_LIMIT = 1000          # largest page a listing endpoint returns
+QUERY_FLOATS = ("min_fee", "max_fee", "min_popularity", "max_popularity", "lat", "lon", "radius_km")
+QUERY_INTS = ("offset", "limit", "k")
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def query_args(query: str) -> Dict[str, Any]:
+    args: Dict[str, Any] = {k: v[-1] for k, v in parse_qs(query).items()}
+    for key in QUERY_FLOATS:
+        if key in args:
+            args[key] = float(args[key])
+    for key in QUERY_INTS:
+        if key in args:
+            args[key] = int(args[key])
+    return args
+
+class ApiServer:
+    """JSON over HTTP/1.1 (keep-alive) for a booking frontend, on asyncio streams.
+
+    Requests are answered from the data loaded at startup through the same
+    ``op_*`` handlers as --batch. GET responses carry an ETag and are cached
+    per URL until the next write. On the JSON files the first write after a
+    flush opens a batch() that a background task closes, in a worker thread,
+    within ``flush_interval`` seconds, so a burst of writes costs one disk
+    write. On SQLite each write commits on its own in a worker thread, since
+    a batch would keep the database locked for other processes; reads use
+    their own connection, so a write waiting for the lock never holds them up.
+
+        GET    /attractions?region=&category=&min_fee=&...&sort=&offset=&limit=
+        GET    /attractions/{id}
+        GET    /attractions/{id}/reviews?offset=&limit=
+        POST   /attractions/{id}/reviews        {"author", "rating", "comment"}
+        GET    /search?q=&limit=
+        GET    /regions, /categories
+        GET    /routes?from=&to=                (from defaults to CURRENT)
+        GET    /top_rated?k=&region=&category=&by=
+        GET    /users/{user}/favorites
+        POST   /users/{user}/favorites          {"aid"}
+        DELETE /users/{user}/favorites/{id}
+    """
+
+    def __init__(self, attractions: AttractionCatalog, reviews, favorites, routes: Mapping,
+                 flush_interval: float = SERVER_FLUSH_INTERVAL):
+        self.runner = BatchRunner(attractions, reviews, favorites, routes)
+        self.attractions = attractions
+        self.flush_interval = flush_interval
+        self._cache: Dict[str, Tuple[str, bytes]] = {}
+        self._cache_lock = threading.Lock()   # SQLite writes finish in worker threads
+        self._generation = 0                  # writes so far; a GET started before one is not cached
+        self.batched = not isinstance(reviews, SQLiteReviewStore)
+        self._batches: Optional[ExitStack] = None        # open while writes are waiting for a flush
+        self._flush_lock = asyncio.Lock()    # held by a flush until its batch is closed
+        self._flushing: Optional[asyncio.Future] = None  # that close, running in a worker thread
+
+    # ---- writes ----
+    async def _answer(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        if method in ("GET", "HEAD"):
+            return self.respond(method, target, headers, body)
+        if not self.batched:
+            return await asyncio.get_running_loop().run_in_executor(None, self.respond, method, target, headers, body)
+        # the batch being written must be closed before the next one opens
+        async with self._flush_lock:
+            await self._flushed()
+            if self._batches is None:
+                self._batches = ExitStack()
+                self._batches.enter_context(self.runner.reviews.batch())
+                self._batches.enter_context(self.runner.favorites.batch())
+            return self.respond(method, target, headers, body)
+
+    async def _flushed(self):
+        # a flush cancelled at shutdown leaves its close running in the worker thread
+        flushing, self._flushing = self._flushing, None
+        if flushing is not None:
+            await asyncio.wait({flushing})
+
+    async def flush(self):
+        """Write everything added since the last flush, off the event loop."""
+        async with self._flush_lock:
+            await self._flushed()
+            batches, self._batches = self._batches, None
+            if batches is None:
+                return
+            self._flushing = asyncio.get_running_loop().run_in_executor(None, batches.close)
+            await asyncio.shield(self._flushing)   # if cancelled, the next flush or write waits for it
+            self._flushing = None
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    # ---- routing ----
+    def dispatch(self, method: str, parts: List[str], args: Dict[str, Any], body: bytes) -> Tuple[int, Any]:
+        runner = self.runner
+        head = parts[0] if parts else ""
+        if head == "attractions" and len(parts) == 1:
+            self._allow(method, "GET")
+            return 200, self._listing(args)
+        if head == "attractions" and len(parts) == 2:
+            self._allow(method, "GET")
+            return 200, runner.op_find({"aid": parts[1]})
+        if head == "attractions" and len(parts) == 3 and parts[2] == "reviews":
+            if self._allow(method, "GET", "POST") == "POST":
+                return 201, runner.op_add_review({**self._json(body), "aid": parts[1]})
+            return 200, runner.op_reviews({**args, "limit": self._limit(args), "aid": parts[1]})
+        if head == "search" and len(parts) == 1:
+            self._allow(method, "GET")
+            found = search_attractions(self.attractions, args.get("q", ""), self._limit(args))
+            return 200, [a.to_dict() for a in found]
+        if head in ("regions", "categories") and len(parts) == 1:
+            self._allow(method, "GET")
+            return 200, self.attractions.regions() if head == "regions" else self.attractions.categories()
+        if head == "routes" and len(parts) == 1:
+            self._allow(method, "GET")
+            return 200, runner.op_route(args)
+        if head == "top_rated" and len(parts) == 1:
+            self._allow(method, "GET")
+            return 200, runner.op_top_rated(args)
+        if head == "users" and len(parts) >= 3 and parts[2] == "favorites":
+            user = parts[1]
+            if len(parts) == 3:
+                if self._allow(method, "GET", "POST") == "POST":
+                    added = runner.op_add_favorite({**self._json(body), "user": user})
+                    return (201 if added else 200), {"added": added}
+                return 200, runner.op_favorites({"user": user})
+            if len(parts) == 4:
+                self._allow(method, "DELETE")
+                removed = runner.op_remove_favorite({"user": user, "aid": parts[3]})
+                if not removed:
+                    raise KeyError(f"{parts[3]} is not among {user}'s favorites")
+                return 200, {"removed": True}
+        raise ApiError(404, "no such endpoint")
+
+    @staticmethod
+    def _allow(method: str, *allowed: str) -> str:
+        if method not in allowed:
+            raise ApiError(405, f"use {' or '.join(allowed)}")
+        return method
+
+    @staticmethod
+    def _json(body: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(body or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("request body must be JSON")
+        if not isinstance(data, dict):
+            raise ValueError("request body must be a JSON object")
+        return data
+
+    @staticmethod
+    def _limit(args: Dict[str, Any]) -> int:
+        return max(0, min(args.get("limit", PAGE_SIZE), SERVER_MAX_LIMIT))
+
+    def _listing(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        facets = {k: args.get(k) for k in ("region", "category", "min_fee", "max_fee", "min_popularity", "max_popularity")}
+        if args.get("open_at") is not None:
+            facets["open_at"] = parse_clock(args["open_at"])
+            if facets["open_at"] is None:
+                raise ValueError("open_at must be HH:MM")
+        found = filter_attractions(self.attractions, **facets)
+        offset, limit = max(0, args.get("offset", 0)), self._limit(args)
+        by = args.get("sort")
+        if by is not None and by not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        ordered = iter_sorted(found, by) if by else iter(found)
+        items = [a.to_dict() for a in itertools.islice(ordered, offset, offset + limit)]
+        return {"total": len(found), "offset": offset, "items": items}
+
+    def respond(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes, Optional[str]]:
+        """Status, body and ETag for one request."""
+        if method in ("GET", "HEAD"):
+            cached = self._cache.get(target)
+            if cached is not None:
+                etag, payload = cached
+                return (304, b"", etag) if headers.get("if-none-match") == etag else (200, payload, etag)
+        generation = self._generation
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        try:
+            status, result = self.dispatch("GET" if method == "HEAD" else method, parts, query_args(url.query), body)
+        except ApiError as e:
+            return e.status, json.dumps({"error": str(e)}).encode(), None
+        except KeyError as e:
+            return 404, json.dumps({"error": e.args[0] if e.args else "not found"}, ensure_ascii=False).encode(), None
+        except (ValueError, TypeError) as e:
+            return 400, json.dumps({"error": str(e)}, ensure_ascii=False).encode(), None
+        payload = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        if method not in ("GET", "HEAD"):
+            with self._cache_lock:
+                self._generation += 1
+                self._cache.clear()
+            return status, payload, None
+        etag = f'"{len(payload):x}-{zlib.crc32(payload):08x}"'
+        with self._cache_lock:
+            if generation == self._generation:
+                if len(self._cache) >= SERVER_CACHE_ENTRIES:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[target] = (etag, payload)
+        if headers.get("if-none-match") == etag:
+            return 304, b"", etag
+        return status, payload, etag
+
+    # ---- connections ----
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), SERVER_IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    self._write(writer, 400, b'{"error": "bad request line"}', None, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= SERVER_MAX_BODY:
+                    self._write(writer, 413 if length > 0 else 400, b'{"error": "bad content length"}', None, False)
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                status, payload, etag = await self._answer(method.upper(), target, headers, body)
+                self._write(writer, status, b"" if method.upper() == "HEAD" else payload, etag, keep_alive,
+                            len(payload))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write(writer, status: int, payload: bytes, etag: Optional[str], keep_alive: bool,
+               length: Optional[int] = None):
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(payload) if length is None else length}",
+                "Connection: " + ("keep-alive" if keep_alive else "close")]
+        if etag:
+            head += [f"ETag: {etag}", "Cache-Control: no-cache"]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port, backlog=SERVER_BACKLOG)
+        flusher = asyncio.create_task(self._flush_loop())
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass   # e.g. Windows: Ctrl+C still ends asyncio.run()
+        print(f"🌐 Serving on http://{host}:{port} (Ctrl+C to stop)", file=sys.stderr)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            flusher.cancel()
+            await self.flush()
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    try:
+        return host or "127.0.0.1", int(port)
+    except ValueError:
+        raise ValueError(f"expected HOST:PORT, got {address!r}")
+
+def run_server(storage, address: str = SERVER_ADDRESS, flush_interval: float = SERVER_FLUSH_INTERVAL):
+    host, port = parse_address(address)
+    attractions, reviews, favorites, routes = storage.load()
+    try:
+        asyncio.run(ApiServer(attractions, reviews, favorites, routes, flush_interval).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reviews.close()
+        favorites.close()
+
 # ------------------ UI / Menus ------------------
 def print_welcome():
     print("\n🌍" + "="*60)
@@ -206,32 +3617,101 @@ def sub_menu_view(attractions):
     print("2. View by Region")
     print("3. View by Category")
     print("4. View single attraction (details + open image / map)")
+    print("5. Top rated")
+    print("6. Combined filter (region, category, fee, popularity, opening hours)")
     print("0. Back")
     return input("Choose: ").strip()
 
-def choose_region(attractions):
-    regions = sorted({a["region"] for a in attractions})
+def choose_region(attractions: AttractionCatalog):
+    regions = attractions.regions()
     for i, r in enumerate(regions, 1):
         print(f"{i}. {r}")
     try:
         idx = int(input("Choose region number: ").strip())
-        return [a for a in attractions if a["region"] == regions[idx-1]]
+        if idx < 1:
+            raise IndexError(idx)
+        return attractions.by_region(regions[idx-1])
     except Exception:
         print("Invalid choice.")
         return []
 
-def choose_category(attractions):
-    cats = sorted({a["category"] for a in attractions})
+def choose_category(attractions: AttractionCatalog):
+    cats = attractions.categories()
     for i, c in enumerate(cats, 1):
         print(f"{i}. {c}")
     try:
         idx = int(input("Choose category number: ").strip())
-        return [a for a in attractions if a["category"] == cats[idx-1]]
+        if idx < 1:
+            raise IndexError(idx)
+        return attractions.by_category(cats[idx-1])
     except Exception:
         print("Invalid choice.")
         return []
 
-def attraction_details_flow(attractions, reviews, favorites, routes):
+def pick_from(options: List[str], label: str) -> Optional[str]:
+    for i, opt in enumerate(options, 1):
+        print(f"{i}. {opt}")
+    raw = input(f"Choose {label} number (Enter for any): ").strip()
+    if not raw:
+        return None
+    try:
+        idx = int(raw)
+        if idx < 1:
+            raise IndexError(idx)
+        return options[idx-1]
+    except Exception:
+        print("Invalid choice; using any.")
+        return None
+
+def ask_number(prompt: str) -> Optional[float]:
+    raw = input(prompt).strip()
+    if not raw:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        print("Not a number; ignoring.")
+        return None
+
+def filter_flow(attractions: AttractionCatalog) -> List[Attraction]:
+    print("Combine any of these filters (press Enter to skip one).")
+    region = pick_from(attractions.regions(), "region")
+    category = pick_from(attractions.categories(), "category")
+    max_fee = ask_number("Maximum entry fee in USD: ")
+    min_popularity = ask_number("Minimum popularity (0-10): ")
+    when = input("Open at HH:MM ('now' for the current time): ").strip().lower()
+    open_at = None
+    if when == "now":
+        now = datetime.now()
+        open_at = now.hour * 60 + now.minute
+    elif when:
+        open_at = parse_clock(when)
+        if open_at is None:
+            print("Invalid time; ignoring.")
+    found = filter_attractions(attractions, region=region, category=category, max_fee=max_fee,
+                               min_popularity=min_popularity, open_at=open_at)
+    if not found:
+        print("No attractions match those filters.")
+    else:
+        print(f"\n{len(found)} attraction(s) match:")
+    return found
+
+def top_rated_flow(attractions: AttractionCatalog, reviews: ReviewStore):
+    print("Rank by: 1. Rating  2. Popularity  3. Blend of both")
+    by = {"1": "rating", "2": "popularity", "3": "blend"}.get(input("Choose (default 1): ").strip(), "rating")
+    region = pick_from(attractions.regions(), "region")
+    category = pick_from(attractions.categories(), "category")
+    best = top_rated(attractions, reviews, k=10, region=region, category=category, by=by)
+    if not best:
+        print("No attractions with reviews match that filter.")
+        return
+    print(f"\n🏆 Top {len(best)} by {by}:")
+    for i, (a, st, score) in enumerate(best, 1):
+        rating = f"{st.mean:.1f}/5 ({st.count})" if st and st.count else "no reviews"
+        print(f"{i}. {a['id']}: {a['name']} — {rating}, Pop {a['popularity']} [score {score:.2f}]")
+    print()
+
+def attraction_details_flow(attractions, reviews, favorites, routes, user=DEFAULT_USER):
     aid = input("Enter Attraction ID (e.g. A001) for details (or press Enter to cancel): ").strip().upper()
     if not aid:
         return
@@ -244,9 +3724,15 @@ def attraction_details_flow(attractions, reviews, favorites, routes):
     print(f"{emoji} {a['id']}: {a['name']} ({a['category']}, {a['region']})")
     print(f"📍 Location: {a['city']}")
     print(f"⭐ Popularity: {a['popularity']}/10")
+    st = reviews.stats(a["id"])
+    if st and st.count:
+        print(f"💬 Rating: {st.mean:.1f}/5 from {st.count} review(s), latest {st.latest}")
+    fans = favorites.count(a["id"])
+    if fans:
+        print(f"❤ Favorited by {fans} traveller(s)")
     print(f"🕒 Opening Hours: {a['opening_hours']} | 💵 Fee: ${a['entry_fee_usd']}")
     print(f"ℹ {a['description']}")
-    print(f"🖼 Image file: {a.get('image','(none)')}")
+    print(f"🖼 Image file: {describe_image(a.get('image', ''))}")
     print("-"*50 + "\n")
 
     while True:
@@ -256,6 +3742,7 @@ def attraction_details_flow(attractions, reviews, favorites, routes):
         print("3. View reviews for this attraction")
         print("4. Add to favorites")
         print("5. Add a review now")
+        print("6. Nearby attractions")
         print("0. Back")
         opt = input("Choose option: ").strip()
         if opt == "1":
@@ -267,26 +3754,21 @@ def attraction_details_flow(attractions, reviews, favorites, routes):
             url = open_google_maps(origin, a["city"])
             print("If browser didn't open, use this link:", url)
         elif opt == "3":
-            rvs = reviews.get(aid, [])
-            if not rvs:
-                print("No reviews yet for this attraction.")
-            else:
-                print(f"\nReviews for {a['name']}:")
-                for rev in rvs:
-                    print(f"- {rev['author']} ({rev['rating']}/5) on {rev['date']}: {rev['comment']}")
-                print()
+            display_reviews(reviews, aid, a["name"])
         elif opt == "4":
-            user = "default_user"
-            favs = favorites.setdefault(user, [])
-            if aid in favs:
-                print("Already in favorites.")
-            else:
-                favs.append(aid)
-                save_json(FAVORITES_FILE, favorites)
+            if favorites.add(user, a["id"]):
                 print("⭐ Added to favorites.")
+            else:
+                print("Already in favorites.")
         elif opt == "5":
             add_review_flow(reviews, aid)
-            save_json(REVIEWS_FILE, reviews)
+        elif opt == "6":
+            found = nearest_attractions(attractions, aid, NEARBY_COUNT)
+            if not found:
+                print("No coordinates for this attraction.")
+            else:
+                print(f"\nClosest to {a['name']}:")
+                display_nearby(found)
         elif opt == "0":
             break
         else:
@@ -311,14 +3793,38 @@ def add_review_flow(reviews, aid_hint=None):
         except Exception:
             print("Please enter a valid integer rating from 1 to 5.")
     comment = input("Comment: ").strip() or "No comment."
-    entry = {"author": author, "rating": rating, "comment": comment, "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-    reviews.setdefault(aid, []).append(entry)
-    save_json(REVIEWS_FILE, reviews)
+    reviews.add(aid, make_review(author, rating, comment))
     print("✅ Review saved. Thanks!")
 
-def favorites_flow(attractions, favorites):
-    user = "default_user"
-    favs = favorites.get(user, [])
+def search_flow(attractions, reviews, favorites, routes, user=DEFAULT_USER):
+    q = input("Enter search keyword (name, city, description): ").strip().lower()
+    if not q:
+        print("Empty search; returning.")
+        return
+    results = search_attractions(attractions, q)
+    if results:
+        print(f"\nFound {len(results)} result(s):")
+        display_attractions_list(results)
+        open_details = input("Open details for any result? Enter ID or press Enter: ").strip().upper()
+        if open_details:
+            attraction_details_flow(attractions, reviews, favorites, routes, user)
+    else:
+        print("No attractions matched your search.")
+
+def display_most_favorited(attractions, favorites, k=10):
+    ranked = favorites.most_favorited(k)
+    if not ranked:
+        print("Nobody has favorited an attraction yet.")
+        return
+    print("\n❤ Most favorited:")
+    for aid, count in ranked:
+        a = find_attraction(attractions, aid)
+        name = f"{a['name']} ({a['city']})" if a else "(missing in attractions list)"
+        print(f"- {aid}: {name} — {count} traveller(s)")
+    print()
+
+def favorites_flow(attractions, reviews, favorites, routes, user=DEFAULT_USER):
+    favs = favorites.get(user)
     if not favs:
         print("You have no favorites yet. Use the attraction details to add favorites.")
         should_add = input("Would you like to add one now? (y/n): ").strip().lower()
@@ -326,8 +3832,7 @@ def favorites_flow(attractions, favorites):
             display_attractions_list(attractions)
             fid = input("Enter Attraction ID to add to favorites: ").strip().upper()
             if find_attraction(attractions, fid):
-                favorites.setdefault(user, []).append(fid)
-                save_json(FAVORITES_FILE, favorites)
+                favorites.add(user, fid)
                 print("⭐ Added to favorites.")
             else:
                 print("Invalid ID.")
@@ -340,13 +3845,11 @@ def favorites_flow(attractions, favorites):
         else:
             print(f"- {fid} (missing in attractions list)")
     print()
-    print("Options: 1. Remove a favorite  2. View favorite details  0. Back")
+    print("Options: 1. Remove a favorite  2. View favorite details  3. Most favorited  0. Back")
     opt = input("Choose: ").strip()
     if opt == "1":
         rid = input("Enter Attraction ID to remove: ").strip().upper()
-        if rid in favorites.get(user, []):
-            favorites[user].remove(rid)
-            save_json(FAVORITES_FILE, favorites)
+        if favorites.remove(user, rid):
             print("Removed.")
         else:
             print("ID not in favorites.")
@@ -357,67 +3860,269 @@ def favorites_flow(attractions, favorites):
             print()
             print(f"{a['id']}: {a['name']} — {a['city']}")
             print("Opening image and Google Maps as options (use the details flow to interact).")
-            attraction_details_flow(attractions, reviews, favorites, {})  # reuse details flow (reviews & favorites persisted)
+            attraction_details_flow(attractions, reviews, favorites, routes, user)  # reuse details flow (reviews & favorites persisted)
         else:
             print("Attraction not found.")
+    elif opt == "3":
+        display_most_favorited(attractions, favorites)
 
-# ------------------ Main Application ------------------
-def main():
-    ensure_data_dirs()
-    attractions = load_or_init_json(ATTRACTIONS_FILE, DEFAULT_ATTRACTIONS)
-    reviews = load_or_init_json(REVIEWS_FILE, {})
-    favorites = load_or_init_json(FAVORITES_FILE, {})
-    # generate routes.json with deterministic pseudo-routes if missing
-    default_routes = generate_default_routes(attractions)
-    routes = load_or_init_json(ROUTES_FILE, default_routes)
+# ------------------ Profiling ------------------
+PROFILE_ENV = "WELCOME_UGANDA_PROFILE"   # "1" (report in data/profile.json) or a report path
+PROFILE_BUCKETS_PER_OCTAVE = 8           # latency histogram resolution, ~9% per bucket
+# module functions (or Class.method) wrapped while profiling is on; only non-interactive ones,
+# since the menu flows block on input() and that wait would be timed as latency
+PROFILED_FUNCTIONS = (
+    "load_or_init_json", "save_json", "write_json_atomic", "load_snapshot", "save_snapshot",
+    "load_attractions", "ReviewStore.load", "FavoritesStore.load", "ReviewStore.add", "ReviewStore.flush", "load_app_data",
+    "generate_default_routes", "get_route", "find_attraction", "search_attractions",
+)
+# data files each wrapped function reads or writes: path global (None = first argument)
+# and "read", "write" (whole file) or "append" (growth of the file)
+PROFILED_FILE_IO = {
+    "load_or_init_json": (None, "read"),
+    "save_json": (None, "write"),
+    "write_json_atomic": (None, "write"),
+    "load_snapshot": ("SNAPSHOT_FILE", "read"),
+    "save_snapshot": ("SNAPSHOT_FILE", "write"),
+    "load_attractions": ("ATTRACTIONS_FILE", "read"),
+    "ReviewStore.load": ("REVIEWS_FILE", "read"),
+    "FavoritesStore.load": ("FAVORITES_DIR", "read"),
+    "ReviewStore.flush": ("REVIEW_LOG_FILE", "append"),
+}
 
-    print_welcome()
+def data_size(path: Path) -> int:
+    """Size of a data file, or of the files directly inside a data directory."""
+    try:
+        if path.is_dir():
+            return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+class LatencyHistogram:
+    """Log-bucketed call latencies; memory stays constant however many calls."""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        b = math.floor(math.log2(max(seconds, 1e-9)) * PROFILE_BUCKETS_PER_OCTAVE)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        rank = max(1, math.ceil(self.count * q))
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                # geometric middle of the bucket, never above the slowest call seen
+                return min(2 ** ((b + 0.5) / PROFILE_BUCKETS_PER_OCTAVE), self.max)
+        return self.max
+
+    def to_json(self) -> Dict[str, Any]:
+        ms = lambda seconds: round(seconds * 1000, 4)
+        return {
+            "calls": self.count,
+            "total_ms": ms(self.total),
+            "mean_ms": ms(self.total / self.count) if self.count else 0,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max),
+        }
+
+class Profiler:
+    """Wraps ``PROFILED_FUNCTIONS`` in place and writes a JSON report at exit.
+
+    Nothing is patched unless profiling was asked for, so a normal run pays
+    no overhead at all. Optionally also runs cProfile over the whole session.
+    """
+
+    def __init__(self, report_path: Path, cprofile_path: Optional[str] = None):
+        self.report_path = Path(report_path)
+        self.cprofile_path = cprofile_path
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.files: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()     # the review compactor writes from its own thread
+        self._patched: List[Tuple[Any, str, Any]] = []
+        self._cprofile = None
+        self._started = time.time()
+        self._stopped = False
+
+    def start(self):
+        module = sys.modules[__name__]
+        for name in PROFILED_FUNCTIONS:
+            owner, _, attr = name.rpartition(".")
+            target = getattr(module, owner) if owner else module
+            original = target.__dict__[attr]
+            self._patched.append((target, attr, original))
+            setattr(target, attr, self._wrap(name, original))
+        if self.cprofile_path:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        atexit.register(self.stop)
+        return self
 
+    def _wrap(self, name: str, fn):
+        io = PROFILED_FILE_IO.get(name)
+        method = isinstance(fn, classmethod)
+        func = fn.__func__ if method else fn
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            path = None
+            if io:
+                path = Path(globals()[io[0]] if io[0] else args[0])
+                before = data_size(path) if io[1] == "append" else 0
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                with self._lock:
+                    self.latency.setdefault(name, LatencyHistogram()).add(elapsed)
+                    if path is not None:
+                        self._count_bytes(path, io[1], data_size(path) - before)
+        return classmethod(wrapper) if method else wrapper
+
+    def _count_bytes(self, path: Path, kind: str, size: int):
+        if kind == "append" and size <= 0:
+            return   # nothing was pending
+        try:
+            parts = path.relative_to(DATA_DIR).parts
+        except ValueError:
+            parts = (str(path),)
+        # shard files are summed up under their directory, e.g. "favorites/"
+        key = parts[0] + "/" if len(parts) > 1 or path.is_dir() else parts[0]
+        entry = self.files.setdefault(key, {"reads": 0, "bytes_read": 0, "writes": 0, "bytes_written": 0})
+        if kind == "read":
+            entry["reads"] += 1
+            entry["bytes_read"] += size
+        else:
+            entry["writes"] += 1
+            entry["bytes_written"] += max(size, 0)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": datetime.fromtimestamp(self._started).isoformat(timespec="seconds"),
+                "elapsed_s": round(time.time() - self._started, 3),
+                "argv": sys.argv[1:],
+                "functions": {name: h.to_json() for name, h in sorted(self.latency.items())},
+                "files": dict(sorted(self.files.items())),
+                "cprofile": self.cprofile_path,
+            }
+
+    def stop(self):
+        """Restore the original functions and write the report (and cProfile stats)."""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+        for target, attr, original in reversed(self._patched):
+            setattr(target, attr, original)
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.report_path, self.report())
+        print(f"📊 Profile written to {self.report_path}", file=sys.stderr)
+
+def start_profiling(report: Optional[str] = None, cprofile_path: Optional[str] = None) -> Optional[Profiler]:
+    """Turn instrumentation on when asked for by flag or ``$WELCOME_UGANDA_PROFILE``."""
+    env = os.environ.get(PROFILE_ENV, "")
+    if report is None and env not in ("", "0"):
+        report = "" if env.lower() in ("1", "true", "yes") else env
+    if report is None and not cprofile_path:
+        return None
+    return Profiler(Path(report) if report else PROFILE_FILE, cprofile_path).start()
+
+# ------------------ Main Application ------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Welcome Uganda! -- terminal travel guide")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="directory holding the JSON data files")
+    parser.add_argument("--no-snapshot", action="store_true", help="always parse the JSON files at startup")
+    parser.add_argument("--mmap-reviews", action="store_true",
+                        help="memory-map reviews.json and read one attraction's reviews at a time "
+                             f"(automatic from {REVIEWS_MMAP_BYTES >> 20} MB)")
+    parser.add_argument("--measure-startup", action="store_true", help="print cold vs warm startup timings and exit")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default=None,
+                        help=f"storage backend (default: ${STORAGE_ENV} or json)")
+    parser.add_argument("--migrate-to-sqlite", action="store_true",
+                        help="copy the JSON data files into the SQLite database and exit")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="run JSONL commands from FILE (or stdin) without prompts and print JSONL results")
+    parser.add_argument("--check-routes", action="store_true",
+                        help="compare the routes with a full rebuild, print the result as JSON and exit")
+    parser.add_argument("--image-report", action="store_true",
+                        help="scan data/images, print missing/orphaned images as JSON and exit")
+    parser.add_argument("--user", default=DEFAULT_USER, help="whose favorites the menus read and change")
+    parser.add_argument("--output", metavar="FILE", help="write --batch results to FILE instead of stdout")
+    parser.add_argument("--batch-size", type=int, default=BATCH_FLUSH_EVERY,
+                        help="commands per write flush in --batch mode")
+    parser.add_argument("--serve", nargs="?", const=SERVER_ADDRESS, metavar="HOST:PORT",
+                        help=f"serve the JSON HTTP API instead of the menus (default {SERVER_ADDRESS})")
+    parser.add_argument("--flush-interval", type=float, default=SERVER_FLUSH_INTERVAL,
+                        help="seconds between review/favorite disk flushes in --serve mode")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help=f"record call counts, latencies and file I/O; write a JSON report at exit "
+                             f"(default data/profile.json, or set ${PROFILE_ENV})")
+    parser.add_argument("--cprofile", metavar="FILE", help="also write cProfile stats for the session to FILE")
+    return parser.parse_args(argv)
+
+def run_menus(attractions, reviews, favorites, routes, user=DEFAULT_USER):
     while True:
         choice = main_menu()
         if choice == "1":
             while True:
                 sub = sub_menu_view(attractions)
                 if sub == "1":
-                    display_attractions_list(attractions)
+                    order = input("Sort by: 1. Catalog order  2. Popularity  3. Name  4. Fee (default 1): ").strip()
+                    display_attractions_list(attractions, sort_by={"2": "popularity", "3": "name", "4": "fee"}.get(order), paged=True)
                     # quick details prompt
                     sel = input("Enter Attraction ID for details (or Enter to go back): ").strip().upper()
                     if sel:
-                        attraction_details_flow(attractions, reviews, favorites, routes)
+                        attraction_details_flow(attractions, reviews, favorites, routes, user)
                 elif sub == "2":
                     subset = choose_region(attractions)
                     if subset:
-                        display_attractions_list(subset)
+                        display_attractions_list(subset, paged=True)
                         _ = input("Press Enter to continue...")
                 elif sub == "3":
                     subset = choose_category(attractions)
                     if subset:
-                        display_attractions_list(subset)
+                        display_attractions_list(subset, paged=True)
                         _ = input("Press Enter to continue...")
                 elif sub == "4":
-                    attraction_details_flow(attractions, reviews, favorites, routes)
+                    attraction_details_flow(attractions, reviews, favorites, routes, user)
+                elif sub == "5":
+                    top_rated_flow(attractions, reviews)
+                elif sub == "6":
+                    subset = filter_flow(attractions)
+                    if subset:
+                        display_attractions_list(subset, paged=True)
+                        _ = input("Press Enter to continue...")
                 elif sub == "0":
                     break
                 else:
                     print("Invalid choice.")
         elif choice == "2":
-            q = input("Enter search keyword (name, city, description): ").strip().lower()
-            if not q:
-                print("Empty search; returning.")
-                continue
-            results = [a for a in attractions if q in a["name"].lower() or q in a["city"].lower() or q in a["description"].lower()]
-            if results:
-                print(f"\nFound {len(results)} result(s):")
-                display_attractions_list(results)
-                open_details = input("Open details for any result? Enter ID or press Enter: ").strip().upper()
-                if open_details:
-                    attraction_details_flow(attractions, reviews, favorites, routes)
-            else:
-                print("No attractions matched your search.")
+            search_flow(attractions, reviews, favorites, routes, user)
         elif choice == "3":
             print("\nRoutes / Directions:")
             print("1. From CURRENT location -> Attraction")
             print("2. Attraction -> Attraction")
+            print("3. Plan a multi-stop trip")
+            print("4. Shortest path via other attractions")
+            print("5. Attractions near a place")
             print("0. Back")
             opt = input("Choose: ").strip()
             if opt == "1":
@@ -428,7 +4133,10 @@ def main():
                     print("Invalid attraction ID.")
                     continue
                 origin = input("Origin city (default: Kampala): ").strip() or "Kampala"
-                route = get_route(routes, "CURRENT", dest)
+                location = attractions.city_location(origin)
+                if location is None:
+                    print(f"No coordinates for {origin}; measuring from Kampala.")
+                route = get_route(routes, "CURRENT", dest, origin=location or DEFAULT_ORIGIN)
                 display_route(route)
                 open_map = input("Open Google Maps in browser? (y/n): ").strip().lower()
                 if open_map == "y":
@@ -438,17 +4146,30 @@ def main():
                 display_attractions_list(attractions)
                 a1 = input("Enter FROM Attraction ID: ").strip().upper()
                 a2 = input("Enter TO Attraction ID: ").strip().upper()
-                if not find_attraction(attractions, a1) or not find_attraction(attractions, a2):
+                from_a = find_attraction(attractions, a1)
+                to_a = find_attraction(attractions, a2)
+                if not from_a or not to_a:
                     print("One or both IDs invalid.")
                     continue
                 route = get_route(routes, a1, a2)
                 display_route(route)
-                o_city = find_attraction(attractions, a1)["city"]
-                d_city = find_attraction(attractions, a2)["city"]
+                near = nearest_attractions(attractions, a2, 3)
+                if near:
+                    print(f"Also near {to_a['name']}:")
+                    display_nearby(near)
+                o_city = from_a["city"]
+                d_city = to_a["city"]
                 open_map = input("Open Google Maps for these cities? (y/n): ").strip().lower()
                 if open_map == "y":
                     url = open_google_maps(o_city, d_city)
                     print("Google Maps link opened (or use):", url)
+            elif opt == "3":
+                display_attractions_list(attractions)
+                plan_trip_flow(attractions, routes)
+            elif opt == "4":
+                shortest_path_flow(attractions, routes)
+            elif opt == "5":
+                nearby_flow(attractions)
             elif opt == "0":
                 continue
             else:
@@ -458,18 +4179,12 @@ def main():
             aid = input("Enter Attraction ID to view reviews (or press Enter to cancel): ").strip().upper()
             if not aid:
                 continue
-            rvs = reviews.get(aid, [])
-            if not rvs:
-                print("No reviews yet for this attraction.")
-            else:
-                print(f"\nReviews for {aid}:")
-                for r in rvs:
-                    print(f"- {r['author']} ({r['rating']}/5) on {r['date']}: {r['comment']}")
+            display_reviews(reviews, aid, aid)
         elif choice == "5":
             display_attractions_list(attractions)
             add_review_flow(reviews)
         elif choice == "6":
-            favorites_flow(attractions, favorites)
+            favorites_flow(attractions, reviews, favorites, routes, user)
         elif choice == "7":
             confirm = input("Are you sure you want to exit? (y/n): ").strip().lower()
             if confirm == "y":
@@ -478,5 +4193,73 @@ def main():
         else:
             print("Invalid choice. Try again.")
 
+def main(argv=None):
+    args = parse_args(argv)
+    configure_data_dir(args.data_dir)
+    start_profiling(args.profile, args.cprofile)
+    if args.measure_startup:
+        print(json.dumps(measure_startup(), indent=2))
+        return
+    if args.migrate_to_sqlite:
+        ensure_data_dirs()
+        storage = SQLiteStorage()
+        try:
+            counts = migrate_json_to_sqlite(storage)
+        except RuntimeError as e:
+            print("❌", e)
+            return
+        finally:
+            storage.close()
+        print(f"✅ Migrated into {storage.path}:", ", ".join(f"{v} {k}" for k, v in counts.items()))
+        return
+    storage = open_storage(args.storage, use_snapshot=not args.no_snapshot, mapped_reviews=args.mmap_reviews or None)
+    if args.check_routes:
+        try:
+            attractions, reviews, favorites, routes = storage.load()
+            reviews.close()
+            favorites.close()
+        finally:
+            storage.close()
+        report = check_routes(routes, attractions)
+        report["reconciled"] = routes.delta
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        if not report["ok"]:
+            sys.exit(1)
+        return
+    if args.image_report:
+        try:
+            attractions, reviews, favorites, _ = storage.load()
+            reviews.close()
+            favorites.close()
+        finally:
+            storage.close()
+        print(json.dumps(image_report(attractions), indent=2, ensure_ascii=False))
+        return
+    if args.serve:
+        try:
+            run_server(storage, args.serve, max(0.01, args.flush_interval))
+        except (ValueError, OSError) as e:
+            print("❌", e)
+        finally:
+            storage.close()
+        return
+    if args.batch:
+        try:
+            totals = run_batch(storage, args.batch, args.output, max(1, args.batch_size))
+        finally:
+            storage.close()
+        print(f"{totals['commands']} command(s), {totals['errors']} error(s)", file=sys.stderr)
+        return
+    attractions, reviews, favorites, routes = storage.load()
+
+    print_welcome()
+
+    try:
+        run_menus(attractions, reviews, favorites, routes, args.user)
+    finally:
+        reviews.close()
+        favorites.close()
+        storage.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
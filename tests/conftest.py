@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import peerlearning as pl  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Point every data path at an empty temporary directory for one test."""
+    previous = pl.DATA_DIR
+    pl.configure_data_dir(tmp_path)
+    pl.ensure_data_dirs()
+    yield tmp_path
+    pl.configure_data_dir(previous)
+
+
+@pytest.fixture
+def catalog():
+    return [dict(a) for a in pl.DEFAULT_ATTRACTIONS]
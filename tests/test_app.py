@@ -0,0 +1,85 @@
+import io
+import json
+
+import peerlearning as pl
+
+
+def run_commands(commands, flush_every=pl.BATCH_FLUSH_EVERY):
+    runner = pl.BatchRunner(*pl.load_app_data(use_snapshot=False))
+    out = io.StringIO()
+    totals = runner.run([json.dumps(c) if isinstance(c, dict) else c for c in commands], out, flush_every)
+    runner.reviews.close()
+    return totals, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_snapshot_is_used_until_a_source_changes(data_dir):
+    attractions, reviews, _, _ = pl.load_app_data()
+    reviews.close()
+    assert pl.SNAPSHOT_FILE.exists() and pl.load_snapshot() is not None
+    attractions, reviews, _, _ = pl.load_app_data()
+    assert isinstance(reviews._reviews, pl.LazyDict)
+    reviews.add("A001", {"author": "x", "rating": 5, "comment": "", "date": ""})
+    reviews.close()
+    assert pl.load_snapshot() is None   # the log grew
+    attractions, reviews, _, _ = pl.load_app_data()
+    assert reviews["A001"][-1]["author"] == "x" and len(attractions) == len(pl.DEFAULT_ATTRACTIONS)
+    reviews.close()
+
+
+def test_batch_mode_answers_each_line(data_dir):
+    totals, results = run_commands([
+        {"op": "find", "aid": "a001", "tag": 1},
+        {"op": "search", "q": "falls", "limit": 2},
+        {"op": "route", "from": "A001", "to": "A002"},
+        {"op": "add_review", "aid": "A002", "author": "amina", "rating": 4, "comment": "Good"},
+        {"op": "reviews", "aid": "A002"},
+        {"op": "add_favorite", "user": "amina", "aid": "A003"},
+        {"op": "nope"},
+        "not json",
+        "",
+    ], flush_every=2)
+    assert totals == {"commands": 8, "errors": 2}
+    assert [r["line"] for r in results] == list(range(1, 9))
+    assert results[0]["tag"] == 1 and results[0]["result"]["id"] == "A001"
+    assert len(results[1]["result"]) == 2
+    assert results[4]["result"]["count"] == 1 and results[4]["result"]["mean"] == 4
+    assert not results[6]["ok"] and not results[7]["ok"]
+    assert pl.ReviewStore.load()["A002"][0]["author"] == "amina"
+    assert pl.FavoritesStore.load().get("amina") == ["A003"]
+
+
+def test_batch_mode_reports_unknown_attractions(data_dir):
+    _, results = run_commands([{"op": "route", "from": "A001", "to": "A999"}])
+    assert results == [{"line": 1, "op": "route", "ok": False, "error": "attraction 'A999' not found"}]
+
+
+def test_image_headers_and_report(data_dir):
+    ihdr = pl.struct.pack(">IIBBBBB", 640, 480, 8, 2, 0, 0, 0)
+    (pl.IMAGES_DIR / "murchison.jpg").write_bytes(b"\xff\xd8\xff\xe0\x00\x04ab\xff\xc0\x00\x11\x08\x01\xe0\x02\x80")
+    (pl.IMAGES_DIR / "orphan.png").write_bytes(pl._PNG_SIGNATURE + pl.struct.pack(">I", 13) + b"IHDR" + ihdr)
+    (pl.IMAGES_DIR / "kidepo.jpg").write_bytes(b"not an image")
+    assert pl.read_image_header(pl.IMAGES_DIR / "murchison.jpg") == {"format": "jpeg", "width": 640, "height": 480}
+    assert pl.read_image_header(pl.IMAGES_DIR / "orphan.png") == {"format": "png", "width": 640, "height": 480}
+    report = pl.image_report(pl.DEFAULT_ATTRACTIONS)
+    assert report["images"] == 3 and report["read"] == 3
+    assert report["orphaned"] == ["orphan.png"] and report["unreadable"] == ["kidepo.jpg"]
+    assert len(report["missing"]) == len(pl.DEFAULT_ATTRACTIONS) - 2
+    assert pl.image_report(pl.DEFAULT_ATTRACTIONS)["read"] == 0
+
+
+def test_profiler_wraps_and_restores(data_dir):
+    original = pl.search_attractions
+    profiler = pl.Profiler(pl.PROFILE_FILE)
+    profiler.start()
+    assert pl.search_attractions is not original
+    attractions, reviews, _, _ = pl.load_app_data(use_snapshot=False)
+    reviews.add("A001", {"author": "x", "rating": 5, "comment": "", "date": ""})
+    pl.search_attractions(attractions, "falls")
+    reviews.close()
+    profiler.stop()
+    assert pl.search_attractions is original
+    with open(pl.PROFILE_FILE, encoding="utf-8") as f:
+        functions = json.load(f)["functions"]
+    assert functions["search_attractions"]["calls"] == 1
+    assert functions["ReviewStore.add"]["calls"] == 1
+    assert "search_flow" not in functions
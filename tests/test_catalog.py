@@ -0,0 +1,103 @@
+import random
+
+import benchmark
+import peerlearning as pl
+
+
+def linear_filter(records, region=None, category=None, min_fee=None, max_fee=None,
+                  min_popularity=None, max_popularity=None, open_at=None):
+    def fits(a):
+        fee, pop = a["entry_fee_usd"], a["popularity"]
+        if region is not None and a["region"] != region:
+            return False
+        if category is not None and a["category"] != category:
+            return False
+        if min_fee is not None and fee < min_fee or max_fee is not None and fee > max_fee:
+            return False
+        if min_popularity is not None and pop < min_popularity or max_popularity is not None and pop > max_popularity:
+            return False
+        if open_at is not None:
+            return any(start <= open_at < end for start, end in pl.parse_opening_hours(a["opening_hours"]))
+        return True
+    return [a["id"] for a in records if fits(a)]
+
+
+def random_facets(rng):
+    facets = {}
+    if rng.random() < 0.5:
+        facets["region"] = rng.choice(benchmark.REGIONS)
+    if rng.random() < 0.5:
+        facets["category"] = rng.choice(benchmark.CATEGORIES)
+    if rng.random() < 0.5:
+        facets["max_fee"] = rng.choice([0, 5, 30])
+    if rng.random() < 0.5:
+        facets["min_popularity"] = rng.uniform(5, 10)
+    if rng.random() < 0.5:
+        facets["open_at"] = rng.randrange(pl.MINUTES_PER_DAY)
+    return facets
+
+
+def test_find_attraction_is_case_insensitive_and_first_wins(catalog):
+    attractions = pl.AttractionCatalog(catalog + [dict(catalog[0], name="Duplicate")])
+    assert pl.find_attraction(attractions, " a001 ")["name"] == catalog[0]["name"]
+    assert pl.find_attraction(attractions, "A999") is None
+    attractions.remove("A001")
+    assert pl.find_attraction(attractions, "A001")["name"] == "Duplicate"
+
+
+def test_region_and_category_indexes(catalog):
+    attractions = pl.AttractionCatalog(catalog)
+    assert [a["id"] for a in attractions.by_region("Eastern")] == \
+        [a["id"] for a in catalog if a["region"] == "Eastern"]
+    assert attractions.categories() == sorted({a["category"] for a in catalog})
+
+
+def test_search_matches_words_and_prefixes(catalog):
+    attractions = pl.AttractionCatalog(catalog)
+    found = [a["id"] for a in pl.search_attractions(attractions, "falls")]
+    assert set(found) == {"A001", "A020", "A023"}
+    assert pl.search_attractions(attractions, "falls", limit=2) == pl.search_attractions(attractions, "falls")[:2]
+    assert {"A014", "A016"} <= {a["id"] for a in pl.search_attractions(attractions, "gorill")}
+    assert pl.search_attractions(attractions, "falls zzzz") == []
+
+
+def test_search_follows_add_and_remove(catalog):
+    attractions = pl.AttractionCatalog(catalog)
+    assert pl.search_attractions(attractions, "nile")
+    attractions.add({**catalog[0], "id": "A100", "name": "Karuma Zebra Lodge"})
+    assert [a["id"] for a in pl.search_attractions(attractions, "zebra lodge")] == ["A100"]
+    attractions.remove("A100")
+    assert pl.search_attractions(attractions, "lodge") == []
+
+
+def test_facets_match_a_linear_scan():
+    records = benchmark.make_catalog(500)
+    attractions = pl.AttractionCatalog(records)
+    rng = random.Random(7)
+    for _ in range(300):
+        facets = random_facets(rng)
+        assert [a["id"] for a in pl.filter_attractions(attractions, **facets)] == linear_filter(records, **facets)
+
+
+def test_facets_stay_correct_across_add_and_remove():
+    records = benchmark.make_catalog(300)
+    attractions = pl.AttractionCatalog(records[:200])
+    attractions.facets   # build the index before the catalog changes
+    for rec in records[200:]:
+        attractions.add(rec)
+    rng = random.Random(8)
+    for _ in range(200):
+        facets = random_facets(rng)
+        assert [a["id"] for a in pl.filter_attractions(attractions, **facets)] == linear_filter(records, **facets)
+    attractions.remove(records[0]["id"])
+    facets = {"min_popularity": 0}
+    assert [a["id"] for a in pl.filter_attractions(attractions, **facets)] == [a["id"] for a in records[1:]]
+
+
+def test_nearest_matches_sorted_distances(catalog):
+    attractions = pl.AttractionCatalog(catalog)
+    a = attractions.get("A009")
+    expected = sorted((pl.haversine_km(a["lat"], a["lon"], b["lat"], b["lon"]), b["id"])
+                      for b in catalog if b["id"] != "A009")[:5]
+    found = pl.nearest_attractions(attractions, "A009", 5)
+    assert [rec["id"] for _, rec in found] == [aid for _, aid in expected]
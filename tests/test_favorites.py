@@ -0,0 +1,57 @@
+import json
+
+import peerlearning as pl
+
+
+def shard_files():
+    return sorted(p.name for p in pl.FAVORITES_DIR.glob("shard_*.json"))
+
+
+def test_first_start_writes_no_empty_shards(data_dir):
+    favorites = pl.FavoritesStore.load()
+    assert pl.FAVORITES_DIR.is_dir() and shard_files() == []
+    favorites.add("amina", "A001")
+    assert shard_files() == [pl.favorites_shard_path(pl.favorites_shard("amina")).name]
+
+
+def test_favorites_json_is_migrated_to_shards(data_dir):
+    pl.save_json(pl.FAVORITES_FILE, {"amina": ["A001", "A002"], "john": ["A002"], "nobody": []})
+    favorites = pl.FavoritesStore.load()
+    assert not pl.FAVORITES_FILE.exists()
+    assert pl.FAVORITES_FILE.with_name("favorites.json.migrated").exists()
+    assert len(shard_files()) == len({pl.favorites_shard(u) for u in ("amina", "john")})
+    assert pl.FavoritesStore.load().to_dict() == favorites.to_dict() == {"amina": ["A001", "A002"], "john": ["A002"]}
+
+
+def test_set_semantics_and_counts(data_dir):
+    favorites = pl.FavoritesStore.load()
+    assert favorites.add("amina", "A001")
+    assert not favorites.add("amina", "A001")
+    favorites.add("john", "A001")
+    favorites.add("john", "A003")
+    assert favorites.count("A001") == 2
+    assert favorites.most_favorited(1) == [("A001", 2)]
+    assert favorites.remove("amina", "A001")
+    assert not favorites.remove("amina", "A001")
+    assert favorites.counts() == {"A001": 1, "A003": 1}
+    assert pl.FavoritesStore.load().to_dict() == {"john": ["A001", "A003"]}
+
+
+def test_emptied_shard_is_rewritten(data_dir):
+    favorites = pl.FavoritesStore.load()
+    favorites.add("amina", "A001")
+    favorites.remove("amina", "A001")
+    path = pl.favorites_shard_path(pl.favorites_shard("amina"))
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {}
+
+
+def test_batch_writes_each_shard_once(data_dir, monkeypatch):
+    favorites = pl.FavoritesStore.load()
+    writes = []
+    real_write = pl.write_json_atomic
+    monkeypatch.setattr(pl, "write_json_atomic", lambda path, obj: (writes.append(path.name), real_write(path, obj)))
+    with favorites.batch():
+        for n in range(10):
+            favorites.add("amina", f"A{n + 1:03d}")
+    assert writes == [pl.favorites_shard_path(pl.favorites_shard("amina")).name]
@@ -0,0 +1,150 @@
+import json
+
+import benchmark
+import peerlearning as pl
+
+
+def review(n, rating=5):
+    return {"author": f"user{n}", "rating": rating, "comment": "ok", "date": f"2025-01-{n % 28 + 1:02d} 10:00:00"}
+
+
+def write_reviews(reviews):
+    pl.save_json(pl.REVIEWS_FILE, reviews)
+    with open(pl.REVIEWS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_reviews_survive_reload(data_dir):
+    store = pl.ReviewStore.load()
+    store.add("A001", review(1))
+    with store.batch():
+        store.add("A001", review(2, 3))
+        store.add("A002", review(3))
+    store.close()
+    again = pl.ReviewStore.load()
+    assert again["A001"] == [review(1), review(2, 3)]
+    assert again.stats("A001").count == 2 and again.stats("A001").total == 8
+    assert again.seq == 3
+
+
+def test_torn_log_line_is_cut_off_on_replay(data_dir):
+    store = pl.ReviewStore.load()
+    store.add("A001", review(1))
+    store.add("A001", review(2))
+    store.close()
+    with open(pl.REVIEW_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write('{"seq": 3, "aid": "A001", "rev')
+    again = pl.ReviewStore.load()
+    assert again["A001"] == [review(1), review(2)]
+    again.add("A002", review(3))
+    again.close()
+    lines = pl.REVIEW_LOG_FILE.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["seq"] for line in lines] == [1, 2, 3]
+    assert pl.ReviewStore.load()["A002"] == [review(3)]
+
+
+def test_compaction_folds_the_log_into_reviews_json(data_dir):
+    store = pl.ReviewStore.load()
+    for n in range(5):
+        store.add("A003", review(n))
+    store.compact()
+    store.close()
+    assert pl.REVIEW_LOG_FILE.read_text(encoding="utf-8") == ""
+    with open(pl.REVIEWS_FILE, encoding="utf-8") as f:
+        assert json.load(f) == {"A003": [review(n) for n in range(5)]}
+    again = pl.ReviewStore.load()
+    assert again["A003"] == [review(n) for n in range(5)]
+    assert again.seq == 5
+
+
+def test_crash_between_sidecar_and_replace_keeps_reviews_once(data_dir):
+    store = pl.ReviewStore.load()
+    store.add("A001", review(1))
+    store.compact()
+    store.add("A001", review(2))
+    store.close()
+    # a compaction that wrote the sidecar but died before replacing reviews.json
+    original_replace = pl.os.replace
+
+    def crash(src, dst):
+        if str(dst) == str(pl.REVIEWS_FILE):
+            raise KeyboardInterrupt
+        original_replace(src, dst)
+
+    crashing = pl.ReviewStore.load()
+    pl.os.replace = crash
+    try:
+        crashing.compact()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pl.os.replace = original_replace
+    crashing.close()
+    assert pl.ReviewStore.load()["A001"] == [review(1), review(2)]
+
+
+def test_legacy_meta_member_moves_to_the_sidecar(data_dir):
+    pl.save_json(pl.REVIEWS_FILE, {"A001": [review(1)], pl.LEGACY_META_KEY: {"log_seq": 1}})
+    with open(pl.REVIEW_LOG_FILE, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"seq": 1, "aid": "A001", "review": review(1)}) + "\n")
+        f.write(json.dumps({"seq": 2, "aid": "A001", "review": review(2)}) + "\n")
+    store = pl.ReviewStore.load()
+    assert store["A001"] == [review(1), review(2)]
+    store.close()
+    with open(pl.REVIEWS_FILE, encoding="utf-8") as f:
+        assert pl.LEGACY_META_KEY not in json.load(f)
+    assert pl.read_reviews_meta(pl.REVIEWS_FILE)[0] == 2
+
+
+def test_streamed_reviews_match_json_load(data_dir):
+    expected = write_reviews(benchmark.make_reviews(benchmark.make_catalog(200)))
+    reviews, stats, legacy = pl.stream_reviews(pl.REVIEWS_FILE)
+    assert reviews == expected and legacy is None
+    assert {aid: st.to_list() for aid, st in stats.items()} == \
+        {aid: pl.ReviewStats.of(rvs).to_list() for aid, rvs in expected.items()}
+    assert dict(pl.iter_json_object(pl.REVIEWS_FILE, chunk_size=7)) == expected
+
+
+def test_mapped_reviews_match_json_load(data_dir):
+    expected = write_reviews(benchmark.make_reviews(benchmark.make_catalog(200), per_attraction=6))
+    store = pl.ReviewStore.load(mapped=True)
+    assert isinstance(store._reviews, pl.MappedReviews)
+    assert {aid: rvs for aid, rvs in store.items()} == expected
+    for aid, rvs in list(expected.items())[:20]:
+        assert store.page(aid, 1, 3) == rvs[1:4]
+        assert store[aid] == rvs
+    store.close()
+
+
+def test_mapped_compaction_keeps_unread_lists(data_dir):
+    expected = write_reviews(benchmark.make_reviews(benchmark.make_catalog(50), per_attraction=4))
+    store = pl.ReviewStore.load(mapped=True)
+    aid = next(iter(expected))
+    store.add(aid, review(99))
+    store.compact()
+    store.close()
+    expected[aid].append(review(99))
+    with open(pl.REVIEWS_FILE, encoding="utf-8") as f:
+        assert json.load(f) == expected
+    assert dict(pl.ReviewStore.load(mapped=True).items()) == expected
+
+
+def test_written_base_matches_json_dump_layout(data_dir):
+    base = {"A001": [review(1), review(2)], "A002": []}
+    pl.write_reviews_base(pl.REVIEWS_FILE, base)
+    assert pl.REVIEWS_FILE.read_text(encoding="utf-8") == json.dumps(base, indent=2, ensure_ascii=False)
+    pl.write_reviews_base(pl.REVIEWS_FILE, {})
+    assert pl.REVIEWS_FILE.read_text(encoding="utf-8") == "{}"
+
+
+def test_top_rated_orders_by_mean(data_dir):
+    attractions = pl.AttractionCatalog(pl.DEFAULT_ATTRACTIONS)
+    store = pl.ReviewStore.load()
+    with store.batch():
+        store.add("A001", review(1, 3))
+        store.add("A002", review(2, 5))
+        store.add("A003", review(3, 4))
+        store.add("A003", review(4, 5))
+    ranked = [a["id"] for a, _, _ in pl.top_rated(attractions, store, k=3)]
+    store.close()
+    assert ranked == ["A002", "A003", "A001"]
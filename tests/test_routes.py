@@ -0,0 +1,146 @@
+import json
+
+import peerlearning as pl
+
+
+def route_tuple(route):
+    return route["distance_km"], route["time_min"], list(route["steps"])
+
+
+def test_route_store_matches_generate_default_routes(catalog):
+    routes = pl.RouteStore(catalog)
+    reference = pl.generate_default_routes(catalog)
+    assert len(routes) == len(reference)
+    assert set(routes) == set(reference)
+    for key, expected in reference.items():
+        assert route_tuple(routes[key]) == route_tuple(expected), key
+
+
+def test_route_store_matches_without_coordinates(catalog):
+    for a in catalog[::3]:
+        del a["lat"], a["lon"]
+    routes = pl.RouteStore(catalog)
+    reference = pl.generate_default_routes(catalog)
+    for key, expected in reference.items():
+        assert route_tuple(routes[key]) == route_tuple(expected), key
+
+
+def test_full_row_agrees_with_single_lookups(catalog):
+    single = pl.RouteStore(catalog)
+    rows = pl.RouteStore(catalog)
+    rows.build_matrix()
+    for key in ("A001A002", "A014A030", "CURRENT__A020"):
+        assert route_tuple(single[key]) == route_tuple(rows[key])
+
+
+def test_overrides_take_precedence(catalog):
+    override = {"distance_km": 1, "time_min": 2, "steps": ["Ferry"]}
+    routes = pl.RouteStore(catalog, {"A010A030": override})
+    assert routes["A010A030"] == override
+    assert pl.get_route(routes, "a010", "a030") == override
+
+
+def test_check_routes_reports_ok(catalog):
+    assert pl.check_routes(pl.RouteStore(catalog), catalog)["ok"]
+
+
+def test_get_route_origin_leaves_store_alone(catalog):
+    routes = pl.RouteStore(catalog)
+    before = route_tuple(routes["CURRENT__A014"])
+    moved = pl.get_route(routes, "CURRENT", "A014", origin=(-1.0, 29.7))
+    assert moved["distance_km"] < before[0]
+    assert routes.origin == pl.DEFAULT_ORIGIN
+    assert route_tuple(routes["CURRENT__A014"]) == before
+
+
+def test_load_routes_keeps_only_legacy_edits(data_dir, catalog):
+    legacy = pl.RouteStore(catalog)
+    legacy.set_origin(None)
+    for a in catalog:
+        del a["lat"], a["lon"]
+    dump = {key: legacy[key].to_dict() for key in ("A001A002", "CURRENT__A003")}
+    dump["A001A002"]["distance_km"] += 5
+    pl.save_json(pl.ROUTES_FILE, dump)
+    routes = pl.load_routes(catalog)
+    assert list(routes.overrides) == ["A001A002"]
+    with open(pl.ROUTES_FILE, encoding="utf-8") as f:
+        assert json.load(f)["format"] == pl.ROUTE_STORE_FORMAT
+
+
+def test_load_routes_drops_overrides_of_removed_attractions(data_dir, catalog):
+    override = {"distance_km": 1, "time_min": 2, "steps": ["Ferry"]}
+    pl.save_json(pl.ROUTES_FILE, pl.RouteStore(catalog, {"A010A030": override, "A001A002": override}).to_json())
+    routes = pl.load_routes([a for a in catalog if a["id"] != "A030"])
+    assert list(routes.overrides) == ["A001A002"]
+    assert routes.delta["removed"] == ["A030"]
+
+
+def test_shortest_path_never_beats_itself_with_detours(catalog):
+    attractions = pl.AttractionCatalog(catalog)
+    routes = pl.RouteStore(attractions)
+    for a, b in [("A001", "A014"), ("CURRENT", "A020"), ("A010", "A002")]:
+        total, path = pl.shortest_path(routes, attractions, a, b)
+        assert path[0] == a and path[-1] == b
+        direct = pl.get_route(routes, a, b)["distance_km"]
+        assert total <= direct
+        assert total == sum(pl.get_route(routes, x, y)["distance_km"] for x, y in zip(path, path[1:]))
+
+
+def test_plan_trip_visits_every_stop_once(catalog):
+    routes = pl.RouteStore(catalog)
+    stops = ["A014", "A002", "A020", "A010", "A005"]
+    plan = pl.plan_trip(routes, "CURRENT", stops)
+    assert plan["order"][0] == "CURRENT"
+    assert sorted(plan["order"][1:]) == sorted(stops)
+    assert plan["distance_km"] == sum(route["distance_km"] for _, _, route in plan["legs"])
+
+
+def test_load_routes_keeps_overrides_of_renamed_attractions(data_dir, catalog):
+    override = {"distance_km": 1, "time_min": 2, "steps": ["Ferry"]}
+    pl.save_json(pl.ROUTES_FILE, pl.RouteStore(catalog, {"A010A030": override, "A001A002": override}).to_json())
+    saved = pl.ROUTES_FILE.read_bytes()
+    catalog[29]["name"] = "Kalangala Sand Beaches"
+    for _ in range(2):   # still flagged on the next start
+        routes = pl.load_routes(catalog)
+        assert routes.overrides == {"A010A030": override, "A001A002": override}
+        assert routes.delta["changed"] == ["A030"] and routes.delta["stale"] == ["A010A030"]
+        report = pl.check_routes(routes, catalog)
+        assert report["stale_overrides"] == ["A010A030"] and not report["ok"]
+    assert pl.ROUTES_FILE.read_bytes() == saved
+    # deleting the saved fingerprint accepts the override for the new name
+    data = json.loads(saved)
+    del data["fingerprints"]["A030"]
+    pl.save_json(pl.ROUTES_FILE, data)
+    routes = pl.load_routes(catalog)
+    assert routes.delta["stale"] == [] and pl.check_routes(routes, catalog)["ok"]
+
+
+def test_renamed_and_removed_attractions_together(data_dir, catalog):
+    override = {"distance_km": 1, "time_min": 2, "steps": ["Ferry"]}
+    overrides = {"A010A030": override, "CURRENT__A005": override, "A005A006": override}
+    pl.save_json(pl.ROUTES_FILE, pl.RouteStore(catalog, overrides).to_json())
+    catalog[4]["city"] = "Kilembe"
+    routes = pl.load_routes([a for a in catalog if a["id"] != "A030"])
+    assert sorted(routes.overrides) == ["A005A006", "CURRENT__A005"]
+    assert routes.delta["dropped"] == ["A010A030"]
+    assert sorted(routes.delta["stale"]) == ["A005A006", "CURRENT__A005"]
+    with open(pl.ROUTES_FILE, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert sorted(saved["overrides"]) == ["A005A006", "CURRENT__A005"]
+    assert saved["fingerprints"]["A005"] == pl.route_fingerprint(pl.DEFAULT_ATTRACTIONS[4])
+
+
+def test_sqlite_keeps_overrides_of_renamed_attractions(data_dir, catalog):
+    override = {"distance_km": 1, "time_min": 2, "steps": ["Ferry"]}
+    storage = pl.SQLiteStorage()
+    attractions, _, _, routes = storage.load()
+    routes.overrides.update({"A010A030": override, "A001A002": override})
+    storage.save_route_overrides(routes)
+    renamed = [dict(a) for a in attractions]
+    renamed[29]["name"] = "Kalangala Sand Beaches"
+    storage.save_attractions(renamed[:1] + renamed[2:])
+    for _ in range(2):
+        _, _, _, routes = storage.load()
+        assert list(routes.overrides) == ["A010A030"]
+        assert routes.delta["stale"] == ["A010A030"]
+    storage.close()
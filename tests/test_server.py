@@ -0,0 +1,148 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+import peerlearning as pl
+
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(data) if data else None
+
+
+def serve(storage, check, flush_interval=60):
+    """Run ``check(api, port)`` against a live server on an ephemeral port."""
+    async def main():
+        api = pl.ApiServer(*storage.load(), flush_interval=flush_interval)
+        server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+        flusher = asyncio.create_task(api._flush_loop())
+        try:
+            await check(api, server.sockets[0].getsockname()[1])
+        finally:
+            flusher.cancel()
+            server.close()
+            await api.flush()
+    asyncio.run(main())
+
+
+def test_sqlite_writes_leave_the_database_unlocked(data_dir):
+    storage = pl.SQLiteStorage()
+
+    async def check(api, port):
+        assert not api.batched
+        status, _ = await request(port, "POST", "/attractions/A001/reviews", {"author": "amina", "rating": 5})
+        assert status == 201
+        assert (await request(port, "POST", "/users/amina/favorites", {"aid": "A002"}))[0] in (200, 201)
+        other = sqlite3.connect(str(storage.path), timeout=0, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")   # raises "database is locked" if the server kept a transaction
+        assert other.execute("SELECT COUNT(*) FROM reviews WHERE aid = 'A001'").fetchone()[0] == 1
+        other.execute("ROLLBACK")
+        other.close()
+        status, reviews = await request(port, "GET", "/attractions/A001/reviews")
+        assert reviews["count"] == 1
+
+    try:
+        serve(storage, check)
+    finally:
+        storage.close()
+
+
+def test_sqlite_reads_do_not_wait_for_a_blocked_write(data_dir):
+    storage = pl.SQLiteStorage()
+
+    async def check(api, port):
+        other = sqlite3.connect(str(storage.path), isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")   # another process holds the write lock
+        try:
+            write = asyncio.create_task(request(port, "POST", "/attractions/A001/reviews", {"author": "amina", "rating": 5}))
+            await asyncio.sleep(0.2)
+            assert not write.done()
+            started = time.perf_counter()
+            for path in ("/attractions/A001/reviews", "/users/amina/favorites", "/attractions/A002"):
+                assert (await request(port, "GET", path))[0] == 200
+            assert time.perf_counter() - started < 1
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+        assert (await write)[0] == 201
+        assert (await request(port, "GET", "/attractions/A001/reviews"))[1]["count"] == 1
+
+    try:
+        serve(storage, check)
+    finally:
+        storage.close()
+
+
+def test_json_writes_are_batched_until_the_next_flush(data_dir):
+    storage = pl.JsonStorage(use_snapshot=False)
+
+    async def check(api, port):
+        assert api._batches is None
+        for n in range(3):
+            await request(port, "POST", "/attractions/A001/reviews", {"author": f"u{n}", "rating": 4})
+        assert api._batches is not None
+        assert not pl.REVIEW_LOG_FILE.exists() or pl.REVIEW_LOG_FILE.read_text(encoding="utf-8") == ""
+        await api.flush()
+        assert api._batches is None
+        assert len(pl.REVIEW_LOG_FILE.read_text(encoding="utf-8").splitlines()) == 3
+        status, reviews = await request(port, "GET", "/attractions/A001/reviews")
+        assert status == 200 and reviews["count"] == 3
+
+    serve(storage, check)
+
+
+def test_background_flush_writes_favorites(data_dir):
+    storage = pl.JsonStorage(use_snapshot=False)
+
+    async def check(api, port):
+        await request(port, "POST", "/users/amina/favorites", {"aid": "A003"})
+        for _ in range(100):
+            if api._batches is None and api._flushing is None:
+                break
+            await asyncio.sleep(0.01)
+        assert pl.FavoritesStore.load().get("amina") == ["A003"]
+
+    serve(storage, check, flush_interval=0.05)
+
+
+def test_writes_during_a_flush_wait_for_it(data_dir):
+    storage = pl.JsonStorage(use_snapshot=False)
+    done = []
+
+    async def check(api, port):
+        reviews = api.runner.reviews
+        real_flush = reviews.flush
+
+        def slow_flush():
+            time.sleep(0.01)
+            real_flush()
+        reviews.flush = slow_flush
+        # a flush whose close has finished but whose task has not resumed yet
+        api._flushing = asyncio.get_running_loop().create_future()
+        api._flushing.set_result(None)
+        assert (await request(port, "POST", "/attractions/A001/reviews", {"author": "first", "rating": 5}))[0] == 201
+
+        async def client(c):
+            for n in range(20):
+                status, _ = await request(port, "POST", "/attractions/A001/reviews", {"author": f"u{c}-{n}", "rating": 5})
+                assert status == 201
+        # flushes every 10 ms keep finishing while new writes arrive
+        await asyncio.gather(*(client(c) for c in range(10)))
+        await api.flush()
+        assert len(pl.REVIEW_LOG_FILE.read_text(encoding="utf-8").splitlines()) == 201
+        done.append(True)
+
+    # a livelocked event loop never yields, so watch it from another thread
+    runner = threading.Thread(target=serve, args=(storage, check, 0.01), daemon=True)
+    runner.start()
+    runner.join(30)
+    assert not runner.is_alive() and done
@@ -0,0 +1,76 @@
+import multiprocessing
+
+import pytest
+
+import peerlearning as pl
+
+WRITERS = 4
+WRITES = 25
+
+
+def write_from_process(path, writer):
+    storage = pl.SQLiteStorage(path)
+    _, reviews, favorites, _ = storage.load()
+    for n in range(WRITES):
+        reviews.add("A001", {"author": f"w{writer}", "rating": n % 5 + 1, "comment": "", "date": ""})
+        favorites.add(f"user{writer}", f"A{n + 1:03d}")
+    storage.close()
+
+
+@pytest.fixture
+def sqlite_storage(data_dir):
+    storage = pl.SQLiteStorage()
+    storage.load()   # migrates the (default) JSON data
+    yield storage
+    storage.close()
+
+
+def test_migration_copies_json_data(data_dir):
+    pl.save_json(pl.FAVORITES_FILE, {"amina": ["A002", "A003"]})
+    store = pl.ReviewStore.load()
+    store.add("A001", {"author": "x", "rating": 4, "comment": "", "date": "2025-01-01"})
+    store.close()
+    storage = pl.SQLiteStorage()
+    attractions, reviews, favorites, _ = storage.load()
+    assert len(attractions) == len(pl.DEFAULT_ATTRACTIONS)
+    assert reviews["A001"][0]["rating"] == 4 and reviews.stats("A001").count == 1
+    assert favorites.get("amina") == ["A002", "A003"]
+    assert favorites.count("A002") == 1
+    storage.close()
+
+
+def test_concurrent_writers_lose_nothing(sqlite_storage):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=write_from_process, args=(str(sqlite_storage.path), w)) for w in range(WRITERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+    _, reviews, favorites, _ = sqlite_storage.load()
+    assert reviews.stats("A001").count == WRITERS * WRITES
+    assert len(reviews["A001"]) == WRITERS * WRITES
+    assert favorites.count("A001") == WRITERS
+    assert sorted(favorites.users()) == [f"user{w}" for w in range(WRITERS)]
+
+
+def test_batch_rolls_back_as_a_whole(sqlite_storage):
+    _, reviews, _, _ = sqlite_storage.load()
+    with pytest.raises(RuntimeError):
+        with reviews.batch():
+            reviews.add("A002", {"author": "x", "rating": 5, "comment": "", "date": ""})
+            raise RuntimeError
+    assert "A002" not in reviews
+    with reviews.batch():
+        reviews.add("A002", {"author": "x", "rating": 5, "comment": "", "date": ""})
+        reviews.add("A002", {"author": "y", "rating": 1, "comment": "", "date": ""})
+    assert reviews.stats("A002").to_list()[:2] == [2, 6]
+
+
+def test_favorites_are_a_set(sqlite_storage):
+    _, _, favorites, _ = sqlite_storage.load()
+    assert favorites.add("amina", "A001")
+    assert not favorites.add("amina", "A001")
+    assert favorites.count("A001") == 1
+    assert favorites.remove("amina", "A001")
+    assert favorites.count("A001") == 0 and favorites.most_favorited() == []